@@ -0,0 +1,322 @@
+"""
+批量任务：在一个进程中按任务文件执行多个日期范围/账号组合的生成与导出
+
+任务文件（JSON）示例::
+
+    {
+        "config_dir": "config",
+        "scratch_dir": null,
+        "cache_dir": null,
+        "memo_max_bytes": null,
+        "workers": 2,
+        "summary": "batch_summary.json",
+        "jobs": [
+            {
+                "name": "二月全量",
+                "start_date": "2026-02-01",
+                "end_date": "2026-02-28",
+                "output": "out/2026-02.xlsx",
+                "from_accounts": ["app_user"],
+                "master_accounts": null,
+                "pools": null,
+                "networks": ["10.1.0.0/16"],
+                "engine": null,
+                "compression_level": null
+            }
+        ]
+    }
+
+from_accounts / master_accounts 省略或为 null 时使用配置目录中的全部账号。
+pools / networks 按资源池、网段（CIDR、完整IP或IP文本前缀如 "10.1."）筛选服务器，省略或为 null 时不限；
+两者同时指定时取交集。
+engine 省略或为 null 时按预估自动选择导出方式，也可指定 in_memory / streaming / sharded / parallel。
+compression_level 省略或为 null 时使用默认压缩；0 只存储不压缩，1~9 为deflate级别
+（导出后立即被程序导入的中间文件可用0或1缩短导出时间）。
+scratch_dir 为导出临时文件目录（如tmpfs、本地SSD），省略时写在输出目录中，完成后原子替换输出文件。
+cache_dir 为导出缓存目录，数据与选项相同的任务直接复制缓存文件；省略时不缓存。
+memo_max_bytes 为每个工作进程缓存生成结果的内存上限（字节），参数相同的任务不再重复生成数据；
+省略时为默认上限，0 不缓存。
+相对路径均相对于任务文件所在目录。
+
+用法::
+
+    python -m logic.batch jobs.json [--summary summary.json] [--workers 2]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Optional, List, Dict, Any
+
+from .config_store import ConfigStore
+from .inventory import ServerFilter
+from .export_cache import ExportCache
+from .generation_memo import GenerationMemo, DEFAULT_MAX_BYTES as DEFAULT_MEMO_BYTES
+from .planner import ExportEngine
+from .work_table import WorkTable
+
+
+# ==================== 任务定义 ====================
+
+@dataclass
+class BatchJob:
+    """单个批量任务"""
+    name: str
+    start_date: str  # 格式如 "2026-02-01"
+    end_date: str  # 格式如 "2026-02-28"
+    output: str  # 输出文件路径
+    from_accounts: Optional[List[str]] = None  # None 表示全部从账号
+    master_accounts: Optional[List[str]] = None  # None 表示全部主账号
+    pools: Optional[List[str]] = None  # 只生成这些资源池的服务器，None 表示不限
+    networks: Optional[List[str]] = None  # 只生成这些网段的服务器，None 表示不限
+    include_sheetname_prefix: bool = True
+    native_datetime: bool = False  # 起止时间写为Excel日期时间单元格（"夜"时段结束时间仍为24:00:00文本）
+    engine: Optional[str] = None  # 导出方式，None 表示自动选择
+    compression_level: Optional[int] = None  # zip压缩级别，None 表示默认
+
+
+@dataclass
+class BatchSpec:
+    """批量任务文件"""
+    jobs: List[BatchJob]
+    config_dir: str
+    workers: int = 1
+    summary: Optional[str] = None
+    scratch_dir: Optional[str] = None  # 导出临时文件目录
+    cache_dir: Optional[str] = None  # 导出缓存目录
+    memo_max_bytes: int = DEFAULT_MEMO_BYTES  # 生成结果缓存的内存上限，0 不缓存
+
+
+@dataclass
+class JobResult:
+    """单个任务的执行结果"""
+    name: str
+    output: str
+    status: str = "ok"  # ok / failed / skipped
+    error: Optional[str] = None
+    sheet_count: int = 0
+    row_count: int = 0
+    engine: Optional[str] = None  # 实际使用的导出方式
+    files: List[str] = field(default_factory=list)  # 实际写入的文件（分文件导出时有多个）
+    timings: Dict[str, float] = field(default_factory=dict)  # 各阶段耗时（秒）
+
+
+def load_batch_spec(spec_path: str) -> BatchSpec:
+    """读取并校验任务文件"""
+    with open(spec_path, 'r', encoding='utf-8') as f:
+        raw = json.load(f)
+
+    base_dir = os.path.dirname(os.path.abspath(spec_path))
+
+    def resolve(path: str) -> str:
+        return path if os.path.isabs(path) else os.path.join(base_dir, path)
+
+    raw_jobs = raw.get('jobs')
+    if not raw_jobs:
+        raise ValueError("任务文件中没有任何任务（jobs）")
+
+    jobs = []
+    for index, item in enumerate(raw_jobs, 1):
+        for key in ('start_date', 'end_date', 'output'):
+            if not item.get(key):
+                raise ValueError(f"第{index}个任务缺少字段: {key}")
+        if item.get('engine') and item['engine'] not in {e.value for e in ExportEngine}:
+            raise ValueError(f"第{index}个任务的导出方式无效: {item['engine']}")
+        for key in ('pools', 'networks'):
+            values = item.get(key)
+            if values is not None and (not isinstance(values, list)
+                                       or not all(isinstance(v, str) and v.strip() for v in values)):
+                raise ValueError(f"第{index}个任务的{key}应为非空字符串列表")
+        level = item.get('compression_level')
+        if level is not None and (not isinstance(level, int) or not 0 <= level <= 9):
+            raise ValueError(f"第{index}个任务的压缩级别无效: {level}")
+        jobs.append(BatchJob(
+            name=item.get('name') or f"job{index}",
+            start_date=item['start_date'],
+            end_date=item['end_date'],
+            output=resolve(item['output']),
+            from_accounts=item.get('from_accounts'),
+            master_accounts=item.get('master_accounts'),
+            pools=item.get('pools'),
+            networks=item.get('networks'),
+            include_sheetname_prefix=item.get('include_sheetname_prefix', True),
+            native_datetime=item.get('native_datetime', False),
+            engine=item.get('engine'),
+            compression_level=level
+        ))
+
+    summary = raw.get('summary')
+    scratch_dir = raw.get('scratch_dir')
+    cache_dir = raw.get('cache_dir')
+    memo_max_bytes = raw.get('memo_max_bytes')
+    if memo_max_bytes is None:
+        memo_max_bytes = DEFAULT_MEMO_BYTES
+    elif not isinstance(memo_max_bytes, int) or memo_max_bytes < 0:
+        raise ValueError(f"生成结果缓存上限无效: {memo_max_bytes}")
+    return BatchSpec(
+        jobs=jobs,
+        config_dir=resolve(raw.get('config_dir', 'config')),
+        workers=max(int(raw.get('workers', 1)), 1),
+        summary=resolve(summary) if summary else None,
+        scratch_dir=resolve(scratch_dir) if scratch_dir else None,
+        cache_dir=resolve(cache_dir) if cache_dir else None,
+        memo_max_bytes=memo_max_bytes
+    )
+
+
+# ==================== 任务执行 ====================
+
+# 每个进程复用一个 WorkTable（模板与样式只构建一次）
+_worker_table: Optional[WorkTable] = None
+_worker_config: Optional[ConfigStore] = None
+
+
+def _init_worker(config_dir: str, scratch_dir: Optional[str] = None, cache_dir: Optional[str] = None,
+                 memo_max_bytes: int = DEFAULT_MEMO_BYTES):
+    """初始化工作进程：构建模板并加载配置文件"""
+    global _worker_table, _worker_config
+    _worker_table = WorkTable()
+    _worker_table.scratch_dir = scratch_dir
+    _worker_table.export_cache = ExportCache(cache_dir) if cache_dir else None
+    if memo_max_bytes > 0:
+        _worker_table.generation_memo = GenerationMemo(memo_max_bytes)
+    _worker_config = ConfigStore(config_dir)
+
+
+def _quiet_callback(progress: int, status: str):
+    """批量模式下不输出逐sheet进度"""
+    return True
+
+
+def _run_job(job: BatchJob) -> JobResult:
+    """在当前进程中执行一个任务"""
+    result = JobResult(name=job.name, output=job.output)
+    job_start = time.perf_counter()
+
+    resource_ip_list = _worker_config.inventory()
+    server_filter = ServerFilter(pools=tuple(job.pools or ()), networks=tuple(job.networks or ()))
+    # 只取行序号计数，数据在生成时按同一索引筛选
+    server_count = len(resource_ip_list.index.select(server_filter)) if not server_filter.empty \
+        else len(resource_ip_list)
+    from_account_list = job.from_accounts if job.from_accounts is not None else _worker_config.from_accounts()
+    master_account_list = job.master_accounts if job.master_accounts is not None else _worker_config.master_accounts()
+
+    if not server_count or not from_account_list or not master_account_list:
+        result.status = "skipped"
+        result.error = "服务器（或筛选后的服务器）、从账号或主账号为空"
+        return result
+
+    try:
+        plan = _worker_table.plan_export(
+            job.start_date,
+            job.end_date,
+            server_count,
+            len(from_account_list),
+            len(master_account_list),
+            engine=ExportEngine(job.engine) if job.engine else None
+        )
+        result.engine = plan.engine.value
+
+        stage_start = time.perf_counter()
+        _worker_table.generate_timesheet_data(
+            job.start_date,
+            job.end_date,
+            resource_ip_list,
+            from_account_list,
+            master_account_list,
+            include_sheetname_prefix=job.include_sheetname_prefix,
+            native_datetime=job.native_datetime,
+            server_filter=server_filter
+        )
+        result.timings['generate'] = round(time.perf_counter() - stage_start, 3)
+        result.sheet_count = len(_worker_table.data_dict)
+        result.row_count = sum(len(df) for df in _worker_table.data_dict.values())
+
+        stage_start = time.perf_counter()
+        result.files = _worker_table.export(job.output, progress_callback=_quiet_callback, plan=plan,
+                                            compression_level=job.compression_level) or []
+        result.timings['export'] = round(time.perf_counter() - stage_start, 3)
+
+        if not result.files or not all(os.path.exists(path) for path in result.files):
+            result.status = "failed"
+            result.error = "输出文件未生成"
+    except Exception as e:
+        result.status = "failed"
+        result.error = str(e)
+    finally:
+        # 释放本任务的数据，避免工作进程内存累积
+        _worker_table.data_dict = None
+        _worker_table.excel_table = None
+
+    result.timings['total'] = round(time.perf_counter() - job_start, 3)
+    return result
+
+
+def run_batch(spec: BatchSpec) -> List[JobResult]:
+    """执行全部任务，返回按任务顺序排列的结果"""
+    print(f"[INFO] 批量任务数: {len(spec.jobs)}，工作进程数: {spec.workers}")
+
+    if spec.workers <= 1:
+        _init_worker(spec.config_dir, spec.scratch_dir, spec.cache_dir, spec.memo_max_bytes)
+        results = []
+        for index, job in enumerate(spec.jobs, 1):
+            print(f"[INFO] ({index}/{len(spec.jobs)}) 执行任务: {job.name}")
+            results.append(_run_job(job))
+        return results
+
+    with ProcessPoolExecutor(max_workers=spec.workers,
+                             initializer=_init_worker,
+                             initargs=(spec.config_dir, spec.scratch_dir, spec.cache_dir,
+                                       spec.memo_max_bytes)) as pool:
+        return list(pool.map(_run_job, spec.jobs))
+
+
+def write_summary(summary_path: str, spec: BatchSpec, results: List[JobResult], elapsed: float):
+    """写入汇总文件"""
+    summary_dir = os.path.dirname(summary_path)
+    if summary_dir and not os.path.exists(summary_dir):
+        os.makedirs(summary_dir, exist_ok=True)
+
+    summary = {
+        "finished_at": time.strftime('%Y-%m-%d %H:%M:%S'),
+        "workers": spec.workers,
+        "job_count": len(results),
+        "failed_count": sum(1 for r in results if r.status == "failed"),
+        "elapsed": round(elapsed, 3),
+        "jobs": [asdict(r) for r in results]
+    }
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="批量生成工作表")
+    parser.add_argument('spec', help="任务文件路径（JSON）")
+    parser.add_argument('--summary', help="汇总文件路径，默认取任务文件中的 summary")
+    parser.add_argument('--workers', type=int, help="工作进程数，默认取任务文件中的 workers")
+    args = parser.parse_args(argv)
+
+    spec = load_batch_spec(args.spec)
+    if args.workers:
+        spec.workers = max(args.workers, 1)
+    summary_path = args.summary or spec.summary or os.path.splitext(args.spec)[0] + '_summary.json'
+
+    start = time.perf_counter()
+    results = run_batch(spec)
+    elapsed = time.perf_counter() - start
+
+    write_summary(summary_path, spec, results, elapsed)
+
+    for r in results:
+        mark = "✅" if r.status == "ok" else "❌"
+        print(f"{mark} {r.name}: {r.status} {r.timings.get('total', 0):.2f}s {r.error or ''}")
+    print(f"[INFO] 汇总已写入: {summary_path}，总耗时 {elapsed:.2f} 秒")
+
+    return 0 if all(r.status != "failed" for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,514 @@
+"""
+性能基准：用 work_table 模板生成并导出一份样例数据，比较不同写入方式的耗时
+
+用法::
+
+    python -m logic.benchmark                     # 列出可用的基准
+    python -m logic.benchmark typed_write [--servers 200] [--days 7] [--repeat 3]
+    python -m logic.benchmark shared_strings [--servers 50] [--days 90]
+    python -m logic.benchmark calibration [--servers 200] [--days 7]
+    python -m logic.benchmark pipeline [--servers 50] [--days 90]
+    python -m logic.benchmark compression [--servers 200] [--days 7]
+    python -m logic.benchmark incremental [--servers 50] [--days 90]
+    python -m logic.benchmark memo [--servers 200] [--days 90]
+    python -m logic.benchmark encoding [--servers 1000000]
+    python -m logic.benchmark inventory [--servers 1000000] [--verify]
+    python -m logic.benchmark styles [--servers 20] [--days 3]
+"""
+import argparse
+import contextlib
+import ipaddress
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import openpyxl
+import pandas as pd
+
+from . import config_files
+from .table import (CellStyle, FillConfig, FontConfig, FontStyle, MultiSheetExcelTable, TableConfig,
+                    ValueType)
+from .work_table import WorkTable, split_resource_ip
+from .generation_memo import GenerationMemo
+from .inventory import Inventory, load_inventory, parse_inventory
+from .xlsx_package import SheetPartCache
+
+
+def _quiet_callback(progress: int, status: str):
+    """基准测试时不输出逐sheet进度"""
+    return True
+
+
+def sample_work_table(servers: int, days: int, accounts: int = 5, masters: int = 3,
+                      native_datetime: bool = False) -> WorkTable:
+    """生成样例数据（资源池、IP、账号均为虚构）"""
+    resource_ip_list = [f"pool{i % 4} 10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}" for i in range(servers)]
+    from_account_list = [f"app_user{i}" for i in range(accounts)]
+    master_account_list = [f"master{i}@example.com" for i in range(masters)]
+
+    start_date = datetime(2026, 2, 1)
+    table = WorkTable()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        table.generate_timesheet_data(
+            start_date.strftime('%Y-%m-%d'),
+            (start_date + timedelta(days=max(days, 1) - 1)).strftime('%Y-%m-%d'),
+            resource_ip_list,
+            from_account_list,
+            master_account_list,
+            native_datetime=native_datetime
+        )
+    return table
+
+
+def _export_once(table: WorkTable, config: TableConfig, output_path: str, **table_options) -> float:
+    """导出一次，返回耗时（秒）"""
+    excel_table = MultiSheetExcelTable.create_with_shared_config(
+        title="",
+        sheet_names=list(table.data_dict.keys()),
+        shared_config=config,
+        data_dict=table.data_dict
+    )
+    for name, value in table_options.items():
+        setattr(excel_table, name, value)
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        excel_table.to_excel(output_path, False, _quiet_callback)
+    return time.perf_counter() - start
+
+
+def _time_export(table: WorkTable, config: TableConfig, repeat: int, **table_options) -> float:
+    """导出 repeat 次，返回最短耗时（秒）"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = os.path.join(tmp_dir, "benchmark.xlsx")
+        return min(_export_once(table, config, output_path, **table_options) for _ in range(repeat))
+
+
+def _print_results(results: Dict[str, float], cells: int):
+    """输出各方式的耗时及相对第一种方式的加速比"""
+    baseline = next(iter(results.values()))
+    for name, seconds in results.items():
+        print(f"  {name:<8} {seconds:8.3f} 秒  {cells / seconds:12,.0f} 单元格/秒  {baseline / seconds:5.2f}x")
+
+
+def _sample_size(table: WorkTable) -> int:
+    """样例数据的单元格数"""
+    rows = sum(len(df) for df in table.data_dict.values())
+    cells = rows * len(table.template_config.data_columns)
+    print(f"[INFO] sheet数: {len(table.data_dict)}，数据行数: {rows}，单元格数: {cells}")
+    return cells
+
+
+def bench_typed_write(args) -> Dict[str, float]:
+    """声明列类型（直接调用 write_string/write_number）与 strings_to_numbers 逐单元格探测的对比"""
+    table = sample_work_table(args.servers or 200, args.days or 7)
+    typed_config = table.template_config
+
+    # 去掉模板中的列类型声明，退回到 worksheet.write + strings_to_numbers 探测
+    auto_config = typed_config.copy(typed_config.name)
+    auto_config.column_styles = {name: replace(style, value_type=ValueType.AUTO)
+                                 for name, style in auto_config.column_styles.items()}
+
+    cells = _sample_size(table)
+    results = {
+        "auto": _time_export(table, auto_config, args.repeat, seed_shared_strings=False),
+        "typed": _time_export(table, typed_config, args.repeat, seed_shared_strings=False),
+    }
+    _print_results(results, cells)
+    return results
+
+
+def bench_shared_strings(args) -> Dict[str, float]:
+    """按季度导出（默认90天、270个sheet）：逐单元格 write_string 与预置共享字符串表整列写入的对比"""
+    table = sample_work_table(args.servers or 50, args.days or 90)
+    config = table.template_config
+
+    cells = _sample_size(table)
+    results = {
+        "per_cell": _time_export(table, config, args.repeat, seed_shared_strings=False),
+        "seeded": _time_export(table, config, args.repeat, seed_shared_strings=True),
+    }
+    _print_results(results, cells)
+    return results
+
+
+def bench_calibration(args) -> Dict[str, float]:
+    """测量内存导出与流式导出的单元格耗时，用于调整 planner.Calibration"""
+    table = sample_work_table(args.servers or 200, args.days or 7)
+    config = table.template_config
+
+    cells = _sample_size(table)
+    results = {
+        "in_memory": _time_export(table, config, args.repeat),
+        "streaming": _time_export(table, config, args.repeat, constant_memory=True),
+    }
+    _print_results(results, cells)
+    print("  export_seconds_per_cell = {" + ", ".join(
+        f'"{name}": {seconds / cells:.2e}' for name, seconds in results.items()) + "}")
+    return results
+
+
+def bench_pipeline(args) -> Dict[str, float]:
+    """close() 时统一渲染并压缩与逐sheet渲染、后台线程压缩（流水线）的对比"""
+    table = sample_work_table(args.servers or 50, args.days or 90)
+    config = table.template_config
+
+    cells = _sample_size(table)
+    results = {
+        "serial": _time_export(table, config, args.repeat, pipelined=False),
+        "pipeline": _time_export(table, config, args.repeat, pipelined=True),
+    }
+    _print_results(results, cells)
+    return results
+
+
+def bench_compression(args) -> Dict[str, float]:
+    """各zip压缩级别（0 为只存储）的导出耗时与文件大小，以及多线程压缩的效果"""
+    table = sample_work_table(args.servers or 200, args.days or 7)
+    config = table.template_config
+
+    cells = _sample_size(table)
+    cases = [("default", {})]
+    cases += [(f"level{level}", {"compression_level": level}) for level in (0, 1, 3, 6, 9)]
+    cases += [(f"threads{workers}", {"compress_workers": workers}) for workers in (2, 4)]
+
+    results, sizes = {}, {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, options in cases:
+            output_path = os.path.join(tmp_dir, f"{name}.xlsx")
+            results[name] = min(_export_once(table, config, output_path, **options) for _ in range(args.repeat))
+            sizes[name] = os.path.getsize(output_path)
+
+    _print_results(results, cells)
+    baseline = sizes["default"]
+    for name, size in sizes.items():
+        print(f"  {name:<8} {size / 1024 / 1024:8.2f} MB  {size / baseline:6.2f}x")
+    return results
+
+
+def _edit_one_day(table: WorkTable, day: int):
+    """修改某一天（3个sheet）的从账号，模拟操作员改动一天的数据"""
+    for sheet_name in list(table.data_dict)[day * 3:day * 3 + 3]:
+        df = table.data_dict[sheet_name].copy()
+        values = df['from_account'].array
+        df['from_account'] = pd.Categorical.from_codes((values.codes + 1) % len(values.categories),
+                                                       dtype=values.dtype)
+        table.data_dict[sheet_name] = df
+
+
+def bench_incremental(args) -> Dict[str, float]:
+    """按季度导出后修改一天的数据再次导出：全量重新渲染与复用已渲染sheet缓存的对比"""
+    table = sample_work_table(args.servers or 50, args.days or 90)
+    config = table.template_config
+
+    cells = _sample_size(table)
+    results = {"full": _time_export(table, config, args.repeat)}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = os.path.join(tmp_dir, "benchmark.xlsx")
+        cache = SheetPartCache()
+        # 首次导出时缓存全部sheet（含记录引用的开销）
+        results["cold"] = _export_once(table, config, output_path, part_cache=cache)
+        edited = []
+        for day in range(args.repeat):
+            _edit_one_day(table, day)
+            edited.append(_export_once(table, config, output_path, part_cache=cache))
+        results["edited"] = min(edited)
+    _print_results(results, cells)
+    print(f"  缓存占用 {cache.size() / 1024 / 1024:.1f} MB（{len(cache)} 个sheet）")
+    return results
+
+
+def bench_memo(args) -> Dict[str, float]:
+    """重复生成相同参数的数据：重新生成、内存中的生成结果缓存命中、从落盘的npz读回的对比"""
+    table = sample_work_table(args.servers or 200, args.days or 90)
+    cells = _sample_size(table)
+    servers = args.servers or 200
+    resource_ip_list = [f"pool{i % 4} 10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}" for i in range(servers)]
+    start_date = datetime(2026, 2, 1)
+    dates = (start_date.strftime('%Y-%m-%d'),
+             (start_date + timedelta(days=max(args.days or 90, 1) - 1)).strftime('%Y-%m-%d'))
+
+    def generate(memo: Optional[GenerationMemo]) -> float:
+        # 每次用新的 WorkTable，避免增量生成直接沿用上一次的数据
+        work_table = WorkTable()
+        work_table.generation_memo = memo
+        start = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            work_table.generate_timesheet_data(*dates, resource_ip_list,
+                                               [f"app_user{i}" for i in range(5)],
+                                               [f"master{i}@example.com" for i in range(3)])
+        return time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        memo = GenerationMemo(spill_dir=tmp_dir)
+        results = {"generate": min(generate(None) for _ in range(args.repeat))}
+        generate(memo)
+        results["memory"] = min(generate(memo) for _ in range(args.repeat))
+
+        def spilled() -> float:
+            # 内存上限为0：结果只在磁盘上
+            return generate(GenerationMemo(max_bytes=0, spill_dir=tmp_dir))
+        spilled()
+        results["spill"] = min(spilled() for _ in range(args.repeat))
+        print(f"  内存占用 {memo.size() / 1024 / 1024:.1f} MB")
+    _print_results(results, cells)
+    return results
+
+
+def _read_trial_decode(file_path: str) -> str:
+    """原来的读取方式：按候选编码逐个以文本模式读取整个文件，直到解码成功"""
+    for enc in config_files.CANDIDATE_ENCODINGS:
+        try:
+            with open(file_path, 'r', encoding=enc) as f:
+                return f.read()
+        except UnicodeDecodeError:
+            continue
+
+
+def bench_encoding(args) -> Dict[str, float]:
+    """读取多MB的GBK账号文件：逐个编码试读整个文件与BOM/样本检测后只解码一次的对比（--servers 为行数）"""
+    lines = args.servers or 1000000
+    content = "\n".join(f"user{i:07d} 测试部门{i % 97} 张{i % 13}" for i in range(lines)) + "\n"
+    # 开头全是ASCII、中文只出现在末尾：样本无法判断编码，utf-8 失败后先试该文件（未变化时）记住的编码
+    late = "\n".join(f"user{i:07d} ops{i % 97}" for i in range(lines)) + "\n测试部门 张三\n"
+
+    def timed(func, path: str) -> float:
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            func(path)
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    def detect_cold(path: str):
+        config_files._detected_encodings.clear()
+        return config_files.read_file_with_encoding(path)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for label, text in (("gbk", content), ("late", late)):
+            path = os.path.join(tmp_dir, label)
+            with open(path, 'w', encoding='gbk') as f:
+                f.write(text)
+            assert _read_trial_decode(path) == config_files.read_file_with_encoding(path)
+            print(f"[INFO] {label}: {os.path.getsize(path) / 1024 / 1024:.1f} MB，"
+                  f"检测编码: {config_files._detected_encodings[os.path.abspath(path)]}")
+            results[f"{label}_trial"] = timed(_read_trial_decode, path)
+            results[f"{label}_detect"] = timed(detect_cold, path)
+            results[f"{label}_remembered"] = timed(config_files.read_file_with_encoding, path)
+
+    baseline = {}
+    for name, seconds in results.items():
+        label = name.split('_')[0]
+        baseline.setdefault(label, seconds)
+        print(f"  {name:<16} {seconds:8.3f} 秒  {baseline[label] / seconds:5.2f}x")
+    return results
+
+
+def _legacy_inventory(content: str) -> tuple:
+    """逐行解析（parse_service_lines + split_resource_ip）得到的 (资源池, IP, 名称, 资源池 IP, 行号) 列表与无效IP"""
+    rows = []
+    for number, line in enumerate(content.splitlines(), 1):
+        parts = config_files.split_service_line(line)
+        if parts is None:
+            continue
+        resource_ip = config_files.parse_service_line(line)
+        pool, ip = split_resource_ip(resource_ip)
+        rows.append((pool, ip, parts[2] if len(parts) >= 3 else "", resource_ip, number))
+    invalid = set()
+    for ip in {row[1] for row in rows if row[1]}:
+        try:
+            ipaddress.ip_address(ip)
+        except ValueError:
+            invalid.add(ip)
+    return rows, invalid
+
+
+def _inventory_rows(inventory: Inventory) -> tuple:
+    return (list(zip(inventory.pools, inventory.ips, inventory.names, inventory.resource_ips, inventory.lines)),
+            set(inventory.invalid_ips))
+
+
+def _random_service_content(rng: random.Random) -> str:
+    """随机的服务器配置：一半为各行格式一致的块（个别行被打乱），一半为任意拼接的片段"""
+    separators = ['\t', ' ', ',', ':', '|', ';']
+    breaks = ['\n', '\r\n', '\r', '\v', '\x85', '\u2028']
+    fields = ['pool1', '资源池', '10.0.0.1', '192.168.1.255', '256.1.1.1', '010.0.0.1', 'fe80::1', 'web01', '']
+    if rng.random() < 0.5:
+        sep, width = rng.choice(separators), rng.randint(1, 4)
+        lines = [sep.join(rng.choice(fields) for _ in range(width)) for _ in range(rng.randint(1, 30))]
+        for _ in range(rng.randint(0, 2)):
+            lines[rng.randrange(len(lines))] = rng.choice(['', '# 注释', ' pool2 10.0.0.2 ', 'a\tb c'])
+        return '\n'.join(lines) + rng.choice(['', '\n'])
+    pieces = fields + separators + breaks + ['#', '  ', '\u3000']
+    return ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 40)))
+
+
+def verify_inventory(samples: int = 3000, seed: int = 0) -> int:
+    """
+    随机生成服务器配置，整块解析（parse_inventory）与分块流式读取（load_inventory，块很小以覆盖跨块的行）
+    都要与逐行解析的结果逐项一致，返回不一致的样本数
+    """
+    rng = random.Random(seed)
+    mismatches = 0
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "service")
+        for _ in range(samples):
+            content = _random_service_content(rng)
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                f.write(content)
+            expected = _legacy_inventory(content)
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                results = (parse_inventory(content), load_inventory(path, chunk_chars=7))
+            if any(_inventory_rows(inventory) != expected for inventory in results):
+                mismatches += 1
+                if mismatches <= 3:
+                    print(f"[ERROR] 解析结果不一致: {content!r}")
+    return mismatches
+
+
+def bench_inventory(args) -> Optional[Dict[str, float]]:
+    """解析百万行服务器配置：逐行逐分隔符拆分再拆"资源池 IP"与服务器清单整块解析（含IP校验）的对比（--servers 为行数）"""
+    lines = [f"资源池{i % 50}\t10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}\tweb{i:07d}"
+             for i in range(args.servers or 1000000)]
+    mixed = list(lines)
+    # 夹杂注释、混用分隔符的行，这些块逐行处理
+    for i in range(0, len(mixed), 1000):
+        mixed[i] = f"# 第{i}行" if i % 2000 == 0 else mixed[i].replace('\t', ' ', 1)
+
+    def legacy(path: str):
+        resource_ip_list = config_files.parse_service_lines(config_files.read_file_with_encoding(path))
+        return [split_resource_ip(resource_ip) for resource_ip in resource_ip_list]
+
+    if args.verify:
+        mismatches = verify_inventory()
+        if mismatches:
+            print(f"[ERROR] 与逐行解析不一致的样本: {mismatches} 个")
+            return None
+        print("[INFO] 随机样本的解析结果与逐行解析一致")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for label, content in (("uniform", lines), ("mixed", mixed)):
+            path = os.path.join(tmp_dir, label)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("\n".join(content) + "\n")
+            inventory = load_inventory(path)
+            assert inventory.servers() == legacy(path)
+            for name, func in (("legacy", legacy), ("inventory", load_inventory)):
+                best = float('inf')
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    func(path)
+                    best = min(best, time.perf_counter() - start)
+                results[f"{label}_{name}"] = best
+            print(f"  {label:<8} {len(inventory):,} 台服务器  逐行 {results[label + '_legacy']:.3f} 秒  "
+                  f"整块 {results[label + '_inventory']:.3f} 秒  "
+                  f"{results[label + '_legacy'] / results[label + '_inventory']:.2f}x")
+    return results
+
+
+def _sheet_snapshot(path: str) -> Dict[str, list]:
+    """用openpyxl读取导出文件：各sheet每个单元格的值、数字格式、加粗、填充色"""
+    workbook = openpyxl.load_workbook(path)
+    try:
+        return {ws.title: [(cell.coordinate, cell.value, cell.number_format, cell.font.b, cell.fill.fgColor.rgb)
+                           for row in ws.iter_rows() for cell in row]
+                for ws in workbook.worksheets}
+    finally:
+        workbook.close()
+
+
+def bench_styles(args) -> Optional[Dict[str, float]]:
+    """同一个表格对象带列、行、单元格样式连续导出两次，用openpyxl读回并比较两次结果（样式序号跨导出错乱的回归检查）"""
+    table = sample_work_table(args.servers or 20, args.days or 3, native_datetime=True)
+    cells = _sample_size(table)
+    excel_table = MultiSheetExcelTable.create_with_shared_config(
+        title="",
+        sheet_names=list(table.data_dict.keys()),
+        shared_config=table.template_config,
+        data_dict=table.data_dict
+    )
+    columns = table.template_config.data_columns
+    excel_table.set_column_style_for_all_sheets(columns[0], CellStyle(fill=FillConfig(color="#E3F2FD")))
+    for sheet_name in table.data_dict:
+        # 行样式、单元格样式（含日期时间列上的单元格样式）
+        excel_table.set_sheet_row_style(sheet_name, 0, CellStyle(font=FontConfig(style=FontStyle.BOLD)))
+        excel_table.set_sheet_cell_style(sheet_name, 1, 0, CellStyle(fill=FillConfig(color="#FFF59D")))
+        excel_table.set_sheet_cell_style(sheet_name, 2, len(columns) - 1, CellStyle(fill=FillConfig(color="#FFCCBC")))
+
+    results, snapshots = {}, []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in ("first", "second"):
+            output_path = os.path.join(tmp_dir, f"{name}.xlsx")
+            start = time.perf_counter()
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                saved = excel_table.to_excel(output_path, False, _quiet_callback)
+            results[name] = time.perf_counter() - start
+            if saved is None:
+                print(f"[ERROR] 第{len(snapshots) + 1}次导出失败")
+                return None
+            try:
+                snapshots.append(_sheet_snapshot(output_path))
+            except Exception as e:
+                # 样式序号超出样式表时 openpyxl 读取报 IndexError
+                print(f"[ERROR] 读取第{len(snapshots) + 1}次导出的文件失败: {type(e).__name__}: {e}")
+                return None
+    _print_results(results, cells)
+
+    first, second = snapshots
+    if first != second:
+        for sheet_name in first:
+            diff = [(a, b) for a, b in zip(first[sheet_name], second.get(sheet_name, [])) if a != b]
+            if diff or len(first[sheet_name]) != len(second.get(sheet_name, [])):
+                print(f"[ERROR] 两次导出不一致: sheet '{sheet_name}' {diff[:3]}")
+                return None
+        print("[ERROR] 两次导出的sheet不一致")
+        return None
+    print(f"[INFO] 两次导出一致（{len(first)} 个sheet）")
+    return results
+
+
+# 基准名称 -> 执行函数（函数文档即说明）
+BENCHMARKS: Dict[str, Callable] = {
+    "typed_write": bench_typed_write,
+    "shared_strings": bench_shared_strings,
+    "calibration": bench_calibration,
+    "pipeline": bench_pipeline,
+    "compression": bench_compression,
+    "incremental": bench_incremental,
+    "memo": bench_memo,
+    "encoding": bench_encoding,
+    "inventory": bench_inventory,
+    "styles": bench_styles,
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="表格生成性能基准")
+    parser.add_argument('name', nargs='?', help="基准名称，省略时列出全部")
+    parser.add_argument('--servers', type=int, help="服务器数量（默认取各基准的设置）")
+    parser.add_argument('--days', type=int, help="天数，每天3个sheet（默认取各基准的设置）")
+    parser.add_argument('--repeat', type=int, default=3, help="重复次数，取最短耗时")
+    parser.add_argument('--verify', action='store_true', help="计时前先检查结果与原实现一致（inventory）")
+    args = parser.parse_args(argv)
+
+    if not args.name:
+        for name, func in BENCHMARKS.items():
+            print(f"{name:<16} {func.__doc__}")
+        return 0
+
+    if args.name not in BENCHMARKS:
+        print(f"[ERROR] 未知的基准: {args.name}")
+        return 1
+
+    # 带检查的基准在结果不符时返回None
+    return 0 if BENCHMARKS[args.name](args) is not None else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+import codecs
+import os
+from typing import Dict, List, Optional, Tuple
+
+
+# ==================== 配置文件读取 ====================
+
+# 按优先级尝试的编码
+CANDIDATE_ENCODINGS = ['utf-8', 'gbk', 'gb2312', 'gb18030', 'big5', 'latin-1']
+
+# 字节序标记 -> 编码（utf-8-sig 解码时去掉BOM）
+BOM_ENCODINGS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# 检测编码时只试解码文件开头的这些字节
+SAMPLE_BYTES = 64 * 1024
+
+# 文件路径 -> 上次成功解码使用的编码（只作为 utf-8 之后的首选，文件内容变化后仍可沿用）；文件被写入后作废
+_detected_encodings: Dict[str, str] = {}
+
+
+def detect_encoding(data: bytes) -> Optional[str]:
+    """
+    根据BOM或开头一段样本判断编码（样本末尾被截断的多字节字符不算错误）
+
+    样本全为ASCII时无法判断，返回None
+    """
+    for bom, encoding in BOM_ENCODINGS:
+        if data.startswith(bom):
+            return encoding
+
+    sample = data[:SAMPLE_BYTES]
+    if sample.isascii():
+        return None
+    for enc in CANDIDATE_ENCODINGS:
+        try:
+            codecs.getincrementaldecoder(enc)().decode(sample, final=len(data) <= SAMPLE_BYTES)
+            return enc
+        except UnicodeDecodeError:
+            continue
+    return 'latin-1'
+
+
+def decode_bytes(data: bytes, preferred: Optional[str] = None) -> Tuple[str, str]:
+    """
+    解码文件内容，返回 (文本, 编码)
+
+    按检测结果整体解码一次；样本之后才出现的非法字节导致失败时，按候选顺序继续尝试后面的编码。
+    样本全为ASCII时先按严格的 utf-8 解码，失败后再试 preferred（该文件上次使用的编码），
+    避免UTF-8内容被其他编码"成功"解码成乱码。
+    """
+    detected = detect_encoding(data)
+    if detected is None:
+        encodings = list(CANDIDATE_ENCODINGS)
+        if preferred in encodings and preferred not in ('utf-8', 'latin-1'):
+            encodings.remove(preferred)
+            encodings.insert(1, preferred)
+    elif detected in CANDIDATE_ENCODINGS:
+        encodings = CANDIDATE_ENCODINGS[CANDIDATE_ENCODINGS.index(detected):]
+    else:
+        encodings = [detected]
+
+    for enc in encodings:
+        try:
+            text = data.decode(enc)
+        except UnicodeDecodeError:
+            continue
+        # 与文本模式读取一致：统一换行符
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text, enc
+
+    # 如果都失败，忽略错误
+    return data.decode('utf-8', errors='ignore'), 'utf-8'
+
+
+def read_file_with_encoding(file_path: str) -> str:
+    """智能读取文件，自动检测编码（只读取一次，记住该文件的编码）"""
+    if not os.path.exists(file_path):
+        return ""
+
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    key = os.path.abspath(file_path)
+    text, encoding = decode_bytes(data, _detected_encodings.get(key))
+    _detected_encodings[key] = encoding
+    return text
+
+
+def write_file_with_encoding(file_path: str, content: str):
+    """写入文件，统一使用UTF-8（并作废记住的编码）"""
+    _detected_encodings.pop(os.path.abspath(file_path), None)
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def read_lines(file_path: str) -> List[str]:
+    """读取文件中的非空行（已去除首尾空白）"""
+    content = read_file_with_encoding(file_path)
+    return [line.strip() for line in content.splitlines() if line.strip()]
+
+
+# 服务器配置的分隔符（按优先级）
+SERVICE_SEPARATORS = ('\t', ' ', ',', ':', '|', ';')
+
+
+def split_service_line(line: str) -> Optional[List[str]]:
+    """
+    拆分一行服务器配置；空行和注释行返回None，没有可用分隔符时整行作为一段
+
+    按 Tab、空格、逗号、冒号、竖线、分号的顺序取第一个能分出两段的分隔符
+    """
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+
+    for sep in SERVICE_SEPARATORS:
+        if sep in line:
+            parts = line.split(sep)
+            parts = [p.strip() for p in parts if p.strip()]
+            if len(parts) >= 2:
+                return parts
+    # 没有找到分隔符，整行作为单个项处理（IP或服务器名）
+    return [line]
+
+
+def parse_service_line(line: str) -> Optional[str]:
+    """解析一行服务器配置，返回"资源池 IP"格式的字符串；空行和注释行返回None"""
+    parts = split_service_line(line)
+    if parts is None:
+        return None
+    return f"{parts[0]} {parts[1]}" if len(parts) >= 2 else parts[0]
+
+
+def parse_service_lines(content: str) -> List[str]:
+    """
+    解析服务器配置内容，返回"资源池 IP"格式的列表
+
+    支持多种分隔符：空格、Tab、逗号、冒号、竖线、分号；以#开头的行视为注释
+    """
+    resource_ip_list = []
+    for line in content.splitlines():
+        resource_ip = parse_service_line(line)
+        if resource_ip is not None:
+            resource_ip_list.append(resource_ip)
+    return resource_ip_list
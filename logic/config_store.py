@@ -0,0 +1,139 @@
+"""
+配置存储：统一读取并缓存 config 目录下的 service / from_account / master_account
+
+每个文件只在内容变化时（按 修改时间、大小、inode 判断）重新检测编码并解析，
+解析结果为不可变的元组，可直接交给界面和生成逻辑共用。
+"""
+import os
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from .config_files import read_file_with_encoding, write_file_with_encoding
+from .inventory import Inventory, parse_inventory
+
+SERVICE = 'service'
+FROM_ACCOUNT = 'from_account'
+MASTER_ACCOUNT = 'master_account'
+CONFIG_NAMES = (SERVICE, FROM_ACCOUNT, MASTER_ACCOUNT)
+
+# 文件状态标识：(修改时间ns, 大小, inode)，文件不存在时为 None
+FileStamp = Optional[Tuple[int, int, int]]
+
+
+def _parse_lines(content: str) -> Tuple[Tuple[str, ...], Optional[Inventory]]:
+    """非空行（已去除首尾空白）"""
+    return tuple(line.strip() for line in content.splitlines() if line.strip()), None
+
+
+def _parse_services(content: str) -> Tuple[Tuple[str, ...], Optional[Inventory]]:
+    """
+    服务器清单：配置编辑框要显示原文，整个文件本来就要读入，因此直接解析原文，
+    不使用 load_inventory 的流式读取（两者分行和解析结果相同）
+    """
+    inventory = parse_inventory(content)
+    return inventory.resource_ips, inventory
+
+
+# 各配置文件的解析函数，返回 (解析结果, 服务器清单)
+_PARSERS: Dict[str, Callable[[str], Tuple[Tuple[str, ...], Optional[Inventory]]]] = {
+    SERVICE: _parse_services,
+    FROM_ACCOUNT: _parse_lines,
+    MASTER_ACCOUNT: _parse_lines,
+}
+
+
+@dataclass(frozen=True)
+class ConfigEntry:
+    """一个配置文件的缓存内容"""
+    stamp: FileStamp
+    text: str
+    items: Tuple[str, ...]
+    inventory: Optional[Inventory] = None  # 仅 service 文件
+
+
+def file_stamp(path: str) -> FileStamp:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class ConfigStore:
+    """config 目录下配置文件的缓存，文件变化后下次访问时重新加载"""
+
+    def __init__(self, config_dir: str):
+        self.config_dir = config_dir
+        self._entries: Dict[str, ConfigEntry] = {}
+        self._lock = threading.Lock()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.config_dir, name)
+
+    def paths(self) -> Tuple[str, ...]:
+        """全部配置文件路径（供文件监视器使用）"""
+        return tuple(self.path(name) for name in CONFIG_NAMES)
+
+    def ensure_files(self):
+        """确保配置目录和各配置文件存在（不存在时创建空文件）"""
+        os.makedirs(self.config_dir, exist_ok=True)
+        for name in CONFIG_NAMES:
+            if not os.path.exists(self.path(name)):
+                self.write(name, '')
+
+    def _entry(self, name: str) -> ConfigEntry:
+        if name not in _PARSERS:
+            raise KeyError(f"未知的配置文件: {name}")
+        path = self.path(name)
+        stamp = file_stamp(path)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry.stamp == stamp:
+                return entry
+            text = read_file_with_encoding(path) if stamp is not None else ""
+            items, inventory = _PARSERS[name](text)
+            entry = ConfigEntry(stamp=stamp, text=text, items=items, inventory=inventory)
+            self._entries[name] = entry
+            return entry
+
+    def text(self, name: str) -> str:
+        """配置文件原文"""
+        return self._entry(name).text
+
+    def items(self, name: str) -> Tuple[str, ...]:
+        """配置文件解析结果"""
+        return self._entry(name).items
+
+    def services(self) -> Tuple[str, ...]:
+        """"资源池 IP"格式的服务器列表"""
+        return self.items(SERVICE)
+
+    def inventory(self) -> Inventory:
+        """服务器清单（资源池、IP、名称的列式记录）"""
+        return self._entry(SERVICE).inventory
+
+    def from_accounts(self) -> Tuple[str, ...]:
+        return self.items(FROM_ACCOUNT)
+
+    def master_accounts(self) -> Tuple[str, ...]:
+        return self.items(MASTER_ACCOUNT)
+
+    def write(self, name: str, content: str):
+        """写入配置文件（UTF-8）并使其缓存失效"""
+        write_file_with_encoding(self.path(name), content)
+        self.invalidate(name)
+
+    def invalidate(self, name: Optional[str] = None):
+        """丢弃缓存，name 为 None 时丢弃全部"""
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+
+    def changed(self) -> Set[str]:
+        """与缓存内容相比已变化的配置文件（从未读取过的不算）"""
+        with self._lock:
+            entries = dict(self._entries)
+        return {name for name, entry in entries.items() if entry.stamp != file_stamp(self.path(name))}
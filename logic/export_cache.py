@@ -0,0 +1,157 @@
+"""
+导出缓存：按 (模板版本, sheet数据, 导出选项) 的内容指纹缓存导出的xlsx文件
+
+同一份数据再次导出（例如导出到另一个位置）时直接复制缓存文件，不再重新生成工作簿；
+只有数据或选项变化时才重新导出。缓存目录按总大小淘汰最久未使用的文件。
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from typing import Any, Dict, Optional
+
+import pandas as pd
+import xlsxwriter
+
+from .xlsx_package import AtomicOutputFile, COPY_BUFFER_SIZE
+
+CACHE_FORMAT = 2  # 指纹格式版本，指纹算法或输出格式变化时递增
+DEFAULT_MAX_BYTES = 1024 ** 3  # 缓存目录默认上限 1GB
+CACHE_SUFFIX = ".xlsx"
+
+
+def fingerprint(template_key: str, data_dict: Dict[str, pd.DataFrame], options: Dict[str, Any]) -> str:
+    """
+    计算导出内容指纹
+
+    Args:
+        template_key: 模板名称与版本，如 "work_table:3"
+        data_dict: sheet名称 -> 数据（按sheet顺序）
+        options: 影响输出内容的导出选项（需可JSON序列化）
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps({
+        "format": CACHE_FORMAT,
+        "template": template_key,
+        "xlsxwriter": xlsxwriter.__version__,
+        "options": options,
+    }, sort_keys=True, default=str).encode('utf-8'))
+
+    category_hashes: Dict[int, Any] = {}
+    for sheet_name, df in data_dict.items():
+        digest.update(json.dumps(sheet_name, ensure_ascii=False).encode('utf-8'))
+        update_frame_digest(digest, df, category_hashes)
+    return digest.hexdigest()
+
+
+def update_frame_digest(digest, df: pd.DataFrame, category_hashes: Dict[int, Any]):
+    """
+    把一个DataFrame的内容加入摘要（列名、形状、各列数据）
+
+    分类列按 编码 + 实际用到的类别前缀 计算：共享的类别表只逐项哈希一次（缓存在 category_hashes 中），
+    类别表只在末尾追加新类别时，未用到新类别的数据摘要不变。
+    """
+    digest.update(json.dumps([
+        [str(column) for column in df.columns],
+        list(df.shape),
+    ], ensure_ascii=False).encode('utf-8'))
+    for _, series in df.items():
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            values = series.array  # 直接取Categorical的编码与类别表，避免创建中间Series
+            categories = values.categories
+            hashes = category_hashes.get(id(categories))
+            if hashes is None:
+                hashes = pd.util.hash_pandas_object(categories.to_series(), index=False).values
+                category_hashes[id(categories)] = hashes
+            codes = values.codes
+            used = int(codes.max()) + 1 if len(codes) else 0
+            digest.update(b"category" + hashlib.sha256(hashes[:used].tobytes()).digest())
+            digest.update(codes.tobytes())
+        else:
+            digest.update(str(series.dtype).encode('utf-8'))
+            digest.update(pd.util.hash_pandas_object(series, index=False).values.tobytes())
+
+
+def evict_lru(directory: str, suffix: str, max_bytes: int):
+    """目录中以 suffix 结尾的文件总大小超过上限时，按修改时间删除最久未使用的文件"""
+    entries = []
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name.endswith(suffix) and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+class ExportCache:
+    """按内容指纹缓存导出文件的目录"""
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + CACHE_SUFFIX)
+
+    def contains(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def fetch(self, key: str, output_path: str, scratch_dir: Optional[str] = None) -> bool:
+        """缓存命中时复制到 output_path（原子替换）并返回True"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as src, AtomicOutputFile(output_path, scratch_dir) as output:
+                with open(output.temp_path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+            # 更新访问时间，淘汰时按最近使用排序
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            print(f"[WARN] 读取导出缓存失败: {e}")
+            return False
+
+    def store(self, key: str, source_path: str):
+        """将导出结果加入缓存（失败只提示，不影响导出）"""
+        try:
+            size = os.path.getsize(source_path)
+            if size > self.max_bytes:
+                return
+            with AtomicOutputFile(self._path(key)) as output:
+                shutil.copyfile(source_path, output.temp_path)
+            self.evict()
+        except OSError as e:
+            print(f"[WARN] 写入导出缓存失败: {e}")
+
+    def evict(self):
+        """总大小超过上限时，删除最久未使用的缓存文件"""
+        with self._lock:
+            evict_lru(self.cache_dir, CACHE_SUFFIX, self.max_bytes)
+
+    def size(self) -> int:
+        """缓存文件总大小（字节）"""
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        return sum(entry.stat().st_size for entry in os.scandir(self.cache_dir)
+                   if entry.name.endswith(CACHE_SUFFIX) and entry.is_file())
+
+    def clear(self):
+        """删除全部缓存文件"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        with self._lock:
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(CACHE_SUFFIX) and entry.is_file():
+                    os.remove(entry.path)
@@ -0,0 +1,222 @@
+"""
+生成结果缓存：按生成参数的指纹缓存 generate_timesheet_data 的结果（sheet名称 -> DataFrame）
+
+参数中的服务器、账号列表即配置文件的内容，配置文件或日期变化时指纹随之变化。
+内存中按LRU保存，总大小超过上限时淘汰最久未使用的结果；指定 spill_dir 时被淘汰的结果
+按列写入npz文件（分类列只保存编码和类别表，相同的列只保存一份，整列相同的列只记录值），再次命中时从磁盘读回。
+work_table 的生成已经向量化，读回npz的耗时与重新生成相当，落盘默认不启用。
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .export_cache import evict_lru
+from .xlsx_package import AtomicOutputFile
+
+MEMO_FORMAT = 1  # 指纹与落盘格式版本，生成逻辑或格式变化时递增
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 内存上限 512MB
+DEFAULT_SPILL_BYTES = 1024 ** 3  # 落盘目录上限 1GB
+SPILL_SUFFIX = ".npz"
+
+
+def _array_key(array: np.ndarray):
+    """同一块内存（各sheet共用的列）只计算、保存一次"""
+    return array.__array_interface__['data'][0], array.nbytes, array.dtype.str
+
+
+def _column_arrays(series: pd.Series):
+    """列的底层数组：分类列为 (编码, 类别表)，其他列为 (数组, None)"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        values = series.array
+        return values.codes, values.categories
+    return series.to_numpy(), None
+
+
+def estimate_bytes(data_dict: Dict[str, pd.DataFrame]) -> int:
+    """估算一组sheet占用的内存（共用的数组、类别表只计一次）"""
+    seen = set()
+    total = 0
+    for df in data_dict.values():
+        for _, series in df.items():
+            array, categories = _column_arrays(series)
+            key = _array_key(array)
+            if key not in seen:
+                seen.add(key)
+                total += array.nbytes
+            if categories is not None and id(categories) not in seen:
+                seen.add(id(categories))
+                total += int(categories.memory_usage(deep=True))
+    return total
+
+
+class GenerationMemo:
+    """生成结果的LRU缓存（线程安全），max_bytes 为内存上限，spill_dir 为空时淘汰的结果直接丢弃"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, spill_dir: Optional[str] = None,
+                 spill_max_bytes: int = DEFAULT_SPILL_BYTES):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.spill_max_bytes = spill_max_bytes
+        self._entries: "OrderedDict[str, Dict[str, pd.DataFrame]]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(**arguments: Any) -> str:
+        """生成参数的指纹（参数需可JSON序列化）"""
+        return hashlib.sha256(json.dumps({"format": MEMO_FORMAT, "arguments": arguments},
+                                         sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, pd.DataFrame]]:
+        """命中时返回结果（新的dict，DataFrame与缓存共用，调用方不能原地修改）"""
+        with self._lock:
+            data_dict = self._entries.get(key)
+            if data_dict is not None:
+                self._entries.move_to_end(key)
+                return dict(data_dict)
+
+        data_dict = self._load(key)
+        if data_dict is not None:
+            self.put(key, data_dict, spilled=True)
+        return data_dict
+
+    def put(self, key: str, data_dict: Dict[str, pd.DataFrame], spilled: bool = False):
+        """加入缓存，超过内存上限时淘汰最久未使用的结果（spilled 表示磁盘上已有）"""
+        size = estimate_bytes(data_dict)
+        evicted = []
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._sizes.pop(key)
+                del self._entries[key]
+            if size <= self.max_bytes:
+                self._entries[key] = dict(data_dict)
+                self._sizes[key] = size
+                self._size += size
+            elif not spilled:
+                evicted.append((key, data_dict))
+            while self._size > self.max_bytes:
+                old_key, old_data = self._entries.popitem(last=False)
+                self._size -= self._sizes.pop(old_key)
+                evicted.append((old_key, old_data))
+
+        # 在锁外写盘
+        for old_key, old_data in evicted:
+            self._spill(old_key, old_data)
+
+    def size(self) -> int:
+        """内存中结果的估算大小（字节）"""
+        return self._size
+
+    def clear(self):
+        """清空内存中的结果（不删除落盘文件）"""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ========== 落盘 ==========
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.spill_dir, key + SPILL_SUFFIX)
+
+    def _spill(self, key: str, data_dict: Dict[str, pd.DataFrame]):
+        """按列写入npz（失败只提示）"""
+        if not self.spill_dir or os.path.exists(self._path(key)):
+            return
+
+        arrays: Dict[str, np.ndarray] = {}
+        array_names: Dict[Any, str] = {}
+        category_names: Dict[int, str] = {}
+
+        def add_array(array: np.ndarray) -> str:
+            # 按内容去重：构造DataFrame时共用的列可能已被复制
+            array_key = (array.dtype.str, hashlib.blake2b(np.ascontiguousarray(array).data, digest_size=16).digest())
+            name = array_names.get(array_key)
+            if name is None:
+                name = array_names[array_key] = f"a{len(arrays)}"
+                arrays[name] = array
+            return name
+
+        layout = []
+        for sheet_name, df in data_dict.items():
+            columns = []
+            for column, series in df.items():
+                array, categories = _column_arrays(series)
+                if array.dtype == object:
+                    return  # 对象列不落盘
+                category_name = None
+                if categories is not None:
+                    category_name = category_names.get(id(categories))
+                    if category_name is None:
+                        values = categories.to_numpy()
+                        if not all(isinstance(value, str) for value in values):
+                            return
+                        category_name = category_names[id(categories)] = f"c{len(category_names)}"
+                        arrays[category_name] = np.array(values, dtype=str)
+                if len(array) and (array == array[0]).all():
+                    # 整列相同（如各sheet的起止时间）只记录值和长度，读回时不必逐个读取npz成员
+                    source = ["const", array.dtype.str, array[:1].tobytes().hex(), len(array)]
+                else:
+                    source = ["array", add_array(array)]
+                columns.append([str(column), source, category_name])
+            layout.append([sheet_name, columns])
+        arrays["layout"] = np.array(json.dumps(layout, ensure_ascii=False))
+
+        try:
+            with AtomicOutputFile(self._path(key)) as output:
+                with open(output.temp_path, 'wb') as f:
+                    np.savez(f, **arrays)
+            evict_lru(self.spill_dir, SPILL_SUFFIX, self.spill_max_bytes)
+        except OSError as e:
+            print(f"[WARN] 生成结果写入磁盘失败: {e}")
+
+    def _load(self, key: str) -> Optional[Dict[str, pd.DataFrame]]:
+        """从npz读回（不存在或读取失败时返回None）"""
+        if not self.spill_dir:
+            return None
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                arrays = {name: npz[name] for name in npz.files}
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"[WARN] 读取落盘的生成结果失败: {e}")
+            return None
+
+        # 同一份数组、类别表在各sheet之间共用，与生成时一致
+        dtypes = {}
+        columns_cache = {}
+        data_dict = {}
+        for sheet_name, columns in json.loads(str(arrays["layout"])):
+            frame = {}
+            for column, source, category_name in columns:
+                cache_key = (tuple(source), category_name)
+                values = columns_cache.get(cache_key)
+                if values is None:
+                    if source[0] == "const":
+                        _, dtype_str, value, length = source
+                        dtype = np.dtype(dtype_str)
+                        values = np.full(length, np.frombuffer(bytes.fromhex(value), dtype)[0], dtype=dtype)
+                    else:
+                        values = arrays[source[1]]
+                    if category_name is not None:
+                        dtype = dtypes.get(category_name)
+                        if dtype is None:
+                            dtype = dtypes[category_name] = pd.CategoricalDtype(arrays[category_name].tolist())
+                        values = pd.Categorical.from_codes(values, dtype=dtype)
+                    columns_cache[cache_key] = values
+                frame[column] = values
+            data_dict[sheet_name] = pd.DataFrame(frame)
+        return data_dict
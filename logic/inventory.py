@@ -0,0 +1,413 @@
+"""
+服务器清单：解析 config/service，得到 (资源池, IP, 名称) 的列式记录
+
+按块读取文件：整块各行格式一致（同一种分隔符、段数相同）时直接用字符串内置方法切分成列；
+否则用一个预编译正则逐行匹配常见的"资源池<分隔符>IP[<分隔符>名称]"行，
+其余行（混用分隔符、单段、注释）按 config_files.split_service_line 的规则处理，结果与 parse_service_lines 一致。
+GUI、批量任务和命令行共用同一份解析结果，生成数据时不再逐条拆分"资源池 IP"字符串。
+命令行用 load_inventory 流式读取文件；GUI 和批量任务经 ConfigStore 读入原文（配置编辑框要显示）后用 parse_inventory 解析。
+
+服务器清单带有按需建立的索引（资源池 -> 服务器、按IP排序的网段查找），
+可按 ServerFilter 选出部分资源池或网段的服务器，无需逐条扫描。
+"""
+import bisect
+import heapq
+import ipaddress
+import os
+import re
+import socket
+from collections import deque
+from dataclasses import dataclass
+from functools import cached_property
+from itertools import repeat
+from typing import Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from .config_files import SAMPLE_BYTES, SERVICE_SEPARATORS, detect_encoding, read_file_with_encoding, \
+    split_service_line
+
+_OCTET = r'(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])'
+_IPV4 = rf'{_OCTET}(?:\.{_OCTET}){{3}}'
+_FIELD = r'[^\s,:|;]+'
+
+# 每行匹配一次：只用一种分隔符的"资源池<分隔符>IP[<分隔符>名称]"行拆出各段（合法IPv4单独成组，
+# 资源池、IP、名称均不含空白与分隔符，多余的段忽略）；其他行整行放入最后一组，按原规则处理
+_LINE_PATTERN = re.compile(
+    rf'^[^\S\n]*([^\s,:|;#][^\s,:|;]*)([\t ,:|;])\2*(?:({_IPV4})(?=[\t ,:|;]|[^\S\n]*$)|({_FIELD}))'
+    rf'(?:\2+({_FIELD}))?(?:\2+{_FIELD})*\2*[^\S\n]*$|^(.*)$',
+    re.MULTILINE)
+
+# str.splitlines() 认作换行、但文本模式读取不会转换为 '\n' 的字符（'\r\n'、'\r' 已由通用换行转换）
+_OTHER_LINE_BREAKS = re.compile('[\v\f\r\x1c\x1d\x1e\x85\u2028\u2029]')
+
+# 按行匹配合法的IPv4地址（批量校验）
+_IPV4_LINES = re.compile(rf'^{_IPV4}$', re.MULTILINE)
+
+# str.isspace() 为真的字符（不含换行），整块解析前确认字段中没有这些字符
+_SPACES = tuple(c for c in map(chr, range(0x3001)) if c.isspace() and c != '\n')
+
+# 流式读取时每次解析的字符数
+CHUNK_CHARS = 4 * 1024 * 1024
+
+# 整块不规整时按此行数分小块重试
+BLOCK_LINES = 256
+
+
+class ServerRecord(NamedTuple):
+    """一台服务器"""
+    pool: str
+    ip: str
+    name: str
+    line: int  # 在配置文件中的行号（从1开始）
+
+
+@dataclass(frozen=True)
+class Inventory:
+    """服务器清单（按配置文件顺序的列式记录）"""
+    pools: Tuple[str, ...]
+    ips: Tuple[str, ...]
+    names: Tuple[str, ...]
+    lines: Tuple[int, ...]
+    resource_ips: Tuple[str, ...]  # "资源池 IP"格式，与 parse_service_lines 的结果相同
+    invalid_ips: FrozenSet[str]  # 不是合法IPv4/IPv6地址的非空IP
+
+    def __len__(self) -> int:
+        return len(self.pools)
+
+    def __iter__(self) -> Iterator[ServerRecord]:
+        return map(ServerRecord, self.pools, self.ips, self.names, self.lines)
+
+    def servers(self) -> List[Tuple[str, str]]:
+        """(资源池, IP) 列表，与对每个"资源池 IP"调用 split_resource_ip 的结果相同"""
+        return list(zip(self.pools, self.ips))
+
+    @classmethod
+    def from_resource_ips(cls, resource_ips: Sequence[str]) -> 'Inventory':
+        """由"资源池 IP"字符串列表构建（没有名称，行号为列表中的序号）"""
+        pools, ips = [], []
+        for resource_ip in resource_ips:
+            pool, ip = _split_pool_ip(resource_ip)
+            pools.append(pool)
+            ips.append(ip)
+        return cls(pools=tuple(pools), ips=tuple(ips), names=("",) * len(pools),
+                   lines=tuple(range(1, len(pools) + 1)), resource_ips=tuple(resource_ips),
+                   invalid_ips=frozenset(find_invalid_ips(ips)))
+
+    @cached_property
+    def index(self) -> 'InventoryIndex':
+        """查找索引（第一次使用时建立，清单不可变，之后一直复用）"""
+        return InventoryIndex(self)
+
+    def take(self, rows: Sequence[int]) -> 'Inventory':
+        """按行序号取出部分服务器，组成新的清单"""
+        ips = tuple(self.ips[row] for row in rows)
+        return Inventory(pools=tuple(self.pools[row] for row in rows), ips=ips,
+                         names=tuple(self.names[row] for row in rows),
+                         lines=tuple(self.lines[row] for row in rows),
+                         resource_ips=tuple(self.resource_ips[row] for row in rows),
+                         invalid_ips=self.invalid_ips.intersection(ips))
+
+    def select(self, server_filter: 'ServerFilter') -> 'Inventory':
+        """按资源池/网段筛选服务器（保持配置文件中的顺序）"""
+        if server_filter.empty:
+            return self
+        return self.take(self.index.select(server_filter))
+
+
+@dataclass(frozen=True)
+class ServerFilter:
+    """
+    服务器筛选条件：同一项中的多个值取并集，资源池与网段同时指定时取交集，为空表示不限
+
+    网段可以是 CIDR（如 "10.1.0.0/16"、"fd00::/8"）、完整IP，或IP文本前缀（如 "10.1."）
+    """
+    pools: Tuple[str, ...] = ()
+    networks: Tuple[str, ...] = ()
+
+    @property
+    def empty(self) -> bool:
+        return not self.pools and not self.networks
+
+    def describe(self) -> str:
+        parts = []
+        if self.pools:
+            parts.append(f"资源池: {', '.join(self.pools)}")
+        if self.networks:
+            parts.append(f"网段: {', '.join(self.networks)}")
+        return "；".join(parts) or "全部服务器"
+
+
+class InventoryIndex:
+    """
+    服务器清单的查找索引，各部分在第一次用到时建立：
+
+    - 资源池 -> 行序号
+    - IPv4/IPv6 按地址整数排序，CIDR 网段用二分查找取连续区间
+    - IP文本排序，文本前缀用二分查找取连续区间
+    """
+
+    def __init__(self, inventory: Inventory):
+        self.inventory = inventory
+
+    @cached_property
+    def pool_rows(self) -> Dict[str, List[int]]:
+        rows: Dict[str, List[int]] = {}
+        for row, pool in enumerate(self.inventory.pools):
+            rows.setdefault(pool, []).append(row)
+        return rows
+
+    @cached_property
+    def _ipv4(self) -> Tuple[List[int], List[int]]:
+        """(排序后的IPv4地址整数, 对应的行序号)"""
+        invalid = self.inventory.invalid_ips
+        rows = [row for row, ip in enumerate(self.inventory.ips)
+                if ip and ':' not in ip and ip not in invalid]
+        keys = [int.from_bytes(socket.inet_pton(socket.AF_INET, self.inventory.ips[row]), 'big') for row in rows]
+        return _sorted_pairs(keys, rows)
+
+    @cached_property
+    def _ipv6(self) -> Tuple[List[int], List[int]]:
+        """(排序后的IPv6地址整数, 对应的行序号)"""
+        invalid = self.inventory.invalid_ips
+        rows = [row for row, ip in enumerate(self.inventory.ips) if ':' in ip and ip not in invalid]
+        keys = [int(ipaddress.IPv6Address(self.inventory.ips[row])) for row in rows]
+        return _sorted_pairs(keys, rows)
+
+    @cached_property
+    def _ip_text(self) -> Tuple[List[str], List[int]]:
+        """(排序后的IP文本, 对应的行序号)"""
+        return _sorted_pairs(list(self.inventory.ips), range(len(self.inventory)))
+
+    def network_rows(self, network: str) -> List[int]:
+        """某个网段（CIDR、完整IP或IP文本前缀）内的服务器行序号"""
+        network = network.strip()
+        try:
+            parsed = ipaddress.ip_network(network, strict=False)
+        except ValueError:
+            # 不是合法的网段或IP：按IP文本前缀查找
+            keys, rows = self._ip_text
+            start = bisect.bisect_left(keys, network)
+            end = start
+            while end < len(keys) and keys[end].startswith(network):
+                end += 1
+            return list(rows[start:end])
+
+        keys, rows = self._ipv4 if parsed.version == 4 else self._ipv6
+        start = bisect.bisect_left(keys, int(parsed.network_address))
+        end = bisect.bisect_right(keys, int(parsed.broadcast_address))
+        return rows[start:end]
+
+    def select(self, server_filter: ServerFilter) -> List[int]:
+        """符合筛选条件的行序号（升序，即配置文件中的顺序）"""
+        selected: Optional[Set[int]] = None
+        if server_filter.pools:
+            selected = set()
+            for pool in server_filter.pools:
+                selected.update(self.pool_rows.get(pool, ()))
+        if server_filter.networks:
+            in_networks = set()
+            for network in server_filter.networks:
+                in_networks.update(self.network_rows(network))
+            selected = in_networks if selected is None else selected & in_networks
+        if selected is None:
+            return list(range(len(self.inventory)))
+        return sorted(selected)
+
+
+def _sorted_pairs(keys: list, rows: Sequence[int]) -> Tuple[list, List[int]]:
+    """按 keys 排序，返回 (排序后的keys, 对应的rows)"""
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    return [keys[i] for i in order], [rows[i] for i in order]
+
+
+def _split_pool_ip(resource_ip: str) -> Tuple[str, str]:
+    """与 split_resource_ip 一致：最后一段作为IP，其余作为资源池"""
+    fields = resource_ip.split()
+    if len(fields) > 1:
+        return ' '.join(fields[:-1]), fields[-1]
+    return (fields[0] if fields else ""), ""
+
+
+def _split_uniform(text: str) -> Optional[Tuple[List[str], int]]:
+    """
+    整块拆分：每行都只用同一种分隔符、段数相同、没有空段和其他空白时，
+    返回 (按行展开的全部字段, 每行段数)，否则返回None
+
+    这种情况下逐行按原规则拆分的结果就是按分隔符切开的各段，只用字符串的内置方法即可完成。
+    """
+    if not text or text[0] == '#' or '\n#' in text or '\n\n' in text:
+        return None
+    present = [sep for sep in SERVICE_SEPARATORS if sep in text]
+    if len(present) != 1:
+        return None
+    sep = present[0]
+    if any(space in text for space in _SPACES if space != sep):
+        return None
+    if (sep + sep in text or '\n' + sep in text or sep + '\n' in text
+            or text[0] == sep or text[-1] == sep):
+        return None
+
+    lines = text.split('\n')
+    width = lines[0].count(sep)
+    if lines.count('') or any(map(width.__ne__, map(str.count, lines, repeat(sep)))):
+        return None
+    return text.replace(sep, '\n').split('\n'), width + 1
+
+
+def _all_ipv4(ips: List[str]) -> bool:
+    """批量确认全部为合法的点分十进制IPv4"""
+    try:
+        deque(map(socket.inet_pton, repeat(socket.AF_INET), ips), maxlen=0)
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def find_invalid_ips(ips: Iterable[str]) -> Set[str]:
+    """校验非空IP，返回不是合法IPv4/IPv6地址的IP（IPv4由一个正则整体匹配，只有含冒号的才逐个按IPv6校验）"""
+    unique = {ip for ip in ips if ip}
+    unique.difference_update(_IPV4_LINES.findall('\n'.join(unique)))
+    invalid = set()
+    for ip in unique:
+        if ':' not in ip:
+            invalid.add(ip)
+            continue
+        try:
+            ipaddress.ip_address(ip)
+        except ValueError:
+            invalid.add(ip)
+    return invalid
+
+
+class _InventoryBuilder:
+    """按块累积解析结果"""
+
+    def __init__(self):
+        self.pools: List[str] = []
+        self.ips: List[str] = []
+        self.names: List[str] = []
+        self.lines: List[int] = []
+        self.resource_ips: List[str] = []
+        self.unchecked_ips: Set[str] = set()  # 正则未识别为IPv4的IP，最后统一校验
+        self.line_count = 0
+
+    def feed(self, text: str):
+        """解析以换行分隔的若干完整行"""
+        if text.endswith('\n'):
+            text = text[:-1]
+        if self._feed_uniform(text):
+            return
+        # 其余换行符都是单个字符（整块拆分时已因含空白字符而排除），替换为 '\n' 后与 splitlines 分行一致
+        if _OTHER_LINE_BREAKS.search(text):
+            text = _OTHER_LINE_BREAKS.sub('\n', text)
+        # 个别行（注释、混用分隔符等）不规整时，按小块重试，只有含这些行的块逐行匹配
+        lines = text.split('\n')
+        for start in range(0, len(lines), BLOCK_LINES):
+            block = '\n'.join(lines[start:start + BLOCK_LINES])
+            if not self._feed_uniform(block):
+                self._feed_matches(block)
+
+    def _feed_matches(self, text: str):
+        """用预编译正则逐行匹配"""
+        matches = _LINE_PATTERN.findall(text)
+        base = self.line_count
+        self.line_count += len(matches)
+        if not matches:
+            return
+
+        pools, _, ipv4s, others, names, rests = zip(*matches)
+        if all(pools):
+            # 全部是常见格式：整块处理
+            self.pools += pools
+            self.ips += map(max, ipv4s, others)  # 两组中只有一组非空
+            self.names += names
+            self.lines += range(base + 1, base + len(matches) + 1)
+            self.resource_ips += map(' '.join, zip(pools, self.ips[-len(matches):]))
+            self.unchecked_ips.update(filter(None, others))
+            return
+
+        for number, (pool, _, ipv4, other, name, rest) in enumerate(matches, base + 1):
+            if pool:
+                ip = ipv4 or other
+                resource_ip = f"{pool} {ip}"
+                if other:
+                    self.unchecked_ips.add(other)
+            else:
+                parts = split_service_line(rest)
+                if parts is None:
+                    continue
+                resource_ip = f"{parts[0]} {parts[1]}" if len(parts) >= 2 else parts[0]
+                name = parts[2] if len(parts) >= 3 else ""
+                pool, ip = _split_pool_ip(resource_ip)
+                if ip:  # 只有一段（没有IP）的行不校验
+                    self.unchecked_ips.add(ip)
+            self.pools.append(pool)
+            self.ips.append(ip)
+            self.names.append(name)
+            self.lines.append(number)
+            self.resource_ips.append(resource_ip)
+
+    def _feed_uniform(self, text: str) -> bool:
+        """能整块拆分时直接按列切片，返回是否已处理"""
+        split = _split_uniform(text)
+        if split is None:
+            return False
+        fields, width = split
+        pools, ips = fields[0::width], fields[1::width]
+        base = self.line_count
+        self.line_count += len(pools)
+        self.pools += pools
+        self.ips += ips
+        self.names += fields[2::width] if width >= 3 else repeat("", len(pools))
+        self.lines += range(base + 1, base + len(pools) + 1)
+        self.resource_ips += map(' '.join, zip(pools, ips))
+        if not _all_ipv4(ips):
+            self.unchecked_ips.update(ips)
+        return True
+
+    def build(self) -> Inventory:
+        invalid = find_invalid_ips(self.unchecked_ips)
+        if invalid:
+            print(f"[WARN] 服务器配置中有 {len(invalid)} 个无效IP，如: {', '.join(heapq.nsmallest(3, invalid))}")
+        return Inventory(pools=tuple(self.pools), ips=tuple(self.ips), names=tuple(self.names),
+                         lines=tuple(self.lines), resource_ips=tuple(self.resource_ips),
+                         invalid_ips=frozenset(invalid))
+
+
+def parse_inventory(content: str) -> Inventory:
+    """解析服务器配置内容（按 splitlines 分行，与 parse_service_lines 一致）"""
+    builder = _InventoryBuilder()
+    builder.feed('\n'.join(content.splitlines()))
+    return builder.build()
+
+
+def load_inventory(file_path: str, chunk_chars: int = CHUNK_CHARS) -> Inventory:
+    """
+    按块流式读取并解析服务器配置文件（编码由文件开头的样本检测），每次解析约 chunk_chars 个字符
+    分行规则与 parse_inventory 相同（str.splitlines 的全部换行符）
+    """
+    if not os.path.exists(file_path):
+        return parse_inventory("")
+
+    with open(file_path, 'rb') as f:
+        encoding = detect_encoding(f.read(SAMPLE_BYTES + 1)) or 'utf-8'
+    builder = _InventoryBuilder()
+    try:
+        with open(file_path, 'r', encoding=encoding) as f:
+            pending = ''
+            while True:
+                chunk = f.read(chunk_chars)
+                if not chunk:
+                    break
+                # 每次只解析完整的行，最后半行留到下一块
+                end = chunk.rfind('\n') + 1
+                if end:
+                    builder.feed(pending + chunk[:end])
+                    pending = chunk[end:]
+                else:
+                    pending += chunk
+            if pending:
+                builder.feed(pending)
+    except UnicodeDecodeError:
+        # 样本之后出现了非法字节：整体检测编码后再解析
+        return parse_inventory(read_file_with_encoding(file_path))
+    return builder.build()
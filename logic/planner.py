@@ -0,0 +1,256 @@
+"""
+导出预估：生成数据之前按输入规模估算行数、内存、输出大小和耗时，并选择导出方式
+
+导出方式:
+    IN_MEMORY  一次性在内存中组装整个工作簿（最快，内存占用随单元格数增长）
+    STREAMING  xlsxwriter constant_memory 模式逐行落盘（内存恒定，约慢一倍）
+    SHARDED    按sheet拆分为多个文件依次导出
+    PARALLEL   按sheet拆分为多个文件，由多个进程同时导出
+"""
+import math
+import os
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, List, Optional
+
+from .table import EXCEL_MAX_ROWS
+
+
+class ExportEngine(Enum):
+    """导出方式"""
+    IN_MEMORY = "in_memory"
+    STREAMING = "streaming"
+    SHARDED = "sharded"
+    PARALLEL = "parallel"
+
+
+@dataclass
+class Calibration:
+    """
+    校准表：单位单元格的耗时、内存与输出大小
+    默认值取自 work_table 模板（11列，文本分类列）的实测结果，可按实际机器调整
+    """
+    generate_seconds_per_cell: float = 0.02e-6
+    export_seconds_per_cell: Dict[str, float] = field(default_factory=lambda: {
+        "in_memory": 3.3e-6,
+        "streaming": 6.3e-6,
+    })
+    workbook_bytes_per_cell: Dict[str, float] = field(default_factory=lambda: {
+        "in_memory": 50,  # xlsxwriter 单元格表
+        "streaming": 0,
+    })
+    data_bytes_per_cell: float = 2  # 分类编码列
+    output_bytes_per_cell: float = 2.4  # 压缩后的xlsx
+    sheet_seconds: float = 0.005  # 每个sheet的固定耗时（表头、列宽等）
+    sheet_bytes: int = 2048  # 每个sheet的固定输出大小
+    base_memory_bytes: int = 80 * 1024 * 1024  # 进程基础内存（pandas、xlsxwriter等）
+    process_start_seconds: float = 1.0  # 启动一个导出进程的耗时
+
+
+DEFAULT_CALIBRATION = Calibration()
+
+# 单个文件的单元格数上限，超过后按sheet拆分为多个文件（过大的文件Excel打开很慢）
+MAX_CELLS_PER_FILE = 30_000_000
+
+# 预估耗时超过该值（秒）时需要在界面上确认
+CONFIRM_SECONDS = 30
+
+
+def physical_memory() -> Optional[int]:
+    """物理内存大小（字节），无法获取时返回None"""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def default_memory_budget() -> int:
+    """默认内存预算：物理内存的一半，无法获取时按2GB"""
+    total = physical_memory()
+    return total // 2 if total else 2 * 1024 ** 3
+
+
+@dataclass
+class ExportPlan:
+    """导出预估结果"""
+    engine: ExportEngine
+    sheet_count: int  # 导出的sheet数（含超出行数上限拆分出的续表）
+    rows_per_sheet: int  # 每个时间段的数据行数
+    total_rows: int
+    total_cells: int
+    memory_bytes: int  # 预估峰值内存
+    output_bytes: int  # 预估输出大小
+    seconds: float  # 预估总耗时（生成 + 导出）
+    shard_count: int = 1  # 输出文件数
+    workers: int = 1  # 导出进程数
+    streaming: bool = False  # 是否以 constant_memory 模式写入（分片导出时针对每个分片）
+    reason: str = ""  # 选择该导出方式的原因
+
+    @property
+    def needs_confirmation(self) -> bool:
+        """是否需要用户确认（非内存导出或耗时较长）"""
+        return self.engine is not ExportEngine.IN_MEMORY or self.seconds > CONFIRM_SECONDS
+
+    def summary(self) -> str:
+        """用于界面显示的预估说明"""
+        lines = [
+            f"sheet数: {self.sheet_count}，每个sheet {self.rows_per_sheet:,} 行",
+            f"总行数: {self.total_rows:,}（{self.total_cells:,} 个单元格）",
+            f"预计内存: {format_bytes(self.memory_bytes)}",
+            f"预计文件大小: {format_bytes(self.output_bytes)}",
+            f"预计耗时: {format_seconds(self.seconds)}",
+            f"导出方式: {ENGINE_NAMES[self.engine]}",
+        ]
+        if self.shard_count > 1:
+            lines.append(f"输出文件数: {self.shard_count}，导出进程数: {self.workers}")
+        if self.reason:
+            lines.append(f"原因: {self.reason}")
+        return "\n".join(lines)
+
+
+ENGINE_NAMES = {
+    ExportEngine.IN_MEMORY: "内存导出",
+    ExportEngine.STREAMING: "流式导出",
+    ExportEngine.SHARDED: "分文件导出",
+    ExportEngine.PARALLEL: "多进程分文件导出",
+}
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.1f} 秒"
+    minutes, seconds = divmod(int(seconds), 60)
+    if minutes < 60:
+        return f"{minutes} 分 {seconds} 秒"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours} 小时 {minutes} 分"
+
+
+def plan_export(
+        slot_count: int,
+        rows_per_slot: int,
+        column_count: int,
+        header_rows: int = 0,
+        engine: Optional[ExportEngine] = None,
+        memory_budget: Optional[int] = None,
+        workers: Optional[int] = None,
+        max_cells_per_file: int = MAX_CELLS_PER_FILE,
+        calibration: Calibration = DEFAULT_CALIBRATION
+) -> ExportPlan:
+    """
+    估算导出规模并选择导出方式
+
+    Args:
+        slot_count: 时间段（原sheet）数量
+        rows_per_slot: 每个时间段的数据行数
+        column_count: 数据列数
+        header_rows: 表头行数
+        engine: 指定导出方式（为空时自动选择）
+        memory_budget: 内存预算（字节），为空时取物理内存的一半
+        workers: 最多使用的导出进程数，为空时取CPU核数
+        max_cells_per_file: 单个文件的单元格数上限
+        calibration: 校准表
+    """
+    memory_budget = memory_budget or default_memory_budget()
+    workers = max(workers or os.cpu_count() or 1, 1)
+
+    # 超出单个sheet行数上限的时间段会拆分为续表
+    rows_per_sheet = EXCEL_MAX_ROWS - header_rows
+    parts_per_slot = max(math.ceil(rows_per_slot / rows_per_sheet), 1)
+    sheet_count = slot_count * parts_per_slot
+    total_rows = slot_count * rows_per_slot
+    total_cells = total_rows * column_count
+
+    data_bytes = total_cells * calibration.data_bytes_per_cell
+    output_bytes = int(total_cells * calibration.output_bytes_per_cell + sheet_count * calibration.sheet_bytes)
+    generate_seconds = total_cells * calibration.generate_seconds_per_cell
+
+    def memory(cells: int, streaming: bool) -> int:
+        per_cell = calibration.workbook_bytes_per_cell["streaming" if streaming else "in_memory"]
+        return int(calibration.base_memory_bytes + data_bytes + cells * per_cell)
+
+    def export_seconds(cells: int, sheets: int, streaming: bool) -> float:
+        per_cell = calibration.export_seconds_per_cell["streaming" if streaming else "in_memory"]
+        return cells * per_cell + sheets * calibration.sheet_seconds
+
+    # 按单元格数决定文件数（每个文件至少一个时间段）
+    shard_count = min(max(math.ceil(total_cells / max_cells_per_file), 1), max(slot_count, 1))
+    reason = ""
+    if engine is None:
+        if shard_count > 1:
+            engine = ExportEngine.PARALLEL if workers > 1 else ExportEngine.SHARDED
+            reason = f"单元格数超过单个文件上限 {max_cells_per_file:,}"
+        elif memory(total_cells, False) > memory_budget:
+            engine = ExportEngine.STREAMING
+            reason = f"内存导出预计超过内存预算 {format_bytes(memory_budget)}"
+        else:
+            engine = ExportEngine.IN_MEMORY
+    elif engine in (ExportEngine.SHARDED, ExportEngine.PARALLEL):
+        shard_count = max(shard_count, min(2, slot_count))
+        reason = "手动指定"
+    else:
+        shard_count = 1
+        reason = "手动指定"
+
+    if engine in (ExportEngine.IN_MEMORY, ExportEngine.STREAMING):
+        shard_count, workers = 1, 1
+        streaming = engine is ExportEngine.STREAMING
+        seconds = generate_seconds + export_seconds(total_cells, sheet_count, streaming)
+        memory_bytes = memory(total_cells, streaming)
+    else:
+        if engine is ExportEngine.SHARDED:
+            workers = 1
+        workers = min(workers, shard_count)
+        shard_cells = math.ceil(total_cells / shard_count)
+        shard_sheets = math.ceil(sheet_count / shard_count)
+        # 每个进程同时持有一个分片的工作簿
+        streaming = memory(shard_cells * workers, False) > memory_budget
+        rounds = math.ceil(shard_count / workers)
+        seconds = generate_seconds + rounds * export_seconds(shard_cells, shard_sheets, streaming)
+        if engine is ExportEngine.PARALLEL:
+            seconds += calibration.process_start_seconds
+        per_cell = calibration.workbook_bytes_per_cell["streaming" if streaming else "in_memory"]
+        memory_bytes = int(memory(0, streaming) + workers * (calibration.base_memory_bytes + shard_cells * per_cell))
+
+    return ExportPlan(
+        engine=engine,
+        sheet_count=sheet_count,
+        rows_per_sheet=rows_per_slot,
+        total_rows=total_rows,
+        total_cells=total_cells,
+        memory_bytes=memory_bytes,
+        output_bytes=output_bytes,
+        seconds=seconds,
+        shard_count=shard_count,
+        workers=workers,
+        streaming=streaming,
+        reason=reason
+    )
+
+
+def shard_file_paths(file_path: str, shard_count: int) -> List[str]:
+    """分片输出文件名：原文件名_part1.xlsx、原文件名_part2.xlsx…"""
+    if shard_count <= 1:
+        return [file_path]
+    base, ext = os.path.splitext(file_path)
+    return [f"{base}_part{index}{ext or '.xlsx'}" for index in range(1, shard_count + 1)]
+
+
+def split_evenly(items: List, shard_count: int) -> List[List]:
+    """将列表按顺序尽量平均地分成 shard_count 段"""
+    shard_count = max(min(shard_count, len(items)), 1)
+    size, extra = divmod(len(items), shard_count)
+    shards, start = [], 0
+    for index in range(shard_count):
+        stop = start + size + (1 if index < extra else 0)
+        shards.append(items[start:stop])
+        start = stop
+    return shards
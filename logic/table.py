@@ -1,14 +1,28 @@
 import numpy as np
-from dataclasses import dataclass, field
-from typing import Optional, List, Dict, Any, Union, Tuple, TYPE_CHECKING, Callable
+from dataclasses import dataclass, field, replace
+from typing import Optional, List, Dict, Any, Union, Tuple, TYPE_CHECKING, Callable, BinaryIO, Mapping, Iterator
 from enum import Enum
 import pandas as pd
 import xlsxwriter
-from datetime import datetime
+from datetime import datetime, date
 import os
 import json,time
+import hashlib
 import inspect
+import contextlib
+import threading
 from functools import wraps
+from io import BytesIO
+from types import MappingProxyType
+
+try:
+    from xlsxwriter.worksheet import CellStringTuple, CellBlankTuple, CellRichStringTuple
+except ImportError:  # XlsxWriter < 3.2
+    from xlsxwriter.worksheet import (cell_string_tuple as CellStringTuple, cell_blank_tuple as CellBlankTuple,
+                                      cell_rich_string_tuple as CellRichStringTuple)
+
+from .export_cache import update_frame_digest
+from .xlsx_package import ExportWorkbook, AtomicOutputFile, SheetPartCache, SheetPartEntry
 
 # 条件导入，用于类型提示
 if TYPE_CHECKING:
@@ -263,6 +277,15 @@ class FontStyle(Enum):
     BOLD_ITALIC = "bold_italic"
 
 
+class ValueType(Enum):
+    """列的写入类型"""
+    AUTO = "auto"  # 按值的Python类型写入，字符串依赖 strings_to_numbers 探测
+    STRING = "string"  # 一律写为文本
+    NUMBER = "number"  # 写为数字，无法转换的值保留为文本
+    DATETIME = "datetime"  # 写为日期时间，无法解析的值保留为文本
+    BLANK = "blank"  # 只写格式，不写值
+
+
 # ==================== 样式配置类 ====================
 
 @dataclass
@@ -366,6 +389,11 @@ class CellStyle:
         return result
 
 
+def style_cache_key(style: CellStyle) -> str:
+    """样式缓存键"""
+    return json.dumps(style.to_dict(), sort_keys=True)
+
+
 # ==================== 表头配置类 ====================
 
 @dataclass
@@ -395,6 +423,29 @@ class HeaderRow:
         return sum(item.col_span for item in self.items)
 
 
+@dataclass(frozen=True)
+class HeaderCellPlan:
+    """表头写入计划中的一个单元格"""
+    row: int  # 起始行
+    col: int  # 起始列
+    text: str  # 显示文本
+    style: Optional[CellStyle]  # 生效样式（单项样式优先，其次整体样式）
+    style_key: Optional[str]  # 样式缓存键，避免每个sheet重复序列化样式
+    end_row: int  # 合并结束行（不合并时等于row）
+    end_col: int  # 合并结束列（不合并时等于col）
+
+    @property
+    def is_merged(self) -> bool:
+        return self.end_row != self.row or self.end_col != self.col
+
+
+@dataclass(frozen=True)
+class HeaderPlan:
+    """表头写入计划：需要写入的单元格、合并区域及行高，计算一次后各sheet复用"""
+    cells: Tuple[HeaderCellPlan, ...]
+    row_heights: Tuple[int, ...]
+
+
 @dataclass
 class HeaderConfig:
     """表头配置"""
@@ -402,6 +453,14 @@ class HeaderConfig:
     overall_style: Optional[CellStyle] = None  # 整体样式
     merge_headers: bool = True  # 是否合并跨行跨列的单元格
 
+    # 表头写入计划缓存（表头变化时失效）
+    _plan: Optional[HeaderPlan] = field(default=None, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in ('rows', 'overall_style', 'merge_headers'):
+            super().__setattr__('_plan', None)
+
     def __post_init__(self):
         """验证表头配置"""
         if not self.rows:
@@ -413,6 +472,13 @@ class HeaderConfig:
             if row.item_count != first_row_span:
                 raise ValueError(f"第{i + 1}行的表头项跨列总数({row.item_count})与第一行({first_row_span})不一致")
 
+    def freeze(self) -> 'HeaderConfig':
+        """冻结表头结构（行与表头项改为元组），供多个表格共享"""
+        for row in self.rows:
+            row.items = tuple(row.items)
+        self.rows = tuple(self.rows)
+        return self
+
     @property
     def row_count(self) -> int:
         """表头行数"""
@@ -447,6 +513,49 @@ class HeaderConfig:
 
         return grid
 
+    def invalidate_plan(self):
+        """原地修改表头行或表头项后调用，使缓存的写入计划失效"""
+        self._plan = None
+
+    def get_header_plan(self) -> HeaderPlan:
+        """获取表头写入计划（首次调用时由表头网格计算并缓存）"""
+        if self._plan is not None:
+            return self._plan
+
+        grid = self.get_header_grid()
+        cells = []
+        for row_idx in range(self.row_count):
+            for col_idx in range(self.col_count):
+                cell_info = grid[row_idx][col_idx]
+                if not cell_info:
+                    continue
+                item, start_row, start_col = cell_info
+                # 只在跨行跨列单元格的起始位置写入
+                if row_idx != start_row or col_idx != start_col:
+                    continue
+
+                style = item.style or self.overall_style
+                end_row, end_col = start_row, start_col
+                if self.merge_headers and (item.row_span > 1 or item.col_span > 1):
+                    end_row = min(start_row + item.row_span - 1, self.row_count - 1)
+                    end_col = min(start_col + item.col_span - 1, self.col_count - 1)
+
+                cells.append(HeaderCellPlan(
+                    row=start_row,
+                    col=start_col,
+                    text=item.text,
+                    style=style,
+                    style_key=style_cache_key(style) if style else None,
+                    end_row=end_row,
+                    end_col=end_col
+                ))
+
+        self._plan = HeaderPlan(
+            cells=tuple(cells),
+            row_heights=tuple(row.height for row in self.rows)
+        )
+        return self._plan
+
 
 # ==================== 数据样式配置 ====================
 
@@ -474,12 +583,16 @@ class ColumnStyleConfig:
     header_style: Optional[CellStyle] = None  # 该列的表头样式（覆盖整体样式）
     width: Optional[int] = None  # 列宽
     hidden: bool = False  # 是否隐藏列
+    num_format: Optional[str] = None  # 日期时间单元格的数字格式（为空时使用DEFAULT_DATETIME_FORMAT）
+    value_type: ValueType = ValueType.AUTO  # 写入类型（datetime64列始终写为日期时间）
 
     def to_dict(self) -> Dict[str, Any]:
         return {
             "column_name": self.column_name,
             "width": self.width,
-            "hidden": self.hidden
+            "hidden": self.hidden,
+            "num_format": self.num_format,
+            "value_type": self.value_type.value
         }
 
 
@@ -531,6 +644,9 @@ class TableConfig:
     show_gridlines: bool = True  # 是否显示网格线
     zoom_scale: int = 100  # 缩放比例
 
+    # 样式计划缓存（仅冻结的配置缓存，可跨导出复用）
+    _style_plan: Optional['StylePlan'] = field(default=None, init=False, repr=False, compare=False)
+
     def __post_init__(self):
         """验证配置"""
         # 检查数据列数是否与表头列数匹配
@@ -539,10 +655,59 @@ class TableConfig:
                 f"数据列数({len(self.data_columns)})与表头列数({self.header.col_count})不匹配"
             )
 
+    @property
+    def is_frozen(self) -> bool:
+        """是否已冻结（冻结后样式字典只读，需要修改时先 copy）"""
+        return isinstance(self.column_styles, MappingProxyType)
+
+    def freeze(self) -> 'TableConfig':
+        """冻结配置：样式字典改为只读视图，表头结构改为元组"""
+        if not self.is_frozen:
+            self.header.freeze()
+            self.column_styles = MappingProxyType(self.column_styles)
+            self.row_styles = MappingProxyType(self.row_styles)
+            self.cell_styles = MappingProxyType(self.cell_styles)
+        return self
+
+    def __getstate__(self):
+        # MappingProxyType 不能直接序列化，转换为普通字典并记录冻结状态
+        state = self.__dict__.copy()
+        for key in ('column_styles', 'row_styles', 'cell_styles'):
+            state[key] = dict(state[key])
+        state['_frozen'] = self.is_frozen
+        state['_style_plan'] = None
+        return state
+
+    def __setstate__(self, state):
+        # 反序列化不经过 __post_init__，不会重复校验
+        frozen = state.pop('_frozen', False)
+        self.__dict__.update(state)
+        if frozen:
+            self.freeze()
+
     def get_column_style(self, column_name: str) -> Optional[ColumnStyleConfig]:
         """获取列样式配置"""
         return self.column_styles.get(column_name)
 
+    def get_value_type(self, column_name: str) -> ValueType:
+        """获取列的写入类型（未配置时为AUTO）"""
+        column_style = self.column_styles.get(column_name)
+        return column_style.value_type if column_style else ValueType.AUTO
+
+    @property
+    def needs_number_probe(self) -> bool:
+        """是否有未声明类型的列（需要xlsxwriter的 strings_to_numbers 探测）"""
+        return any(self.get_value_type(name) is ValueType.AUTO for name in self.data_columns)
+
+    def get_style_plan(self) -> 'StylePlan':
+        """获取样式计划（冻结的配置计算一次后缓存，未冻结的配置每次重新计算）"""
+        if self._style_plan is not None:
+            return self._style_plan
+        plan = build_style_plan(self)
+        if self.is_frozen:
+            self._style_plan = plan
+        return plan
+
     def get_row_style(self, row_index: int) -> Optional[RowStyleConfig]:
         """获取行样式配置"""
         return self.row_styles.get(row_index)
@@ -558,7 +723,7 @@ class TableConfig:
         new_config = TableConfig(
             name=new_name if new_name else self.name + "_copy",
             header=self.header,  # HeaderConfig是只读的，直接引用
-            data_columns=self.data_columns.copy(),
+            data_columns=list(self.data_columns),
             column_styles={k: ColumnStyleConfig(**v.__dict__)
                            for k, v in self.column_styles.items()},
             row_styles=self.row_styles.copy(),
@@ -571,6 +736,446 @@ class TableConfig:
         return new_config
 
 
+# ==================== 列数据访问 ====================
+
+# 日期时间列的默认显示格式
+DEFAULT_DATETIME_FORMAT = "yyyy-mm-dd hh:mm:ss"
+
+# Excel日期序列号的起点（1900日期系统，已包含1900年闰年问题的偏移）
+_EXCEL_EPOCH = np.datetime64('1899-12-30T00:00:00', 'ns')
+_NS_PER_DAY = 86_400_000_000_000
+
+
+class ColumnKind(Enum):
+    """列的取值方式"""
+    MISSING = "missing"  # 数据中没有该列
+    VALUES = "values"  # 普通列：Python值列表
+    CATEGORY = "category"  # 分类列：编码数组 + 类别列表
+    DATETIME = "datetime"  # 日期时间列：Excel日期序列号数组
+
+
+def is_categorical(series: pd.Series) -> bool:
+    """是否是分类（字典编码）列"""
+    return isinstance(series.dtype, pd.CategoricalDtype)
+
+
+def to_excel_serial(values: np.ndarray) -> np.ndarray:
+    """将datetime64数组转换为Excel日期序列号（NaT转换为NaN）"""
+    values = values.astype('datetime64[ns]')
+    ns = (values - _EXCEL_EPOCH).astype(np.int64)
+    days, remainder = np.divmod(ns, _NS_PER_DAY)
+    # 与xlsxwriter一致：整数天 + 当天秒数 / 86400
+    serial = days + (remainder / 1e9) / 86400
+    serial[np.isnat(values)] = np.nan
+    return serial
+
+
+def _column_values(series: Optional[pd.Series]) -> Tuple[ColumnKind, Optional[np.ndarray], Optional[list]]:
+    """
+    获取列的取值方式
+    返回: (取值方式, 编码/序列号数组, 类别/值列表)
+    """
+    if series is None:
+        return ColumnKind.MISSING, None, None
+    if is_categorical(series):
+        return ColumnKind.CATEGORY, series.cat.codes.to_numpy(), list(series.cat.categories)
+    if pd.api.types.is_datetime64_any_dtype(series) and getattr(series.dt, 'tz', None) is None:
+        return ColumnKind.DATETIME, to_excel_serial(series.to_numpy()), None
+    return ColumnKind.VALUES, None, series.tolist()
+
+
+_BLANK_CELL = (ValueType.BLANK, '')
+
+# Excel单元格文本的最大长度（超出部分由xlsxwriter截断）
+_XLS_STRMAX = 32767
+
+
+def _typed_value(value, value_type: ValueType) -> Tuple[ValueType, Any]:
+    """
+    按声明的写入类型转换单元格值
+    返回: (实际写入类型, 值)；AUTO列原样返回，由 worksheet.write 判断
+    """
+    if value_type is ValueType.AUTO:
+        return value_type, value
+    if value is None or value is pd.NA or value is pd.NaT or value_type is ValueType.BLANK:
+        return _BLANK_CELL
+    if isinstance(value, str) and value == '':
+        return _BLANK_CELL
+    if isinstance(value, float) and (np.isnan(value) or np.isinf(value)):
+        return _BLANK_CELL
+
+    if value_type is ValueType.STRING:
+        return ValueType.STRING, value if isinstance(value, str) else str(value)
+
+    if value_type is ValueType.NUMBER:
+        if isinstance(value, (bool, np.bool_)):
+            return ValueType.NUMBER, float(value)
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return ValueType.STRING, str(value)
+        if np.isnan(number) or np.isinf(number):
+            return ValueType.STRING, str(value)
+        return ValueType.NUMBER, number
+
+    # DATETIME
+    if isinstance(value, str):
+        try:
+            value = pd.Timestamp(value)
+        except (TypeError, ValueError):
+            return ValueType.STRING, value
+    if isinstance(value, pd.Timestamp):
+        if value is pd.NaT:
+            return _BLANK_CELL
+        if value.tzinfo is not None:
+            value = value.tz_localize(None)
+        value = value.to_pydatetime()
+    if not isinstance(value, (datetime, date)):
+        return ValueType.STRING, str(value)
+    return ValueType.DATETIME, value
+
+
+def _max_text_len(series: pd.Series) -> int:
+    """列数据转为文本后的最大长度（分类列只计算出现过的类别）"""
+    if is_categorical(series):
+        used = series.cat.remove_unused_categories().cat.categories
+        return int(pd.Series(used).astype(str).str.len().max()) if len(used) else 0
+    return series.astype(str).str.len().max()
+
+
+# ==================== 容量规划 ====================
+
+EXCEL_MAX_ROWS = 1_048_576  # 单个sheet的最大行数
+EXCEL_MAX_SHEET_NAME = 31  # sheet名称的最大长度
+ZIP64_LIMIT = (1 << 32) - 1  # 超过4GB的zip需要ZIP64扩展
+
+# 估算sheet XML大小：每个单元格与每行的字节数上限（按实际输出取偏大的值）
+_XML_BYTES_PER_CELL = 40
+_XML_BYTES_PER_ROW = 60
+
+
+@dataclass(frozen=True)
+class SheetPart:
+    """导出时实际写入的一个sheet（超出行数上限的sheet会拆分为多个续表）"""
+    sheet_name: str  # 写入的sheet名称
+    source_name: str  # 对应的原sheet名称
+    start: int  # 数据起始行（含）
+    stop: int  # 数据结束行（不含）
+
+    @property
+    def row_count(self) -> int:
+        return self.stop - self.start
+
+
+@dataclass
+class CapacityPlan:
+    """导出容量规划"""
+    parts: List[SheetPart]
+    estimated_bytes: int  # 各sheet XML未压缩大小之和的估算值
+
+    @property
+    def split_sheets(self) -> List[str]:
+        """被拆分的原sheet名称"""
+        counts = {}
+        for part in self.parts:
+            counts[part.source_name] = counts.get(part.source_name, 0) + 1
+        return [name for name, count in counts.items() if count > 1]
+
+    @property
+    def use_zip64(self) -> bool:
+        """是否需要ZIP64（按未压缩大小估算，偏保守；未超限时zipfile不会写入ZIP64记录）"""
+        return self.estimated_bytes > ZIP64_LIMIT
+
+
+def continuation_sheet_name(sheet_name: str, index: int, used_names: set) -> str:
+    """续表名称：原名称_序号，超出31个字符时截断原名称，与已有名称重复时继续递增序号"""
+    while True:
+        suffix = f"_{index}"
+        name = sheet_name[:EXCEL_MAX_SHEET_NAME - len(suffix)] + suffix
+        if name.lower() not in used_names:
+            return name
+        index += 1
+
+
+# ==================== 输出流 ====================
+
+def _stream_position(stream) -> Optional[int]:
+    """可回退的流返回当前位置，否则返回None"""
+    try:
+        if stream.seekable():
+            return stream.tell()
+    except (AttributeError, OSError, ValueError):
+        pass
+    return None
+
+
+def _rewind_stream(stream, position: Optional[int]) -> bool:
+    """把流回退到写入前的位置并截断，无法回退时返回False"""
+    if position is None:
+        return False
+    try:
+        stream.seek(position)
+        stream.truncate()
+        return True
+    except (AttributeError, OSError, ValueError):
+        return False
+
+
+# ==================== 模板注册表 ====================
+
+class TemplateRegistry:
+    """
+    表格模板注册表
+
+    模板按 (名称, 版本) 只构建一次并冻结，之后所有调用方共享同一个只读 TableConfig。
+    """
+
+    def __init__(self):
+        self._builders: Dict[str, Dict[str, Callable[[], TableConfig]]] = {}
+        self._templates: Dict[Tuple[str, str], TableConfig] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, version: str, builder: Callable[[], TableConfig]):
+        """注册模板构建函数"""
+        self._builders.setdefault(name, {})[version] = builder
+
+    def latest_version(self, name: str) -> str:
+        """获取模板最后注册的版本"""
+        if name not in self._builders:
+            raise ValueError(f"模板 '{name}' 未注册")
+        return list(self._builders[name].keys())[-1]
+
+    def get(self, name: str, version: Optional[str] = None) -> TableConfig:
+        """获取冻结的模板（首次调用时构建）"""
+        version = version or self.latest_version(name)
+        key = (name, version)
+
+        template = self._templates.get(key)
+        if template is not None:
+            return template
+
+        with self._lock:
+            template = self._templates.get(key)
+            if template is None:
+                builder = self._builders.get(name, {}).get(version)
+                if builder is None:
+                    raise ValueError(f"模板 '{name}' 版本 '{version}' 未注册")
+                template = builder().freeze()
+                self._templates[key] = template
+
+        return template
+
+    def clear(self):
+        """清空已构建的模板"""
+        with self._lock:
+            self._templates.clear()
+
+
+# ==================== 样式计划 ====================
+
+# 样式 -> xlsxwriter格式属性 的进程级缓存（格式属性不依赖具体workbook，可跨导出复用）
+_FORMAT_PROPS_CACHE: Dict[str, Dict[str, Any]] = {}
+
+
+def build_format_props(style: CellStyle) -> Dict[str, Any]:
+    """将CellStyle转换为xlsxwriter格式属性"""
+    format_dict = {}
+
+    # 字体
+    if style.font:
+        font_dict = {}
+        if style.font.name:
+            font_dict['font_name'] = style.font.name
+        if style.font.size:
+            font_dict['font_size'] = style.font.size
+        if style.font.color:
+            font_dict['font_color'] = style.font.color
+        if style.font.style == FontStyle.BOLD:
+            font_dict['bold'] = True
+        elif style.font.style == FontStyle.ITALIC:
+            font_dict['italic'] = True
+        elif style.font.style == FontStyle.BOLD_ITALIC:
+            font_dict['bold'] = True
+            font_dict['italic'] = True
+        if style.font.underline:
+            font_dict['underline'] = True
+
+        format_dict.update(font_dict)
+
+    # 填充
+    if style.fill:
+        format_dict['bg_color'] = style.fill.color
+        if style.fill.pattern != 'solid':
+            format_dict['pattern'] = style.fill.pattern
+
+    # 对齐
+    format_dict['align'] = style.horizontal.value
+    format_dict['valign'] = style.vertical.value
+
+    # 文本控制
+    format_dict['text_wrap'] = style.wrap_text
+    format_dict['shrink'] = style.shrink_to_fit
+
+    # 旋转
+    if style.rotation:
+        format_dict['rotation'] = style.rotation
+
+    # 缩进
+    if style.indent:
+        format_dict['indent'] = style.indent
+
+    # 数字格式
+    if style.num_format != "General":
+        format_dict['num_format'] = style.num_format
+
+    # 边框
+    if style.border:
+        border_props = {}
+        if style.border.left:
+            border_props['left'] = style.border.left.style.value
+            border_props['left_color'] = style.border.left.color
+        if style.border.right:
+            border_props['right'] = style.border.right.style.value
+            border_props['right_color'] = style.border.right.color
+        if style.border.top:
+            border_props['top'] = style.border.top.style.value
+            border_props['top_color'] = style.border.top.color
+        if style.border.bottom:
+            border_props['bottom'] = style.border.bottom.style.value
+            border_props['bottom_color'] = style.border.bottom.color
+
+        format_dict.update(border_props)
+
+    return format_dict
+
+
+def format_props(style: CellStyle, style_key: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    """样式 -> (样式键, xlsxwriter格式属性)，格式属性进程内共享"""
+    if style_key is None:
+        style_key = style_cache_key(style)
+    props = _FORMAT_PROPS_CACHE.get(style_key)
+    if props is None:
+        props = build_format_props(style)
+        _FORMAT_PROPS_CACHE[style_key] = props
+    return style_key, props
+
+
+@dataclass(frozen=True)
+class StylePlan:
+    """
+    样式计划：表格配置中各列、行、单元格样式解析为样式键，以及样式键对应的格式属性
+    与具体workbook无关，冻结的表格配置上缓存一份，重复导出时复用
+    """
+    props: Mapping[str, Dict[str, Any]]  # 样式键 -> 格式属性
+    column_keys: Tuple[Optional[str], ...]  # 按 data_columns 顺序的列默认样式
+    datetime_keys: Tuple[Optional[str], ...]  # 按 data_columns 顺序的日期时间单元格样式（列样式 + 数字格式）
+    row_keys: Mapping[int, str]  # 行索引 -> 整行样式
+    cell_keys: Mapping[Tuple[int, int], str]  # (行索引, 列索引) -> 单元格样式
+    # (行/单元格样式键, 列索引) -> 该样式用于日期时间单元格时的样式（未指定数字格式时补上列的日期时间格式）
+    datetime_style_keys: Mapping[Tuple[str, int], str]
+
+
+def build_style_plan(config: 'TableConfig') -> StylePlan:
+    """解析表格配置的全部样式"""
+    props = {}
+
+    def resolve(style: Optional[CellStyle]) -> Optional[str]:
+        if style is None:
+            return None
+        key, style_props = format_props(style)
+        props[key] = style_props
+        return key
+
+    column_keys, datetime_keys, datetime_num_formats = [], [], []
+    for column_name in config.data_columns:
+        column_style = config.get_column_style(column_name)
+        base_style = column_style.default_style if column_style else None
+        column_keys.append(resolve(base_style))
+        num_format = (column_style.num_format if column_style else None) or DEFAULT_DATETIME_FORMAT
+        datetime_num_formats.append(num_format)
+        datetime_keys.append(resolve(replace(base_style or CellStyle(), num_format=num_format)))
+
+    # 行/单元格样式整体替换列样式，但日期时间单元格仍需要数字格式，否则只显示序列号
+    row_keys, cell_keys, override_styles = {}, {}, {}
+    for index, row in config.row_styles.items():
+        if row.style:
+            row_keys[index] = resolve(row.style)
+            override_styles[row_keys[index]] = row.style
+    for position, cell in config.cell_styles.items():
+        if cell.style:
+            cell_keys[position] = resolve(cell.style)
+            override_styles[cell_keys[position]] = cell.style
+
+    datetime_style_keys = {}
+    for style_key, style in override_styles.items():
+        for col_idx, num_format in enumerate(datetime_num_formats):
+            # 样式自身指定了数字格式时保留
+            datetime_style_keys[style_key, col_idx] = (
+                style_key if style.num_format != CellStyle.num_format
+                else resolve(replace(style, num_format=num_format)))
+
+    return StylePlan(
+        props=MappingProxyType(props),
+        column_keys=tuple(column_keys),
+        datetime_keys=tuple(datetime_keys),
+        row_keys=MappingProxyType(row_keys),
+        cell_keys=MappingProxyType(cell_keys),
+        datetime_style_keys=MappingProxyType(datetime_style_keys)
+    )
+
+
+class FormatRegistry:
+    """单个workbook的格式对象注册表（样式键 -> Format），每次导出新建，不跨workbook复用"""
+
+    def __init__(self, workbook: Workbook):
+        self.workbook = workbook
+        self._formats: Dict[str, xlsxwriter.format.Format] = {}
+        # Format对象 -> (样式键, 格式属性)，用于记录已渲染sheet引用的格式
+        self._keys: Dict[int, Tuple[str, Dict[str, Any]]] = {}
+
+    def get(self, style_key: str, props: Dict[str, Any]) -> xlsxwriter.format.Format:
+        """获取样式键对应的格式，首次使用时在workbook中创建"""
+        cell_format = self._formats.get(style_key)
+        if cell_format is None:
+            try:
+                cell_format = self.workbook.add_format(dict(props))
+            except Exception as e:
+                print(f"创建单元格格式时出错: {e}")
+                # 返回默认格式
+                return self.workbook.add_format()
+            self._formats[style_key] = cell_format
+            self._keys[id(cell_format)] = (style_key, props)
+        return cell_format
+
+    def describe(self, cell_format: xlsxwriter.format.Format) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """格式对应的 (样式键, 格式属性)，不是通过本注册表创建的格式返回None"""
+        return self._keys.get(id(cell_format))
+
+
+# 类别尚未登记到共享字符串表（导出数据未引用该类别）
+_UNREGISTERED = -1
+
+
+def _used_codes(codes: np.ndarray, size: int) -> np.ndarray:
+    """分类编码中出现过的类别（升序，不含缺失值-1）"""
+    return np.flatnonzero(np.bincount(codes.astype(np.intp) + 1, minlength=size + 1)[1:])
+
+
+def _register_shared_string(str_table, text: str) -> int:
+    """在共享字符串表中登记字符串并返回序号（只登记，引用次数count在写入单元格时累加）"""
+    index = str_table.string_table.get(text)
+    if index is None:
+        index = str_table.unique_count
+        str_table.string_table[text] = index
+        str_table.unique_count += 1
+    return index
+
+
+# 渲染时记录在worksheet上、生成workbook级部件（定义名称等）时需要的属性，复用缓存的sheet时恢复
+_SHEET_PART_ATTRS = ('autofilter_area', 'print_area_range', 'repeat_col_range', 'repeat_row_range',
+                     'has_dynamic_arrays')
+
+
 # ==================== 多Sheet Excel表格类 ====================
 
 @dataclass
@@ -580,9 +1185,24 @@ class MultiSheetExcelTable:
     title: str  # 表格主标题
     sheet_configs: Dict[str, TableConfig]  # sheet名称 -> 表格配置
     sheet_data: Dict[str, pd.DataFrame]  # sheet名称 -> 数据
-
-    # 样式缓存
-    _style_cache: Dict[str, xlsxwriter.format.Format] = field(default_factory=dict, repr=False)
+    seed_shared_strings: bool = True  # 预置共享字符串表，文本分类列按序号整列写入
+    constant_memory: bool = False  # 流式写入：逐行落盘，内存占用与数据量无关（不使用共享字符串）
+    pipelined: bool = True  # 流水线导出：sheet写完即渲染并在后台线程压缩（流式写入时不生效）
+    compression_level: Optional[int] = None  # zip压缩级别：None 为默认，0 只存储不压缩，1~9 为deflate级别
+    compress_workers: int = 1  # 流水线导出时并行压缩sheet的线程数
+    scratch_dir: Optional[str] = None  # 导出临时文件目录（如tmpfs、本地SSD），为空时使用目标文件所在目录
+    # 已渲染sheet缓存：数据与配置未变的sheet直接使用上次渲染的XML（需流水线导出，流式写入时不生效）
+    part_cache: Optional[SheetPartCache] = field(default=None, repr=False)
+
+    # 当前workbook的格式注册表（每次导出新建）
+    _formats: Optional[FormatRegistry] = field(default=None, repr=False)
+    # 未冻结配置的样式计划（每次导出重建；冻结的配置缓存在配置自身上，跨导出复用）
+    _style_plans: Dict[int, StylePlan] = field(default_factory=dict, repr=False)
+    # 共享字符串缓存：类别表 -> 各类别在当前workbook共享字符串表中的序号（只登记导出数据引用的类别，每次导出重建）
+    _shared_strings: Dict[Any, List[Optional[int]]] = field(default_factory=dict, repr=False)
+    # 计算sheet缓存键用：配置摘要、类别表逐项哈希（每次导出重建）
+    _config_digests: Dict[int, str] = field(default_factory=dict, repr=False)
+    _category_hashes: Dict[int, Any] = field(default_factory=dict, repr=False)
 
     # 元数据
     metadata: Dict[str, Any] = field(default_factory=lambda: {
@@ -628,9 +1248,12 @@ class MultiSheetExcelTable:
         sheet_configs = {}
         sheet_data = {}
 
+        # 所有sheet引用同一份冻结配置，仅在某个sheet单独修改样式时才复制（写时复制）
+        if not shared_config.is_frozen:
+            shared_config = shared_config.copy(shared_config.name).freeze()
+
         for sheet_name in sheet_names:
-            # 复制配置给每个sheet（保持独立）
-            sheet_configs[sheet_name] = shared_config.copy(sheet_name)
+            sheet_configs[sheet_name] = shared_config
 
             # 设置数据
             if data_dict and sheet_name in data_dict:
@@ -708,39 +1331,51 @@ class MultiSheetExcelTable:
 
     # ========== 样式设置方法 ==========
 
-    def set_sheet_column_style(self, sheet_name: str, column_name: str,
-                               style: CellStyle, width: Optional[int] = None):
-        """设置指定sheet的列样式"""
+    def _writable_sheet_config(self, sheet_name: str) -> TableConfig:
+        """获取可修改的sheet配置，共享（冻结）的配置在首次修改时复制"""
         if sheet_name not in self.sheet_configs:
             raise ValueError(f"Sheet '{sheet_name}' 不存在")
 
         config = self.sheet_configs[sheet_name]
-        column_style = config.column_styles.get(column_name, ColumnStyleConfig(column_name))
-        column_style.default_style = style
-        if width is not None:
-            column_style.width = width
-        config.column_styles[column_name] = column_style
+        if config.is_frozen:
+            config = config.copy(sheet_name)
+            self.sheet_configs[sheet_name] = config
+        return config
+
+    @staticmethod
+    def _set_column_style(config: TableConfig, column_name: str,
+                          style: CellStyle, width: Optional[int] = None):
+        """设置配置中的列样式（新建样式对象，不修改可能被共享的旧对象）"""
+        column_style = config.column_styles.get(column_name)
+        if column_style is None:
+            column_style = ColumnStyleConfig(column_name)
+        config.column_styles[column_name] = replace(
+            column_style,
+            default_style=style,
+            width=width if width is not None else column_style.width
+        )
+
+    def set_sheet_column_style(self, sheet_name: str, column_name: str,
+                               style: CellStyle, width: Optional[int] = None):
+        """设置指定sheet的列样式"""
+        config = self._writable_sheet_config(sheet_name)
+        self._set_column_style(config, column_name, style, width)
 
     def set_sheet_row_style(self, sheet_name: str, row_index: int,
                             style: CellStyle, height: Optional[int] = None):
         """设置指定sheet的行样式"""
-        if sheet_name not in self.sheet_configs:
-            raise ValueError(f"Sheet '{sheet_name}' 不存在")
-
-        config = self.sheet_configs[sheet_name]
-        row_style = config.row_styles.get(row_index, RowStyleConfig(row_index))
-        row_style.style = style
-        if height is not None:
-            row_style.height = height
-        config.row_styles[row_index] = row_style
+        config = self._writable_sheet_config(sheet_name)
+        row_style = config.row_styles.get(row_index)
+        config.row_styles[row_index] = RowStyleConfig(
+            row_index=row_index,
+            style=style,
+            height=height if height is not None else (row_style.height if row_style else None)
+        )
 
     def set_sheet_cell_style(self, sheet_name: str, row_index: int,
                              col_index: int, style: CellStyle):
         """设置指定sheet的单元格样式"""
-        if sheet_name not in self.sheet_configs:
-            raise ValueError(f"Sheet '{sheet_name}' 不存在")
-
-        config = self.sheet_configs[sheet_name]
+        config = self._writable_sheet_config(sheet_name)
         config.cell_styles[(row_index, col_index)] = CellStyleConfig(
             row_index=row_index,
             col_index=col_index,
@@ -749,9 +1384,20 @@ class MultiSheetExcelTable:
 
     def set_column_style_for_all_sheets(self, column_name: str,
                                         style: CellStyle, width: Optional[int] = None):
-        """为所有sheet设置相同列的样式"""
-        for sheet_name in self.sheet_configs.keys():
-            self.set_sheet_column_style(sheet_name, column_name, style, width)
+        """为所有sheet设置相同列的样式（共享同一配置的sheet只复制一次，修改后继续共享）"""
+        replaced: Dict[int, TableConfig] = {}
+        for sheet_name, config in list(self.sheet_configs.items()):
+            if not config.is_frozen:
+                self._set_column_style(config, column_name, style, width)
+                continue
+
+            new_config = replaced.get(id(config))
+            if new_config is None:
+                new_config = config.copy(config.name)
+                self._set_column_style(new_config, column_name, style, width)
+                new_config.freeze()
+                replaced[id(config)] = new_config
+            self.sheet_configs[sheet_name] = new_config
 
     # ========== 数据操作方法 ==========
 
@@ -778,47 +1424,90 @@ class MultiSheetExcelTable:
     # ========== Excel输出方法 ==========
 
     @progress_callback_decorator
-    def to_excel(self, output_path: str, include_index_sheet: bool = True,
+    def to_excel(self, output_path: Union[str, BinaryIO], include_index_sheet: bool = True,
                  progress_callback: Optional[Callable[[int, str], None]] = None,
                  progress_manager: Optional[ProgressManager] = None):
         """
         写入Excel文件，支持多个sheet，带进度回调
 
         Args:
-            output_path: 输出文件路径
+            output_path: 输出文件路径，或可写的二进制流（如BytesIO、HTTP响应）
             include_index_sheet: 是否包含目录页
             progress_callback: 进度回调函数 (progress: int, status: str) -> None
             progress_manager: 进度管理器（通过装饰器自动传递）
+
+        Returns:
+            成功时返回 output_path（路径或流本身），取消或失败时返回None
+            写入流时取消不会向流写入任何数据
         """
+        to_stream = not isinstance(output_path, (str, os.PathLike))
+        stream_start = _stream_position(output_path) if to_stream else None
+        atomic_output = None
         try:
             # 确保输出目录存在
-            output_dir = os.path.dirname(output_path)
+            output_dir = None if to_stream else os.path.dirname(output_path)
             if output_dir and not os.path.exists(output_dir):
                 os.makedirs(output_dir, exist_ok=True)
 
+            # 写入前先做容量规划：超出行数上限的sheet拆分为续表，输出过大时启用ZIP64
+            plan = self.plan_capacity()
+
             # 通知开始导出
             if progress_manager:
-                progress_manager.start_export(len(self.sheet_configs))
+                progress_manager.start_export(len(plan.parts))
                 if progress_manager.is_cancelled:
                     print("导出已取消")
                     return None
 
-            # 创建Excel写入器，启用 nan_inf_to_errors 选项
-            with pd.ExcelWriter(
-                    output_path,
-                    engine='xlsxwriter',
-                    engine_kwargs={'options': {
+            # 先写入临时文件，完成后再原子替换目标文件，目标位置不会出现写了一半的文件
+            if not to_stream:
+                atomic_output = AtomicOutputFile(output_path, self.scratch_dir)
+
+            # 创建workbook，启用 nan_inf_to_errors 选项
+            # 流水线模式下每个sheet写完即渲染XML并在后台线程压缩，与后续sheet的写入重叠
+            with ExportWorkbook(
+                    output_path if to_stream else atomic_output.temp_path,
+                    {
                         'nan_inf_to_errors': True,  # 关键：处理NaN/INF值
                         'remove_timezone': True,
-                        'strings_to_numbers': True,
+                        # 所有列都声明了写入类型时关闭逐单元格的数字探测
+                        'strings_to_numbers': any(
+                            config.needs_number_probe for config in self.sheet_configs.values()),
                         'strings_to_formulas': False,
-                        'strings_to_urls': False
-                    }}
-            ) as writer:
-                workbook = writer.book
+                        'strings_to_urls': False,
+                        'use_zip64': plan.use_zip64,
+                        'constant_memory': self.constant_memory,
+                        # 写入流时各部件也在内存中组装，不经过临时文件
+                        'in_memory': to_stream and not self.constant_memory
+                    },
+                    pipelined=self.pipelined,
+                    compress_workers=self.compress_workers,
+                    compression_level=self.compression_level
+            ) as workbook:
+
+                # 格式对象只属于本次导出的workbook；样式计划与workbook无关，冻结的配置跨导出复用
+                self._formats = FormatRegistry(workbook)
+                self._style_plans = {}
+
+                # 已渲染sheet缓存：未变化的sheet直接使用缓存的XML，新渲染的sheet在导出完成后加入缓存
+                use_part_cache = self.part_cache is not None and self.pipelined and not self.constant_memory
+                self._config_digests = {}
+                self._category_hashes = {}
+                part_keys = [self._sheet_part_key(workbook, index, self.sheet_configs[part.source_name], part)
+                             for index, part in enumerate(plan.parts)] if use_part_cache else []
+
+                # 预先把所有文本分类列引用的类别写入共享字符串表，写单元格时只需复制序号
+                self._shared_strings = {}
+                if self.seed_shared_strings and not self.constant_memory:
+                    self._seed_shared_strings(workbook, self._cached_shared_strings(part_keys))
+                rendered_parts = []
+                reused_count = 0
 
                 # 为每个sheet写入数据
-                for sheet_index, (sheet_name, config) in enumerate(self.sheet_configs.items(), 1):
+                source_name, source_data = None, None
+                for sheet_index, part in enumerate(plan.parts, 1):
+                    sheet_name = part.sheet_name
+                    config = self.sheet_configs[part.source_name]
 
                     # 通知开始处理当前sheet
                     if progress_manager:
@@ -829,25 +1518,45 @@ class MultiSheetExcelTable:
                             print("导出已取消")
                             break
 
-                    data = self.sheet_data.get(sheet_name)
+                    # 同一个原sheet的续表共用一次预处理结果
+                    if part.source_name != source_name:
+                        source_name = part.source_name
+                        data = self.sheet_data.get(source_name)
 
-                    if data is None or data.empty:
-                        # 如果数据为空，创建空DataFrame
-                        data = pd.DataFrame(columns=config.data_columns)
+                        if data is None or data.empty:
+                            # 如果数据为空，创建空DataFrame
+                            data = pd.DataFrame(columns=config.data_columns)
+                        else:
+                            # 预处理数据，确保没有NaN/INF
+                            if progress_manager:
+                                progress_manager.update_sheet_progress(5, "预处理数据...")
+                            data = self._preprocess_data(data)
+                        source_data = data
+
+                    if part.start == 0 and part.stop == len(source_data):
+                        data = source_data
                     else:
-                        # 预处理数据，确保没有NaN/INF
-                        if progress_manager:
-                            progress_manager.update_sheet_progress(5, "预处理数据...")
-                        data = self._preprocess_data(data.copy())
+                        data = source_data.iloc[part.start:part.stop]
 
                     # 创建worksheet
                     worksheet = workbook.add_worksheet(sheet_name)
 
+                    part_key = None
+                    sst_count = workbook.str_table.count
+                    if use_part_cache:
+                        # 出错时补建的空sheet会使后续sheet的序号后移，此时重新计算缓存键
+                        part_key = (part_keys[sheet_index - 1] if worksheet.index == sheet_index - 1
+                                    else self._sheet_part_key(workbook, worksheet.index, config, part))
+                        if self._reuse_sheet_part(workbook, worksheet, part_key):
+                            reused_count += 1
+                            continue
+
                     # 应用样式并写入数据，传递进度管理器
                     try:
                         self._apply_sheet_styles(
                             workbook, worksheet, config, data,
-                            progress_manager=progress_manager
+                            progress_manager=progress_manager,
+                            row_offset=part.start
                         )
                     except Exception as e:
                         print(f"应用样式到sheet '{sheet_name}' 时出错: {e}")
@@ -859,15 +1568,20 @@ class MultiSheetExcelTable:
                             progress_manager=progress_manager
                         )
 
-                    # 保存worksheet引用到writer中
-                    writer.sheets[sheet_name] = worksheet
+                    # sheet已写完，提前渲染并提交后台压缩（渲染会清空单元格表，先记录引用）
+                    refs = self._sheet_refs(worksheet) if part_key is not None else None
+                    if workbook.finish_worksheet(worksheet) and refs is not None:
+                        # 共享字符串引用次数按xlsxwriter的累计方式记录（合并单元格会重复计数）
+                        rendered_parts.append((part_key, worksheet, workbook.str_table.count - sst_count, refs))
 
-                # 如果被取消，删除文件
+                # 如果被取消，放弃写入并删除临时文件（目标文件保持不变）
                 if progress_manager and progress_manager.is_cancelled:
-                    writer.close()
-                    if os.path.exists(output_path):
-                        os.remove(output_path)
-                    print("导出已取消，文件已删除")
+                    workbook.discard()
+                    if to_stream:
+                        print("导出已取消，未写入输出流")
+                    else:
+                        atomic_output.discard()
+                        print("导出已取消，临时文件已删除")
                     return None
 
                 # 添加目录页（可选）
@@ -875,29 +1589,291 @@ class MultiSheetExcelTable:
                     try:
                         if progress_manager:
                             progress_manager.update(95, "创建目录页...")
-                        self._add_index_sheet(workbook)
+                        self._add_index_sheet(workbook, plan.parts)
                     except Exception as e:
                         print(f"创建目录页时出错: {e}")
 
-            print(f"✅ 文件已保存: {output_path}")
+            if use_part_cache:
+                self._store_sheet_parts(workbook, rendered_parts)
+                print(f"[INFO] 已渲染sheet缓存：复用 {reused_count} 个，重新渲染 {len(plan.parts) - reused_count} 个")
+
+            if atomic_output is not None:
+                atomic_output.commit()
+
+            print(f"✅ 文件已保存: {output_path}" if not to_stream else "✅ 已写入输出流")
             return output_path
 
         except Exception as e:
             print(f"❌ 保存文件失败: {e}")
+            if atomic_output is not None:
+                atomic_output.discard()
+            if to_stream and not _rewind_stream(output_path, stream_start):
+                # 流中可能已有部分数据且无法回退，不能再用备用方式写入
+                return None
             # 尝试使用更简单的保存方式
-            return self._fallback_save(output_path, progress_manager)
+            return self._fallback_save(output_path, progress_manager, stream_start)
+
+    def to_bytes(self, include_index_sheet: bool = True,
+                 progress_callback: Optional[Callable[[int, str], None]] = None) -> Optional[bytes]:
+        """导出为xlsx文件内容（不经过磁盘），取消或失败时返回None"""
+        buffer = BytesIO()
+        if self.to_excel(buffer, include_index_sheet, progress_callback) is None:
+            return None
+        return buffer.getvalue()
+
+    def plan_capacity(self, max_rows: int = EXCEL_MAX_ROWS) -> CapacityPlan:
+        """
+        导出前的容量规划：
+        数据行数加表头行数超过单个sheet上限时拆分为“名称_1”、“名称_2”…续表，并估算输出大小
+        """
+        parts = []
+        estimated_bytes = 0
+        used_names = {name.lower() for name in self.sheet_configs}
+
+        for sheet_name, config in self.sheet_configs.items():
+            data = self.sheet_data.get(sheet_name)
+            row_count = 0 if data is None else len(data)
+            col_count = len(config.data_columns)
+            estimated_bytes += (row_count + config.header.row_count) * (
+                    _XML_BYTES_PER_ROW + col_count * _XML_BYTES_PER_CELL)
+
+            rows_per_sheet = max_rows - config.header.row_count
+            if row_count <= rows_per_sheet:
+                parts.append(SheetPart(sheet_name, sheet_name, 0, row_count))
+                continue
+
+            # 续表与原表使用相同的表头，每个续表最多写入 rows_per_sheet 行数据
+            part_count = -(-row_count // rows_per_sheet)
+            print(f"[WARN] Sheet '{sheet_name}' 共 {row_count} 行，超出单个sheet上限，拆分为 {part_count} 个sheet")
+            used_names.discard(sheet_name.lower())
+            for index in range(part_count):
+                part_name = continuation_sheet_name(sheet_name, index + 1, used_names)
+                used_names.add(part_name.lower())
+                start = index * rows_per_sheet
+                parts.append(SheetPart(part_name, sheet_name, start, min(start + rows_per_sheet, row_count)))
+
+        return CapacityPlan(parts=parts, estimated_bytes=estimated_bytes)
+
+    def _seed_shared_strings(self, workbook: Workbook, pinned: Dict[int, str]):
+        """
+        收集各sheet中声明为文本的分类列，只把导出数据实际引用的类别写入共享字符串表
+        （类别表中残留的旧类别，如已删除的账号、资源池，不写入；分片导出时各分片共用同一类别表，
+        每个分片也只登记本分片引用的类别，如本分片的时间段）
+        pinned 为将要复用的已缓存sheet引用的字符串（序号 -> 字符串），先按原序号登记，空出的序号由其余字符串依次填补
+        """
+        texts = {}
+        # 表头文本先登记：类别表在末尾追加类别时，已登记字符串的序号不变（已渲染sheet缓存仍可使用）
+        # 需要数字探测时表头文本可能写为数字，不预先登记
+        if not workbook.strings_to_numbers:
+            seen_configs = set()
+            for config in self.sheet_configs.values():
+                if id(config) in seen_configs:
+                    continue
+                seen_configs.add(id(config))
+                for cell in config.header.get_header_plan().cells:
+                    if isinstance(cell.text, str) and cell.text:
+                        texts[cell.text[:_XLS_STRMAX]] = None
+
+        codes_by_dtype: Dict[Any, List[np.ndarray]] = {}
+        for sheet_name, config in self.sheet_configs.items():
+            data = self.sheet_data.get(sheet_name)
+            if data is None or data.empty:
+                continue
+            for column_name in config.data_columns:
+                if column_name not in data.columns or config.get_value_type(column_name) is not ValueType.STRING:
+                    continue
+                series = data[column_name]
+                if is_categorical(series):
+                    codes_by_dtype.setdefault(series.dtype, []).append(series.array.codes)
+
+        # 按类别顺序登记：类别表在末尾追加类别时，已引用类别的序号不变
+        used_codes = {dtype: _used_codes(np.concatenate(codes_list), len(dtype.categories))
+                      for dtype, codes_list in codes_by_dtype.items()}
+        for dtype, codes in used_codes.items():
+            categories = dtype.categories
+            for code in codes.tolist():
+                value_type, text = _typed_value(categories[code], ValueType.STRING)
+                if value_type is ValueType.STRING:
+                    texts[text[:_XLS_STRMAX]] = None
+
+        str_table = workbook.str_table
+        if pinned:
+            fillers = self._shared_string_fillers(texts, used_codes, set(pinned.values()))
+            for index in range(max(pinned) + 1):
+                text = pinned.get(index)
+                if text is None:
+                    text = next(fillers, None)
+                # 无法保持的序号在复用对应sheet时检查出来，改为重新渲染
+                if text is None or _register_shared_string(str_table, text) != index:
+                    break
+
+        for text in texts:
+            _register_shared_string(str_table, text)
+        for dtype, codes in used_codes.items():
+            self._shared_string_indices(workbook, dtype, codes)
+
+    @staticmethod
+    def _shared_string_fillers(texts: Dict[str, None], used_codes: Dict[Any, np.ndarray],
+                               pinned_texts: set) -> Iterator[str]:
+        """
+        填补缓存序号之间空位的字符串：先用本次需要登记的字符串，不够时才用类别表中未引用的类别
+        （只有复用已缓存sheet需要保持序号时，才会写入未引用的类别）
+        """
+        seen = set(pinned_texts)
+        for text in texts:
+            if text not in seen:
+                seen.add(text)
+                yield text
+        for dtype, codes in used_codes.items():
+            unused = np.ones(len(dtype.categories), dtype=bool)
+            unused[codes] = False
+            for category in dtype.categories[unused]:
+                value_type, text = _typed_value(category, ValueType.STRING)
+                if value_type is ValueType.STRING and text[:_XLS_STRMAX] not in seen:
+                    seen.add(text[:_XLS_STRMAX])
+                    yield text[:_XLS_STRMAX]
+
+    def _cached_shared_strings(self, part_keys: List[str]) -> Dict[int, str]:
+        """将要复用的已缓存sheet引用的共享字符串：序号 -> 字符串"""
+        pinned = {}
+        for part_key in part_keys:
+            entry = self.part_cache.get(part_key)
+            if entry is not None:
+                for index, text in entry.strings:
+                    pinned.setdefault(index, text)
+        return pinned
+
+    def _shared_string_indices(self, workbook: Workbook, dtype: pd.CategoricalDtype,
+                               codes: np.ndarray) -> List[Optional[int]]:
+        """
+        获取类别表中各类别的共享字符串序号（空值为None）
+        只登记 codes 引用到的类别（其余为 _UNREGISTERED），同一个类别表（各sheet共享的dtype）的序号跨sheet复用
+        """
+        indices = self._shared_strings.get(dtype)
+        if indices is None:
+            indices = self._shared_strings[dtype] = [_UNREGISTERED] * len(dtype.categories)
+
+        str_table = workbook.str_table
+        categories = dtype.categories
+        for code in _used_codes(codes, len(indices)).tolist():
+            if indices[code] != _UNREGISTERED:
+                continue
+            value_type, text = _typed_value(categories[code], ValueType.STRING)
+            indices[code] = (_register_shared_string(str_table, text[:_XLS_STRMAX])
+                             if value_type is ValueType.STRING else None)
+        return indices
+
+    def _sheet_part_key(self, workbook: Workbook, sheet_index: int, config: TableConfig, part: SheetPart) -> str:
+        """已渲染sheet的缓存键：数据、配置、选中状态以及影响写入结果的workbook选项"""
+        config_digest = self._config_digests.get(id(config))
+        if config_digest is None:
+            # 配置是只含基本类型的数据类，repr 完整反映全部设置
+            config_digest = hashlib.sha256(repr(config).encode('utf-8')).hexdigest()
+            self._config_digests[id(config)] = config_digest
+
+        digest = hashlib.sha256(json.dumps({
+            "xlsxwriter": xlsxwriter.__version__,
+            "config": config_digest,
+            "row_offset": part.start,
+            "selected": workbook.worksheet_meta.activesheet == 0 and sheet_index == 0,
+            "active": sheet_index == workbook.worksheet_meta.activesheet,
+            "options": [workbook.strings_to_numbers, workbook.nan_inf_to_errors, workbook.remove_timezone,
+                        workbook.date_1904],
+            "compression_level": self.compression_level,
+        }, sort_keys=True).encode('utf-8'))
+
+        data = self.sheet_data.get(part.source_name)
+        if data is None:
+            data = pd.DataFrame(columns=config.data_columns)
+        elif part.start != 0 or part.stop != len(data):
+            data = data.iloc[part.start:part.stop]
+        update_frame_digest(digest, data, self._category_hashes)
+        return digest.hexdigest()
+
+    def _reuse_sheet_part(self, workbook: Workbook, worksheet: Worksheet, part_key: str) -> bool:
+        """
+        使用缓存的已渲染sheet：按原序号顺序登记其共享字符串和格式，
+        全部得到相同的序号时直接使用缓存的XML，否则返回False重新渲染
+        """
+        entry = self.part_cache.get(part_key)
+        if entry is None or not workbook.can_prerender(worksheet):
+            return False
+
+        str_table = workbook.str_table
+        for old_index, text in entry.strings:
+            if _register_shared_string(str_table, text) != old_index:
+                return False
+
+        registry = self._format_registry(workbook)
+        for style_key, props, old_index in entry.formats:
+            if registry.get(style_key, props)._get_xf_index() != old_index:
+                return False
+
+        str_table.count += entry.string_count
+        for name, value in entry.attrs.items():
+            setattr(worksheet, name, value)
+        return workbook.add_prerendered(worksheet, entry.part)
+
+    @staticmethod
+    def _sheet_refs(worksheet: Worksheet) -> Optional[Tuple[set, list]]:
+        """
+        渲染前记录sheet引用的共享字符串序号和格式对象
+        含富文本、超链接或条件格式（另有workbook级编号）的sheet不缓存，返回None
+        """
+        if worksheet.hyperlinks or worksheet.cond_formats:
+            return None
+
+        # 整列写入的单元格共用同一个元组，先去重再逐个检查
+        cells = set()
+        for row in worksheet.table.values():
+            cells.update(row.values())
+
+        strings, formats = set(), {}
+        for cell in cells:
+            cell_type = type(cell)
+            if cell_type is CellStringTuple:
+                strings.add(cell.string)
+            elif cell_type is CellRichStringTuple:
+                return None
+            formats[id(cell.format)] = cell.format
+        for options in list(worksheet.set_rows.values()) + list(worksheet.col_info.values()):
+            formats[id(options[1])] = options[1]
+        formats.pop(id(None), None)
+        return strings, list(formats.values())
+
+    def _store_sheet_parts(self, workbook: Workbook, rendered_parts: List[Tuple[str, Worksheet, int, Tuple[set, list]]]):
+        """导出完成后把新渲染的sheet加入缓存（格式序号在渲染时才分配）"""
+        registry = self._format_registry(workbook)
+        sst = workbook.str_table.string_array  # close() 时已按序号排列
+        for part_key, worksheet, string_count, (strings, formats) in rendered_parts:
+            part = workbook.sheet_part(worksheet)
+            described = [registry.describe(cell_format) for cell_format in formats]
+            if part is None or None in described:
+                continue
+            format_refs = sorted(((style_key, props, cell_format._get_xf_index())
+                                  for (style_key, props), cell_format in zip(described, formats)),
+                                 key=lambda ref: ref[2])
+            self.part_cache.put(part_key, SheetPartEntry(
+                part=part,
+                strings=tuple((index, sst[index]) for index in sorted(strings)),
+                string_count=string_count,
+                formats=tuple(format_refs),
+                attrs={name: getattr(worksheet, name) for name in _SHEET_PART_ATTRS}
+            ))
 
     def _preprocess_data(self, data: pd.DataFrame) -> pd.DataFrame:
-        """预处理数据，处理NaN和INF值"""
+        """预处理数据，处理NaN和INF值（仅在需要修改时复制，不修改原数据）"""
         if data.empty:
             return data
 
-        # 复制数据以避免修改原数据
-        processed_data = data.copy()
+        processed_data = data
 
-        for column in processed_data.columns:
-            # 检查是否是数值列
-            if pd.api.types.is_numeric_dtype(processed_data[column]):
+        for column in data.columns:
+            # 检查是否是数值列（分类列等非数值列无需处理）
+            if pd.api.types.is_numeric_dtype(data[column]):
+                if processed_data is data:
+                    # 复制数据以避免修改原数据
+                    processed_data = data.copy()
                 try:
                     # 处理INF值
                     mask_inf = np.isinf(processed_data[column])
@@ -921,9 +1897,10 @@ class MultiSheetExcelTable:
             worksheet: Worksheet,
             config: TableConfig,
             data: pd.DataFrame,
-            progress_manager: Optional[ProgressManager] = None
+            progress_manager: Optional[ProgressManager] = None,
+            row_offset: int = 0
     ):
-        """应用单个sheet的样式"""
+        """应用单个sheet的样式（row_offset 为续表第一行在原数据中的行号）"""
         # 应用表格设置
         self._apply_table_settings(worksheet, config)
 
@@ -937,7 +1914,7 @@ class MultiSheetExcelTable:
             progress_manager.update_sheet_progress(30, "写入表头...")
 
         # 写入数据
-        self._write_data_safe(workbook, worksheet, config, data, progress_manager)
+        self._write_data_safe(workbook, worksheet, config, data, progress_manager, row_offset)
 
         if progress_manager:
             progress_manager.update_sheet_progress(95, "完成当前sheet...")
@@ -965,42 +1942,28 @@ class MultiSheetExcelTable:
             config: TableConfig
     ):
         """写入多行表头"""
-        global cell_format
-        header_config = config.header
-        grid = header_config.get_header_grid()
+        plan = config.header.get_header_plan()
 
-        # 写入表头内容并应用样式
-        for row_idx in range(header_config.row_count):
-            worksheet.set_row(row_idx, config.header.rows[row_idx].height)
+        for row_idx, height in enumerate(plan.row_heights):
+            worksheet.set_row(row_idx, height)
 
-            for col_idx in range(header_config.col_count):
-                cell_info = grid[row_idx][col_idx]
-                if cell_info:
-                    item, start_row, start_col = cell_info
-
-                    # 如果是跨行跨列单元格的起始位置，写入内容
-                    if row_idx == start_row and col_idx == start_col:
-                        # 获取样式（优先使用单项样式，其次整体样式）
-                        style = item.style or header_config.overall_style
-
-                        # 写入单元格
-                        if style:
-                            cell_format = self._create_cell_format(workbook, style)
-                            worksheet.write(row_idx, col_idx, item.text, cell_format)
-                        else:
-                            worksheet.write(row_idx, col_idx, item.text)
-
-                        # 合并单元格（如果需要）
-                        if header_config.merge_headers and (item.row_span > 1 or item.col_span > 1):
-                            end_row = min(start_row + item.row_span - 1, header_config.row_count - 1)
-                            end_col = min(start_col + item.col_span - 1, header_config.col_count - 1)
-                            if start_row != end_row or start_col != end_col:
-                                worksheet.merge_range(
-                                    start_row, start_col,
-                                    end_row, end_col,
-                                    item.text,
-                                    cell_format if style else None
-                                )
+        # 写入表头内容并应用样式
+        for cell in plan.cells:
+            cell_format = None
+            if cell.style:
+                cell_format = self._create_cell_format(workbook, cell.style, cell.style_key)
+                worksheet.write(cell.row, cell.col, cell.text, cell_format)
+            else:
+                worksheet.write(cell.row, cell.col, cell.text)
+
+            # 合并单元格（如果需要）
+            if cell.is_merged:
+                worksheet.merge_range(
+                    cell.row, cell.col,
+                    cell.end_row, cell.end_col,
+                    cell.text,
+                    cell_format
+                )
 
     def _write_data_safe(
             self,
@@ -1008,9 +1971,10 @@ class MultiSheetExcelTable:
             worksheet: Worksheet,
             config: TableConfig,
             data: pd.DataFrame,
-            progress_manager: Optional[ProgressManager] = None
+            progress_manager: Optional[ProgressManager] = None,
+            row_offset: int = 0
     ):
-        """安全的写入数据方法，带进度更新"""
+        """安全的写入数据方法，带进度更新（行样式、单元格样式按原数据中的行号 row_offset + 行索引 匹配）"""
         data_start_row = config.header.row_count
 
         # ========== 设置列宽 ==========
@@ -1029,7 +1993,7 @@ class MultiSheetExcelTable:
                 if not data.empty and column_name in data.columns:
                     try:
                         # 计算该列数据的最大长度
-                        max_data_len = data[column_name].astype(str).str.len().max()
+                        max_data_len = _max_text_len(data[column_name])
                         width = max(width, int(max_data_len) + 2)  # 加2个字符的边距
                     except:
                         pass
@@ -1050,8 +2014,8 @@ class MultiSheetExcelTable:
         if progress_manager:
             progress_manager.update_sheet_progress(40, "预处理数据...")
 
-        # 检查第一行是否是列名
-        if len(data) > 0:
+        # 检查第一行是否是列名（续表不检查）
+        if len(data) > 0 and row_offset == 0:
             first_row_values = data.iloc[0].tolist()
             column_names = config.data_columns
 
@@ -1072,9 +2036,58 @@ class MultiSheetExcelTable:
             print(f"处理后数据为空")
             return
 
-        # ========== 写入数据行 ==========
+        # ========== 准备按列取值 ==========
+        style_plan = self._get_style_plan(config)
+        # 分类列按编码查类别表取值；日期时间列预先转换为Excel序列号；其他列转换为Python值列表
+        # 声明了写入类型的列直接调用对应的 write_* 方法（分类列每个类别只转换一次）
+        columns = []
+        dtypes = []
+        value_types = []
+        category_cells = []
+        column_formats = []
+        datetime_formats = []
+        for col_idx, column_name in enumerate(config.data_columns):
+            if column_name in data.columns:
+                series = data[column_name]
+            elif col_idx < data.shape[1]:
+                # 如果列名不在数据中，尝试按位置获取
+                series = data.iloc[:, col_idx]
+            else:
+                series = None
+            columns.append(_column_values(series))
+            dtypes.append(series.dtype if columns[-1][0] is ColumnKind.CATEGORY else None)
+
+            value_type = config.get_value_type(column_name)
+            value_types.append(value_type)
+            if columns[-1][0] is ColumnKind.CATEGORY and value_type is not ValueType.AUTO:
+                category_cells.append([_typed_value(c, value_type) for c in columns[-1][2]])
+            else:
+                category_cells.append(None)
+
+            column_formats.append(self._plan_format(workbook, style_plan, style_plan.column_keys[col_idx]))
+
+            # 日期时间单元格使用列样式 + 数字格式
+            if columns[-1][0] is ColumnKind.DATETIME or value_type is ValueType.DATETIME:
+                datetime_formats.append(self._plan_format(workbook, style_plan, style_plan.datetime_keys[col_idx]))
+            else:
+                datetime_formats.append(None)
+
+        has_row_styles = bool(config.row_styles)
+        has_cell_styles = bool(config.cell_styles)
         total_rows = len(data)
 
+        # ========== 文本分类列按共享字符串序号整列写入 ==========
+        # 没有行/单元格样式时整列只使用列格式，可以跳过逐单元格的字符串处理
+        direct_columns = set()
+        if (self.seed_shared_strings and not has_row_styles and not has_cell_styles
+                and not worksheet.constant_memory and data_start_row + total_rows <= worksheet.xls_rowmax):
+            for col_idx, (kind, codes, values) in enumerate(columns):
+                if kind is ColumnKind.CATEGORY and value_types[col_idx] is ValueType.STRING:
+                    self._write_category_strings(workbook, worksheet, data_start_row, col_idx,
+                                                 codes, dtypes[col_idx], column_formats[col_idx])
+                    direct_columns.add(col_idx)
+
+        # ========== 写入数据行 ==========
         for df_row_idx in range(total_rows):
             # 检查是否取消
             if progress_manager and progress_manager.is_cancelled:
@@ -1083,45 +2096,69 @@ class MultiSheetExcelTable:
             excel_row_idx = data_start_row + df_row_idx
 
             # 设置行高
-            row_style = config.get_row_style(df_row_idx)
+            row_style = config.get_row_style(row_offset + df_row_idx) if has_row_styles else None
             if row_style and row_style.height:
                 worksheet.set_row(excel_row_idx, row_style.height)
+            row_style_key = style_plan.row_keys.get(row_offset + df_row_idx) if row_style else None
 
             # 写入每一列
-            row_data = data.iloc[df_row_idx]
-            for col_idx, column_name in enumerate(config.data_columns):
+            for col_idx, (kind, codes, values) in enumerate(columns):
+                if col_idx in direct_columns:
+                    continue
                 try:
-                    # 获取单元格值
-                    if column_name in data.columns:
-                        cell_value = row_data[column_name]
+                    # 获取单元格值及写入类型
+                    if kind is ColumnKind.CATEGORY:
+                        code = codes[df_row_idx]
+                        cells = category_cells[col_idx]
+                        if code < 0:
+                            value_type, cell_value = _BLANK_CELL
+                        elif cells is not None:
+                            value_type, cell_value = cells[code]
+                        else:
+                            value_type, cell_value = ValueType.AUTO, values[code]
+                    elif kind is ColumnKind.VALUES:
+                        # 安全处理cell_value
+                        value_type, cell_value = _typed_value(
+                            self._safe_cell_value(values[df_row_idx]), value_types[col_idx])
+                    elif kind is ColumnKind.DATETIME:
+                        serial = codes[df_row_idx]
+                        if serial != serial:  # NaT -> 空
+                            value_type, cell_value = _BLANK_CELL
+                        else:
+                            value_type, cell_value = ValueType.DATETIME, float(serial)
                     else:
-                        # 如果列名不在数据中，尝试按位置获取
-                        cell_value = row_data.iloc[col_idx] if col_idx < len(row_data) else ''
-
-                    # 安全处理cell_value
-                    cell_value = self._safe_cell_value(cell_value)
-
-                    # 获取单元格样式
-                    cell_style = None
-
-                    # 1. 检查单元格特定样式
-                    cell_style_config = config.get_cell_style(df_row_idx, col_idx)
-                    if cell_style_config:
-                        cell_style = cell_style_config.style
-
-                    # 2. 检查行样式
-                    if cell_style is None and row_style and row_style.style:
-                        cell_style = row_style.style
-
-                    # 3. 检查列样式
-                    if cell_style is None:
-                        column_style = config.get_column_style(column_name)
-                        if column_style and column_style.default_style:
-                            cell_style = column_style.default_style
-
-                    # 写入单元格
-                    if cell_style:
-                        cell_format = self._create_cell_format(workbook, cell_style)
+                        value_type, cell_value = _BLANK_CELL
+
+                    # 获取单元格样式：单元格样式 > 行样式 > 列样式
+                    style_key = None
+                    if has_cell_styles:
+                        style_key = style_plan.cell_keys.get((row_offset + df_row_idx, col_idx))
+                    if style_key is None:
+                        style_key = row_style_key
+
+                    if style_key is not None:
+                        if value_type is ValueType.DATETIME:
+                            style_key = style_plan.datetime_style_keys[style_key, col_idx]
+                        cell_format = self._plan_format(workbook, style_plan, style_key)
+                    elif value_type is ValueType.DATETIME:
+                        cell_format = datetime_formats[col_idx]
+                    else:
+                        cell_format = column_formats[col_idx]
+
+                    # 写入单元格：已知类型直接调用对应方法，不经过字符串探测
+                    if value_type is ValueType.STRING:
+                        worksheet.write_string(excel_row_idx, col_idx, cell_value, cell_format)
+                    elif value_type is ValueType.NUMBER:
+                        worksheet.write_number(excel_row_idx, col_idx, cell_value, cell_format)
+                    elif value_type is ValueType.DATETIME:
+                        if isinstance(cell_value, float):
+                            # datetime64列已预先转换为序列号
+                            worksheet.write_number(excel_row_idx, col_idx, cell_value, cell_format)
+                        else:
+                            worksheet.write_datetime(excel_row_idx, col_idx, cell_value, cell_format)
+                    elif value_type is ValueType.BLANK:
+                        worksheet.write_blank(excel_row_idx, col_idx, None, cell_format)
+                    elif cell_format:
                         worksheet.write(excel_row_idx, col_idx, cell_value, cell_format)
                     else:
                         worksheet.write(excel_row_idx, col_idx, cell_value)
@@ -1151,6 +2188,42 @@ class MultiSheetExcelTable:
             except Exception as e:
                 print(f"设置自动筛选时出错: {e}")
 
+    def _write_category_strings(
+            self,
+            workbook: Workbook,
+            worksheet: Worksheet,
+            first_row: int,
+            col_idx: int,
+            codes: np.ndarray,
+            dtype: pd.CategoricalDtype,
+            cell_format: Optional[xlsxwriter.format.Format]
+    ):
+        """
+        将文本分类列直接写入worksheet的单元格表
+        每个类别的单元格（共享字符串序号 + 列格式）只创建一次，写入时只复制引用
+        """
+        indices = self._shared_string_indices(workbook, dtype, codes)
+        blank = CellBlankTuple(cell_format) if cell_format is not None else None
+        # 末尾多放一个元素，对应编码-1（缺失值）
+        cells = [CellStringTuple(index, cell_format) if index is not None else blank
+                 for index in indices] + [blank]
+
+        written_rows = np.flatnonzero(np.array([cell is not None for cell in cells])[codes])
+        if not len(written_rows):
+            return
+
+        table = worksheet.table
+        for row_idx, code in enumerate(codes.tolist(), first_row):
+            cell = cells[code]
+            if cell is not None:
+                table[row_idx][col_idx] = cell
+
+        # 与 write_string 一致：更新已用区域并累加共享字符串的引用次数
+        worksheet._check_dimensions(first_row + int(written_rows[0]), col_idx)
+        worksheet._check_dimensions(first_row + int(written_rows[-1]), col_idx)
+        is_string = np.array([index is not None for index in indices] + [False])
+        workbook.str_table.count += int(is_string[codes].sum())
+
     def _safe_cell_value(self, value):
         """安全处理单元格值"""
         if value is None:
@@ -1170,96 +2243,47 @@ class MultiSheetExcelTable:
 
         return value
 
+    def _get_style_plan(self, config: TableConfig) -> StylePlan:
+        """获取表格配置的样式计划"""
+        if config.is_frozen:
+            return config.get_style_plan()
+        plan = self._style_plans.get(id(config))
+        if plan is None:
+            plan = self._style_plans[id(config)] = config.get_style_plan()
+        return plan
+
+    def _format_registry(self, workbook: Workbook) -> FormatRegistry:
+        """当前workbook的格式注册表（workbook变化时新建，不会用到已关闭workbook的格式）"""
+        if self._formats is None or self._formats.workbook is not workbook:
+            self._formats = FormatRegistry(workbook)
+        return self._formats
+
     def _create_cell_format(
             self,
             workbook: xlsxwriter.Workbook,
-            style: CellStyle
+            style: CellStyle,
+            style_key: Optional[str] = None
     ) -> xlsxwriter.format.Format:
         """创建单元格格式"""
-        # 使用缓存
-        style_key = json.dumps(style.to_dict(), sort_keys=True)
-        if style_key in self._style_cache:
-            return self._style_cache[style_key]
-
-        format_dict = {}
-
-        # 字体
-        if style.font:
-            font_dict = {}
-            if style.font.name:
-                font_dict['font_name'] = style.font.name
-            if style.font.size:
-                font_dict['font_size'] = style.font.size
-            if style.font.color:
-                font_dict['font_color'] = style.font.color
-            if style.font.style == FontStyle.BOLD:
-                font_dict['bold'] = True
-            elif style.font.style == FontStyle.ITALIC:
-                font_dict['italic'] = True
-            elif style.font.style == FontStyle.BOLD_ITALIC:
-                font_dict['bold'] = True
-                font_dict['italic'] = True
-            if style.font.underline:
-                font_dict['underline'] = True
-
-            format_dict.update(font_dict)
-
-        # 填充
-        if style.fill:
-            format_dict['bg_color'] = style.fill.color
-            if style.fill.pattern != 'solid':
-                format_dict['pattern'] = style.fill.pattern
-
-        # 对齐
-        format_dict['align'] = style.horizontal.value
-        format_dict['valign'] = style.vertical.value
-
-        # 文本控制
-        format_dict['text_wrap'] = style.wrap_text
-        format_dict['shrink'] = style.shrink_to_fit
-
-        # 旋转
-        if style.rotation:
-            format_dict['rotation'] = style.rotation
-
-        # 缩进
-        if style.indent:
-            format_dict['indent'] = style.indent
-
-        # 数字格式
-        if style.num_format != "General":
-            format_dict['num_format'] = style.num_format
-
-        # 边框
-        if style.border:
-            border_props = {}
-            if style.border.left:
-                border_props['left'] = style.border.left.style.value
-                border_props['left_color'] = style.border.left.color
-            if style.border.right:
-                border_props['right'] = style.border.right.style.value
-                border_props['right_color'] = style.border.right.color
-            if style.border.top:
-                border_props['top'] = style.border.top.style.value
-                border_props['top_color'] = style.border.top.color
-            if style.border.bottom:
-                border_props['bottom'] = style.border.bottom.style.value
-                border_props['bottom_color'] = style.border.bottom.color
-
-            format_dict.update(border_props)
-
-        # 创建格式对象
-        try:
-            cell_format = workbook.add_format(format_dict)
-            self._style_cache[style_key] = cell_format
-            return cell_format
-        except Exception as e:
-            print(f"创建单元格格式时出错: {e}")
-            # 返回默认格式
-            return workbook.add_format()
+        style_key, props = format_props(style, style_key)
+        return self._format_registry(workbook).get(style_key, props)
+
+    def _plan_format(
+            self,
+            workbook: xlsxwriter.Workbook,
+            plan: StylePlan,
+            style_key: Optional[str]
+    ) -> Optional[xlsxwriter.format.Format]:
+        """按样式计划中的样式键获取格式（无样式时返回None）"""
+        if style_key is None:
+            return None
+        return self._format_registry(workbook).get(style_key, plan.props[style_key])
+
+    def _add_index_sheet(self, workbook: xlsxwriter.Workbook, parts: Optional[List[SheetPart]] = None):
+        """添加目录页（parts 为容量规划后实际写入的sheet，省略时重新规划）"""
+        if parts is None:
+            parts = self.plan_capacity().parts
 
-    def _add_index_sheet(self, workbook: xlsxwriter.Workbook):
-        """添加目录页"""
         worksheet = workbook.add_worksheet('目录')
 
         # 写入标题
@@ -1284,9 +2308,10 @@ class MultiSheetExcelTable:
 
         # 写入sheet信息
         row = 3
-        for i, (sheet_name, config) in enumerate(self.sheet_configs.items(), 1):
-            data = self.sheet_data.get(sheet_name, pd.DataFrame())
-            row_count = len(data)
+        for i, part in enumerate(parts, 1):
+            sheet_name = part.sheet_name
+            config = self.sheet_configs[part.source_name]
+            row_count = part.row_count
             col_count = len(config.data_columns)
 
             worksheet.write(row, 0, i)
@@ -1298,6 +2323,8 @@ class MultiSheetExcelTable:
             remark = f"表头行数: {config.header.row_count}"
             if config.freeze_pane:
                 remark += f", 冻结: {config.freeze_pane}"
+            if part.sheet_name != part.source_name:
+                remark += f", 续表: {part.source_name} 第{part.start + 1}-{part.stop}行"
             worksheet.write(row, 4, remark)
 
             # 添加超链接到对应sheet
@@ -1321,9 +2348,12 @@ class MultiSheetExcelTable:
         worksheet.set_column('D:D', 12)
         worksheet.set_column('E:E', 30)
 
-    def _fallback_save(self, output_path: str,
-                       progress_manager: Optional[ProgressManager] = None) -> Optional[str]:
-        """备用保存方法，使用openpyxl引擎，带进度"""
+    def _fallback_save(self, output_path: Union[str, BinaryIO],
+                       progress_manager: Optional[ProgressManager] = None,
+                       stream_start: Optional[int] = None) -> Optional[Union[str, BinaryIO]]:
+        """备用保存方法，使用openpyxl引擎，带进度（写入流时 stream_start 为写入前的位置）"""
+        to_stream = not isinstance(output_path, (str, os.PathLike))
+        atomic_output = None
         try:
             print("尝试使用openpyxl引擎保存...")
 
@@ -1331,10 +2361,11 @@ class MultiSheetExcelTable:
                 progress_manager.update(50, "使用备用引擎保存...")
 
             # 使用openpyxl引擎
-            with pd.ExcelWriter(
-                    output_path,
-                    engine='openpyxl'
-            ) as writer:
+            if not to_stream:
+                atomic_output = AtomicOutputFile(output_path, self.scratch_dir)
+            # 临时文件以 .tmp 结尾，以文件句柄传入（pandas会按扩展名校验引擎）
+            with (open(atomic_output.temp_path, 'wb') if not to_stream else contextlib.nullcontext(output_path)) as target, \
+                    pd.ExcelWriter(target, engine='openpyxl') as writer:
                 total_sheets = len(self.sheet_configs)
 
                 for sheet_index, (sheet_name, config) in enumerate(self.sheet_configs.items(), 1):
@@ -1358,12 +2389,17 @@ class MultiSheetExcelTable:
                     )
 
             if progress_manager and progress_manager.is_cancelled:
-                if os.path.exists(output_path):
-                    os.remove(output_path)
+                if to_stream:
+                    _rewind_stream(output_path, stream_start)
+                else:
+                    atomic_output.discard()
                 print("备用保存已取消")
                 return None
 
-            print(f"✅ 使用openpyxl引擎保存成功: {output_path}")
+            if atomic_output is not None:
+                atomic_output.commit()
+
+            print(f"✅ 使用openpyxl引擎保存成功: {output_path if not to_stream else '输出流'}")
 
             if progress_manager:
                 progress_manager.update(100, "备用引擎保存完成")
@@ -1372,6 +2408,10 @@ class MultiSheetExcelTable:
 
         except Exception as e:
             print(f"❌ 备用保存方法也失败: {e}")
+            if to_stream:
+                _rewind_stream(output_path, stream_start)
+            elif atomic_output is not None:
+                atomic_output.discard()
 
             if progress_manager:
                 progress_manager.update(0, f"保存失败: {e}")
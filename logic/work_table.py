@@ -1,9 +1,23 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 from .table import HeaderRow, HeaderItem, HeaderConfig, StyleBuilder, TableConfig, MultiSheetExcelTable, \
-    HorizontalAlignment, ColumnStyleConfig, FontStyle
+    HorizontalAlignment, ColumnStyleConfig, FontStyle, TemplateRegistry, ValueType
+from .planner import ExportEngine, ExportPlan, plan_export, shard_file_paths, split_evenly
+from .config_store import file_stamp
+from .export_cache import ExportCache, fingerprint
+from .generation_memo import GenerationMemo
+from .inventory import Inventory, ServerFilter, load_inventory
+from .xlsx_package import SheetPartCache
+import numpy as np
 import pandas as pd
 import os
 
+# 授权起止时间在Excel中的显示格式（与4A导入要求的"2019-01-02 06:08:35"一致）
+DATETIME_NUM_FORMAT = "yyyy-mm-dd hh:mm:ss"
+
+
 class TableTemplates:
     @staticmethod
     def work_table() -> TableConfig:
@@ -177,27 +191,120 @@ class TableTemplates:
                 "apply_master_account", "start_time", "end_time"
             ],
             column_styles={
-                "resource_pool": ColumnStyleConfig(column_name="resource_pool", width=15),
-                "ip": ColumnStyleConfig(column_name="ip", width=16),
-                "name": ColumnStyleConfig(column_name="name", width=16),
-                "db_name": ColumnStyleConfig(column_name="db_name", width=20),
-                "db_type": ColumnStyleConfig(column_name="db_type", width=20),
-                "port": ColumnStyleConfig(column_name="port", width=12),
-                "from_account": ColumnStyleConfig(column_name="from_account", width=20),
-                "current_master_account": ColumnStyleConfig(column_name="current_master_account", width=30),
-                "apply_master_account": ColumnStyleConfig(column_name="apply_master_account", width=30),
-                "start_time": ColumnStyleConfig(column_name="start_time", width=30),
-                "end_time": ColumnStyleConfig(column_name="end_time", width=30)
+                "resource_pool": ColumnStyleConfig(column_name="resource_pool", width=15,
+                                                   value_type=ValueType.STRING),
+                "ip": ColumnStyleConfig(column_name="ip", width=16,
+                                        value_type=ValueType.STRING),
+                "name": ColumnStyleConfig(column_name="name", width=16,
+                                          value_type=ValueType.STRING),
+                "db_name": ColumnStyleConfig(column_name="db_name", width=20,
+                                             value_type=ValueType.STRING),
+                "db_type": ColumnStyleConfig(column_name="db_type", width=20,
+                                             value_type=ValueType.STRING),
+                "port": ColumnStyleConfig(column_name="port", width=12,
+                                          value_type=ValueType.NUMBER),
+                "from_account": ColumnStyleConfig(column_name="from_account", width=20,
+                                                  value_type=ValueType.STRING),
+                "current_master_account": ColumnStyleConfig(column_name="current_master_account", width=30,
+                                                            value_type=ValueType.STRING),
+                "apply_master_account": ColumnStyleConfig(column_name="apply_master_account", width=30,
+                                                          value_type=ValueType.STRING),
+                "start_time": ColumnStyleConfig(column_name="start_time", width=30,
+                                                num_format=DATETIME_NUM_FORMAT,
+                                                value_type=ValueType.STRING),
+                "end_time": ColumnStyleConfig(column_name="end_time", width=30,
+                                              num_format=DATETIME_NUM_FORMAT,
+                                              value_type=ValueType.STRING)
             }
         )
 
 
+# 三个时间段及对应的起止时间
+TIME_SLOTS = {
+    "晨": {"start_hour": 0, "end_hour": 8},
+    "昼": {"start_hour": 8, "end_hour": 16},
+    "夜": {"start_hour": 16, "end_hour": 24}
+}
+
+
+def split_resource_ip(resource_ip: str):
+    """将"资源池 IP"拆分为(resource_pool, ip)，最后一段作为IP，其余作为资源池"""
+    parts = resource_ip.split()
+    if len(parts) > 1:
+        return ' '.join(parts[:-1]), parts[-1]
+    elif len(parts) == 1:
+        # 只有一个部分，整个作为resource_pool
+        return parts[0], ""
+    return "", ""
+
+
+def _code_dtype(category_count: int):
+    """按类别数量选择最小的编码类型（与pandas的选择一致，避免重复转换）"""
+    if category_count < np.iinfo(np.int8).max:
+        return np.int8
+    if category_count < np.iinfo(np.int16).max:
+        return np.int16
+    if category_count < np.iinfo(np.int32).max:
+        return np.int32
+    return np.int64
+
+
+def _extend_categories(previous: List, needed: List) -> Optional[List]:
+    """
+    在上一次的类别表末尾追加新类别（已有类别编码不变）
+    过期类别（本次不再使用）多于本次用到的类别时返回None，由调用方重建，避免类别表无限增长
+    """
+    needed_set = set(needed)
+    stale = sum(1 for value in previous if value not in needed_set)
+    if stale > len(needed):
+        return None
+    previous_set = set(previous)
+    return list(previous) + [value for value in needed if value not in previous_set]
+
+
+@dataclass
+class GenerationDelta:
+    """与上一次生成相比的sheet变化（按sheet名称比较，首次生成时全部为新增）"""
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+
+    @property
+    def dirty(self) -> List[str]:
+        """内容有变化、需要重新预览或导出的sheet"""
+        return self.added + self.changed
+
+    def summary(self) -> str:
+        return (f"新增 {len(self.added)} 个sheet，变化 {len(self.changed)} 个，"
+                f"删除 {len(self.removed)} 个，未变 {len(self.unchanged)} 个")
+
+
+# 模板版本，修改 TableTemplates.work_table 的内容时需要同步升级（计入导出缓存指纹，以免复用旧模板导出的文件）
+WORK_TABLE_TEMPLATE_VERSION = "3"
+
+# 全局模板注册表，模板只构建一次并在所有 WorkTable 之间共享
+templates = TemplateRegistry()
+templates.register("work_table", WORK_TABLE_TEMPLATE_VERSION, TableTemplates.work_table)
+
+
 class WorkTable(object):
 
     def __init__(self):
         self.excel_table = None
         self.data_dict = None
-        self.template_config = TableTemplates.work_table()
+        self.category_dtype = None  # 最近一次生成的共享类别表
+        self.last_delta: Optional[GenerationDelta] = None  # 最近一次生成相对上一次的变化
+        # 上一次生成的行组合输入与各sheet的起止时间，用于增量生成
+        self._row_inputs: Optional[Tuple] = None
+        self._sheet_times: Dict[str, Tuple] = {}
+        self.scratch_dir = None  # 导出临时文件目录（如tmpfs、本地SSD），为空时使用输出目录
+        self.export_cache: Optional[ExportCache] = None  # 导出缓存，为空时不缓存
+        # 已渲染sheet缓存：修改部分数据后再次导出时只重新渲染变化的sheet，为空时不缓存
+        self.sheet_cache: Optional[SheetPartCache] = None
+        # 生成结果缓存：相同参数（日期、服务器、账号）再次生成时直接取结果，为空时不缓存
+        self.generation_memo: Optional[GenerationMemo] = None
+        self.template_config = templates.get("work_table")
         self.header = self.template_config.header.rows[1]
 
     def template(self):
@@ -229,7 +336,9 @@ class WorkTable(object):
             db_name_list: list = None,
             db_type_list: list = None,
             port_list: list = None,
-            include_sheetname_prefix: bool = True
+            include_sheetname_prefix: bool = True,
+            native_datetime: bool = False,
+            server_filter: Optional[ServerFilter] = None
     ):
         """
         生成任意时间周期的工作表数据
@@ -237,7 +346,7 @@ class WorkTable(object):
         Args:
             start_date: 开始日期，格式如 "2026-02-01"
             end_date: 结束日期，格式如 "2026-02-28"
-            resource_ip_list: 包含"资源池 IP"格式的列表
+            resource_ip_list: 包含"资源池 IP"格式的列表，或已解析的服务器清单（Inventory）
             account_list: from_account列表
             current_master_account_list: master_account列表
             name_list: 服务器名称列表（可选）
@@ -245,16 +354,27 @@ class WorkTable(object):
             db_type_list: 数据库类型列表（可选）
             port_list: 端口列表（可选）
             include_sheetname_prefix: 是否在sheet名称中包含月份前缀
+            native_datetime: 起止时间使用datetime64列（导出为Excel日期时间单元格）而不是字符串；
+                Excel无法表示24点，"夜"时段的结束时间仍为"YYYY-MM-DD 24:00:00"文本（与导入格式一致）
+            server_filter: 只为指定资源池/网段的服务器生成（通过服务器清单的索引查找），None 表示全部
 
         Returns:
             Dict[str, pd.DataFrame]: sheet名称 -> 数据DataFrame
+            各列均为共享同一类别表（self.category_dtype）的分类列（native_datetime时除24点以外的起止时间列除外）
+
+        增量生成：上一次生成的数据仍在时，类别表只在末尾追加（已有编码不变），
+        服务器、账号未变且起止时间相同的sheet直接沿用上一次的数据；
+        与上一次相比的变化记录在 self.last_delta 中，供预览和导出缓存按sheet失效。
         """
         # 定义三个时间段对应的时间
-        time_slots = {
-            "晨": {"start_hour": 0, "end_hour": 8},
-            "昼": {"start_hour": 8, "end_hour": 16},
-            "夜": {"start_hour": 16, "end_hour": 24}
-        }
+        time_slots = TIME_SLOTS
+
+        # 按资源池/网段筛选服务器
+        if server_filter is not None and not server_filter.empty:
+            if not isinstance(resource_ip_list, Inventory):
+                resource_ip_list = Inventory.from_resource_ips(resource_ip_list)
+            resource_ip_list = resource_ip_list.select(server_filter)
+            print(f"服务器筛选（{server_filter.describe()}）: {len(resource_ip_list)} 台")
 
         # 解析日期
         start_dt = datetime.strptime(start_date, "%Y-%m-%d")
@@ -274,9 +394,21 @@ class WorkTable(object):
         print(f"理论总行数（每个sheet）: {total_rows}")
         print(f"理论总数据量: {total_rows * delta_days * len(time_slots)} 行")
 
-        data_dict = {}
-
-        # 遍历每一天
+        # 分割resource_pool和ip（每个服务器只分割一次，服务器清单已拆分好）
+        if isinstance(resource_ip_list, Inventory):
+            servers = resource_ip_list.servers()
+            resource_ip_list = resource_ip_list.resource_ips
+        else:
+            servers = [split_resource_ip(resource_ip) for resource_ip in resource_ip_list]
+
+        def slot_time(current_date, date_str_ymd, hour):
+            # Excel日期时间无法表示24点，24点始终保留为文本
+            if native_datetime and hour < 24:
+                return np.datetime64(current_date + timedelta(hours=hour), 'ns')
+            return f"{date_str_ymd} {hour:02d}:00:00"
+
+        # 收集每个sheet的名称和起止时间
+        sheets = []
         for day_offset in range(delta_days):
             current_date = start_dt + timedelta(days=day_offset)
             month = current_date.month
@@ -285,7 +417,6 @@ class WorkTable(object):
             # 格式化日期字符串
             date_str_ymd = f"{current_date.year}-{month:02d}-{day:02d}"
 
-            # 为每个时间段创建sheet
             for period_name, time_info in time_slots.items():
                 # 生成sheet名称
                 if include_sheetname_prefix:
@@ -293,62 +424,253 @@ class WorkTable(object):
                 else:
                     sheet_name = f"{day}日{period_name}"
 
-                # 收集所有行的数据
-                all_rows = []
-
-                # 三层嵌套：resource_ip × account × master_account
-                for resource_ip_idx, resource_ip in enumerate(resource_ip_list):
-                    # 分割resource_pool和ip
-                    parts = resource_ip.split()
-                    if len(parts) > 1:
-                        # 如果分割后有多个部分，最后一个作为IP，其余作为resource_pool
-                        resource_pool = ' '.join(parts[:-1])
-                        ip = parts[-1]
-                    elif len(parts) == 1:
-                        # 只有一个部分，整个作为resource_pool
-                        resource_pool = parts[0]
-                        ip = ""
-                    else:
-                        resource_pool = ""
-                        ip = ""
-
-                    # 获取对应的其他字段（使用循环索引）
-                    # name = name_list[resource_ip_idx % len(name_list)]
-                    # db_name = db_name_list[resource_ip_idx % len(db_name_list)]
-                    # db_type = db_type_list[resource_ip_idx % len(db_type_list)]
-                    # port = port_list[resource_ip_idx % len(port_list)]
-
-                    for from_account in account_list:
-                        for master_account in current_master_account_list:
-                            # 构建时间
-                            start_time = f"{date_str_ymd} {time_info['start_hour']:02d}:00:00"
-                            end_time = f"{date_str_ymd} {time_info['end_hour']:02d}:00:00"
-
-                            # 创建一行数据
-                            row = {
-                                "resource_pool": resource_pool,
-                                "ip": ip,
-                                "name": "",
-                                "db_name": "",
-                                "db_type": "",
-                                "port": "",
-                                "from_account": from_account,
-                                "current_master_account": master_account,
-                                "apply_master_account": master_account,
-                                "start_time": start_time,
-                                "end_time": end_time
-                            }
-                            all_rows.append(row)
-
-                # 创建DataFrame
-                data_dict[sheet_name] = pd.DataFrame(all_rows)
+                start_time = slot_time(current_date, date_str_ymd, time_info['start_hour'])
+                end_time = slot_time(current_date, date_str_ymd, time_info['end_hour'])
+                sheets.append((sheet_name, start_time, end_time))
+
+        # 服务器、账号（即每个sheet的行）与上一次相同时，起止时间相同的sheet内容不变
+        row_inputs = (tuple(resource_ip_list), tuple(account_list), tuple(current_master_account_list),
+                      native_datetime)
+        sheet_times = {sheet_name: (start_time, end_time) for sheet_name, start_time, end_time in sheets}
+        previous_data = self.data_dict or {}
+        delta = self._generation_delta(row_inputs, sheet_times)
+
+        # 与上一次生成有差异时，先查找相同参数的生成结果
+        memo_key = None
+        if self.generation_memo is not None:
+            memo_key = self.generation_memo.key(
+                start_date=start_date, end_date=end_date, resource_ip_list=list(resource_ip_list),
+                account_list=list(account_list), current_master_account_list=list(current_master_account_list),
+                include_sheetname_prefix=include_sheetname_prefix, native_datetime=native_datetime)
+            data_dict = self.generation_memo.get(memo_key) if delta.dirty or delta.removed else None
+            if data_dict is not None:
+                print("[INFO] 生成参数与之前相同，使用缓存的生成结果")
+                self.category_dtype = next((series.dtype for df in data_dict.values() for _, series in df.items()
+                                            if isinstance(series.dtype, pd.CategoricalDtype)), self.category_dtype)
+                self._finish_generation(data_dict, row_inputs, sheet_times, delta, bool(previous_data))
+                return
+
+        # 所有sheet共享一张类别表，各列只保存整数编码
+        needed = list(dict.fromkeys(
+            [""]
+            + [pool for pool, _ in servers]
+            + [ip for _, ip in servers]
+            + list(account_list)
+            + list(current_master_account_list)
+            + [t for _, start_time, end_time in sheets for t in (start_time, end_time) if isinstance(t, str)]
+        ))
+        categories = None
+        if previous_data and self.category_dtype is not None:
+            categories = _extend_categories(list(self.category_dtype.categories), needed)
+            if categories is None:
+                print("[INFO] 过期类别过多，重建类别表")
+        if categories is None:
+            categories = needed
+        dtype_unchanged = self.category_dtype is not None and categories == list(self.category_dtype.categories)
+        if not dtype_unchanged:
+            self.category_dtype = pd.CategoricalDtype(categories=categories)
+        code_of = {value: code for code, value in enumerate(categories)}
+        code_dtype = _code_dtype(len(categories))
+
+        # resource_ip × account × master_account 的组合编码（所有sheet共用）
+        n_from, n_master = len(account_list), len(current_master_account_list)
+        block_size = n_from * n_master
+        pool_codes = np.repeat(np.array([code_of[pool] for pool, _ in servers], dtype=code_dtype), block_size)
+        ip_codes = np.repeat(np.array([code_of[ip] for _, ip in servers], dtype=code_dtype), block_size)
+        from_codes = np.tile(np.repeat(np.array([code_of[a] for a in account_list], dtype=code_dtype), n_master),
+                             len(servers))
+        master_codes = np.tile(np.array([code_of[a] for a in current_master_account_list], dtype=code_dtype),
+                               len(servers) * n_from)
+        empty_codes = np.zeros(total_rows, dtype=code_dtype)
+
+        def column(codes):
+            return pd.Categorical.from_codes(codes, dtype=self.category_dtype)
+
+        shared_columns = {
+            "resource_pool": column(pool_codes),
+            "ip": column(ip_codes),
+            "name": column(empty_codes),
+            "db_name": column(empty_codes),
+            "db_type": column(empty_codes),
+            "port": column(empty_codes),
+            "from_account": column(from_codes),
+            "current_master_account": column(master_codes),
+            "apply_master_account": column(master_codes),
+        }
+
+        def time_column(value):
+            if not isinstance(value, str):
+                return np.full(total_rows, value, dtype='datetime64[ns]')
+            return column(np.full(total_rows, code_of[value], dtype=code_dtype))
 
+        # 未变化的sheet沿用上一次的数据（类别表有追加时编码不变，但要换成新的类别表，仍需重新组装）
+        reusable = set(delta.unchanged) if dtype_unchanged else set()
+        data_dict = {}
+        for sheet_name, (start_time, end_time) in sheet_times.items():
+            frame = previous_data.get(sheet_name) if sheet_name in reusable else None
+            if frame is None:
+                frame = pd.DataFrame({
+                    **shared_columns,
+                    "start_time": time_column(start_time),
+                    "end_time": time_column(end_time),
+                })
+            data_dict[sheet_name] = frame
+
+        if memo_key is not None:
+            self.generation_memo.put(memo_key, data_dict)
+        self._finish_generation(data_dict, row_inputs, sheet_times, delta, bool(previous_data))
+
+    def _generation_delta(self, row_inputs: Tuple, sheet_times: Dict[str, Tuple]) -> GenerationDelta:
+        """与上一次生成比较：行组合与起止时间都相同的sheet内容不变"""
+        previous_data = self.data_dict or {}
+        rows_unchanged = bool(previous_data) and row_inputs == self._row_inputs
+        delta = GenerationDelta()
+        for sheet_name, times in sheet_times.items():
+            if rows_unchanged and self._sheet_times.get(sheet_name) == times:
+                delta.unchanged.append(sheet_name)
+            elif sheet_name in previous_data:
+                delta.changed.append(sheet_name)
+            else:
+                delta.added.append(sheet_name)
+        delta.removed = [name for name in previous_data if name not in sheet_times]
+        return delta
+
+    def _finish_generation(self, data_dict: dict, row_inputs: Tuple, sheet_times: Dict[str, Tuple],
+                           delta: GenerationDelta, incremental: bool):
+        """保存生成结果及用于下一次增量生成的输入"""
         print(f"共生成 {len(data_dict)} 个sheet")
+        if incremental:
+            print(f"[INFO] 增量生成: {delta.summary()}")
         self.data_dict = data_dict
+        self._row_inputs = row_inputs
+        self._sheet_times = sheet_times
+        self.last_delta = delta
 
-    def export(self, file_path: str, progress_callback=None):
+    def plan_export(
+            self,
+            start_date: str,
+            end_date: str,
+            server_count: int,
+            account_count: int,
+            master_account_count: int,
+            engine: ExportEngine = None
+    ) -> ExportPlan:
+        """生成数据之前预估规模并选择导出方式（engine 不为空时使用指定的方式）"""
+        delta_days = (datetime.strptime(end_date, "%Y-%m-%d") - datetime.strptime(start_date, "%Y-%m-%d")).days + 1
+        return plan_export(
+            slot_count=max(delta_days, 0) * len(TIME_SLOTS),
+            rows_per_slot=server_count * account_count * master_account_count,
+            column_count=len(self.template_config.data_columns),
+            header_rows=self.template_config.header.row_count,
+            engine=engine
+        )
+
+    def export(self, file_path: str, progress_callback=None, plan: ExportPlan = None,
+               compression_level: Optional[int] = None):
+        """
+        导出当前数据
+        plan 为空或为内存/流式导出时输出单个文件；分文件导出时输出 原文件名_partN.xlsx
+        compression_level 为zip压缩级别（None 默认，0 只存储），见 MultiSheetExcelTable.compression_level
+        返回实际写入的文件列表（取消时为None）
+        """
+        if plan is None or plan.engine in (ExportEngine.IN_MEMORY, ExportEngine.STREAMING):
+            streaming = plan is not None and plan.streaming
+            cache_key = self._cache_key(streaming=streaming, compression_level=compression_level)
+            if cache_key and self.export_cache.fetch(cache_key, file_path, self.scratch_dir):
+                print(f"[INFO] 数据未变化，已从导出缓存复制: {file_path}")
+                if progress_callback:
+                    progress_callback(100, "已从缓存复制")
+                return [file_path]
+
+            self.template()
+            self.excel_table.constant_memory = streaming
+            self.excel_table.compression_level = compression_level
+            self.excel_table.scratch_dir = self.scratch_dir
+            self.excel_table.part_cache = self.sheet_cache
+            output_path = self.excel_table.to_excel(file_path, False, progress_callback)
+            if output_path and cache_key:
+                self.export_cache.store(cache_key, output_path)
+            return [output_path] if output_path else None
+        return self._export_shards(file_path, plan, progress_callback, compression_level)
+
+    def _cache_key(self, **options) -> Optional[str]:
+        """当前数据与导出选项的内容指纹（未启用导出缓存或没有数据时为None）"""
+        if self.export_cache is None or not self.data_dict:
+            return None
+        return fingerprint(f"work_table:{WORK_TABLE_TEMPLATE_VERSION}", self.data_dict, options)
+
+    def export_bytes(self, progress_callback=None, compression_level: Optional[int] = None) -> Optional[bytes]:
+        """导出为单个xlsx文件的内容（不经过磁盘，不分文件），取消或失败时返回None"""
         self.template()
-        self.excel_table.to_excel(file_path, False, progress_callback)
+        self.excel_table.compression_level = compression_level
+        self.excel_table.part_cache = self.sheet_cache
+        return self.excel_table.to_bytes(False, progress_callback)
+
+    def _export_shards(self, file_path: str, plan: ExportPlan, progress_callback=None,
+                       compression_level: Optional[int] = None):
+        """按sheet顺序分成多个文件导出，PARALLEL 时由多个进程同时导出"""
+        sheet_groups = split_evenly(list(self.data_dict.keys()), plan.shard_count)
+        paths = shard_file_paths(file_path, len(sheet_groups))
+        jobs = [(path, {name: self.data_dict[name] for name in names}, plan.streaming, compression_level,
+                 self.scratch_dir)
+                for path, names in zip(paths, sheet_groups)]
+        print(f"[INFO] 分文件导出: {len(jobs)} 个文件，{plan.workers} 个进程")
+
+        def report(done: int, status: str) -> bool:
+            if progress_callback is None:
+                return True
+            return progress_callback(int(done / len(jobs) * 100), status) is not False
+
+        # 各目标路径导出前的状态：取消或失败时只删除本次写入（替换）过的文件
+        before = {path: file_stamp(path) for path in paths}
+        written = []
+        completed = False
+        try:
+            if plan.engine is ExportEngine.PARALLEL and plan.workers > 1:
+                with ProcessPoolExecutor(max_workers=plan.workers) as pool:
+                    futures = [pool.submit(_export_shard, *job) for job in jobs]
+                    try:
+                        for future in as_completed(futures):
+                            written.append(future.result())
+                            if not report(len(written), f"已完成 {len(written)}/{len(jobs)} 个文件"):
+                                break
+                    finally:
+                        # 取消或出错时不再启动排队中的分片；已在运行的分片在进程池退出时等待其结束
+                        for pending in futures:
+                            pending.cancel()
+            else:
+                for job in jobs:
+                    if not report(len(written), f"正在导出: {os.path.basename(job[0])}"):
+                        break
+                    written.append(_export_shard(*job))
+            completed = len(written) == len(jobs) and all(written)
+        finally:
+            if not completed:
+                # 与单文件导出取消时一致，不保留不完整的结果（出错时删除后继续抛出异常）
+                for path in paths:
+                    stamp = file_stamp(path)
+                    if stamp is not None and stamp != before[path]:
+                        os.remove(path)
+                print("[WARN] 分文件导出已取消或失败，已删除已导出的文件")
+        if not completed:
+            return None
+        report(len(jobs), "导出完成")
+        return paths
+
+
+def _export_shard(file_path: str, data_dict: dict, streaming: bool, compression_level: Optional[int] = None,
+                  scratch_dir: Optional[str] = None):
+    """导出一个分片文件（可在子进程中执行）"""
+    excel_table = MultiSheetExcelTable.create_with_shared_config(
+        title="",
+        sheet_names=list(data_dict.keys()),
+        shared_config=templates.get("work_table"),
+        data_dict=data_dict
+    )
+    excel_table.constant_memory = streaming
+    excel_table.compression_level = compression_level
+    excel_table.scratch_dir = scratch_dir
+    return excel_table.to_excel(file_path, False, lambda progress, status: True)
 
 
 if __name__ == '__main__':
@@ -371,9 +693,8 @@ if __name__ == '__main__':
         master_account_file = os.path.join(current_dir, '..', 'config', 'master_account')
 
         # 加载配置文件
-        with open(service_file, 'r', encoding='utf-8') as f:
-            resource_ip_list = [line.strip() for line in f if line.strip()]
-            print(f"加载服务器: {len(resource_ip_list)} 个")
+        resource_ip_list = load_inventory(service_file)
+        print(f"加载服务器: {len(resource_ip_list)} 个")
 
         with open(from_account_file, 'r', encoding='utf-8') as f:
             from_account_list = [line.strip() for line in f if line.strip()]
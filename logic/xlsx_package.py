@@ -0,0 +1,556 @@
+"""
+xlsx打包：在关闭workbook之前预先渲染并压缩工作表XML
+
+xlsxwriter 在 close() 时才依次生成所有工作表的XML，再逐个deflate写入zip，
+生成XML与压缩完全串行。ExportWorkbook 在每个sheet写完后立即渲染该sheet的XML
+并交给后台压缩线程（zlib压缩时释放GIL），主线程继续写入后续sheet；
+close() 时把已压缩的数据直接写入zip，不再重复渲染和压缩。
+
+compression_level 控制zip压缩级别：None 为zipfile默认（deflate 6），0 为只存储不压缩，
+1~9 为deflate级别。供导出后马上被程序读取的中间文件可以用0或1，显著减少压缩耗时。
+
+SheetPartCache 缓存已渲染并压缩的工作表，数据与配置未变的sheet再次导出时直接使用缓存的部件。
+
+AtomicOutputFile 先写入临时文件（可放在本地快速磁盘上），成功后再原子替换目标文件。
+"""
+import os
+import queue
+import shutil
+import stat
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from io import StringIO
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import xlsxwriter
+import xlsxwriter.workbook
+from xlsxwriter.packager import Packager
+from xlsxwriter.worksheet import Worksheet
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED, ZIP_STORED, ZIP64_LIMIT, LargeZipFile
+
+
+# ==================== 压缩 ====================
+
+@dataclass(frozen=True)
+class PackagePart:
+    """已压缩的zip部件"""
+    data: bytes  # 压缩后的数据
+    crc: int  # 原始数据的CRC32
+    file_size: int  # 原始数据大小
+    compress_type: int = ZIP_DEFLATED
+
+
+def check_compression_level(level: Optional[int]) -> Optional[int]:
+    """校验压缩级别（None 或 0~9）"""
+    if level is not None and not 0 <= level <= 9:
+        raise ValueError(f"压缩级别必须为 0~9: {level}")
+    return level
+
+
+def compress_part(data: bytes, level: Optional[int] = None) -> PackagePart:
+    """按zipfile的deflate参数压缩（结果与zipfile自行压缩完全一致），级别为0时只存储"""
+    if level == 0:
+        return PackagePart(data=data, crc=zlib.crc32(data), file_size=len(data), compress_type=ZIP_STORED)
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if level is None else level, zlib.DEFLATED, -15)
+    compressed = compressor.compress(data) + compressor.flush()
+    return PackagePart(data=compressed, crc=zlib.crc32(data), file_size=len(data))
+
+
+class CompressionStage:
+    """
+    后台压缩阶段：提交的XML文本在工作线程中编码并压缩
+    队列有上限，压缩跟不上时 submit 会阻塞，避免渲染好的XML在内存中堆积
+    workers 大于1时多个sheet同时压缩（多核机器上有效）
+    """
+
+    def __init__(self, workers: int = 1, max_pending: int = 2, level: Optional[int] = None):
+        self._level = level
+        self._queue = queue.Queue(maxsize=max(max_pending, 1))
+        self._parts: Dict[str, PackagePart] = {}
+        self._error: Optional[BaseException] = None
+        self._aborted = False
+        self._threads = [threading.Thread(target=self._run, name=f"xlsx-compress-{index}", daemon=True)
+                         for index in range(max(workers, 1))]
+        for thread in self._threads:
+            thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            arcname, text = item
+            try:
+                if self._error is None and not self._aborted:
+                    self._parts[arcname] = compress_part(text.encode('utf-8'), self._level)
+            except BaseException as e:  # 在 finish 中重新抛出
+                self._error = e
+
+    def add(self, arcname: str, part: PackagePart):
+        """加入已压缩的部件（不经过压缩线程）"""
+        self._parts[arcname] = part
+
+    def submit(self, arcname: str, text: str):
+        """提交一个部件（队列满时阻塞）"""
+        if self._error is not None:
+            raise self._error
+        self._queue.put((arcname, text))
+
+    def finish(self) -> Dict[str, PackagePart]:
+        """等待全部压缩完成，返回 zip内路径 -> 已压缩部件"""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._parts
+
+    def abort(self):
+        """放弃尚未压缩的部件并结束工作线程"""
+        self._aborted = True
+        self._error = None
+        self.finish()
+
+
+# ==================== 已渲染工作表缓存 ====================
+
+DEFAULT_SHEET_CACHE_BYTES = 256 * 1024 * 1024  # 内存中缓存的已压缩sheet默认上限 256MB
+
+
+@dataclass(frozen=True)
+class SheetPartEntry:
+    """
+    缓存的已渲染工作表
+
+    XML中只通过序号引用workbook级的共享字符串和单元格格式，
+    复用时必须在新workbook中得到完全相同的序号。
+    """
+    part: PackagePart  # 压缩后的工作表XML
+    strings: Tuple[Tuple[int, str], ...]  # (共享字符串序号, 字符串)，按序号排列
+    string_count: int  # 该sheet对共享字符串的引用次数（计入sst的count）
+    formats: Tuple[Tuple[str, Mapping[str, Any], int], ...]  # (格式键, 格式属性, xf序号)，按序号排列
+    attrs: Mapping[str, Any]  # 渲染时记录在worksheet上、workbook级部件需要的属性（自动筛选区域等）
+
+    @property
+    def nbytes(self) -> int:
+        """估算占用的内存"""
+        return len(self.part.data) + sum(len(text) + 64 for _, text in self.strings)
+
+
+class SheetPartCache:
+    """已渲染工作表的内存缓存（键由调用方按数据与配置计算），超过上限时淘汰最久未使用的条目"""
+
+    def __init__(self, max_bytes: int = DEFAULT_SHEET_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, SheetPartEntry]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[SheetPartEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: SheetPartEntry):
+        if entry.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old.nbytes
+            self._entries[key] = entry
+            self._size += entry.nbytes
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.nbytes
+
+    def size(self) -> int:
+        """缓存占用（字节，估算）"""
+        return self._size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# ==================== zip写入 ====================
+
+# 当前线程正在保存的workbook的已压缩部件与压缩级别（xlsxwriter 在 _store_workbook 中创建 ZipFile）
+_package_context = threading.local()
+_install_lock = threading.Lock()
+
+
+class PackageZipFile(ZipFile):
+    """
+    写入时可以直接使用已压缩数据的ZipFile，其余部件按当前线程指定的压缩级别写入
+    当前线程没有设置时与ZipFile完全相同
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._package_parts = getattr(_package_context, 'parts', None) or {}
+        level = getattr(_package_context, 'level', None)
+        if level == 0:
+            self.compression = ZIP_STORED
+        elif level is not None:
+            self.compresslevel = level
+
+    def write(self, filename, arcname=None, *args, **kwargs):
+        part = self._package_parts.get(arcname)
+        if part is None:
+            return super().write(filename, arcname, *args, **kwargs)
+        # 与 ZipFile.write 一致：时间戳、权限取自xlsxwriter生成的临时文件
+        self._write_part(ZipInfo.from_file(filename, arcname), part)
+
+    def writestr(self, zinfo_or_arcname, data, *args, **kwargs):
+        arcname = zinfo_or_arcname.filename if isinstance(zinfo_or_arcname, ZipInfo) else zinfo_or_arcname
+        part = self._package_parts.get(arcname)
+        if part is None or not isinstance(zinfo_or_arcname, ZipInfo):
+            # xlsxwriter 内存模式传入的ZipInfo只复制了压缩方式，压缩级别需要单独指定
+            kwargs.setdefault('compresslevel', self.compresslevel)
+            return super().writestr(zinfo_or_arcname, data, *args, **kwargs)
+        self._write_part(zinfo_or_arcname, part)
+
+    def _write_part(self, zinfo: ZipInfo, part: PackagePart):
+        """写入已压缩的部件，文件头与 ZipFile 自行压缩写入的结果相同"""
+        if not self._seekable:
+            # 不可回写的输出需要数据描述符，退回普通写入
+            with self._lock:
+                with self.open(zinfo, mode='w') as dest:
+                    dest.write(zlib.decompress(part.data, -15))
+            return
+
+        zinfo.compress_type = part.compress_type
+        zinfo.flag_bits = 0x00
+        if not zinfo.external_attr:
+            zinfo.external_attr = 0o600 << 16
+        zinfo.file_size = part.file_size
+        zinfo.compress_size = len(part.data)
+        zinfo.CRC = part.crc
+
+        zip64 = zinfo.file_size * 1.05 > ZIP64_LIMIT
+        if not self._allowZip64 and (zip64 or zinfo.compress_size > ZIP64_LIMIT):
+            raise LargeZipFile("Filesize would require ZIP64 extensions")
+
+        with self._lock:
+            if self._writing:
+                raise ValueError("Can't write to ZIP archive while an open writing handle exists.")
+            self.fp.seek(self.start_dir)
+            zinfo.header_offset = self.fp.tell()
+            self._writecheck(zinfo)
+            self._didModify = True
+            self.fp.write(zinfo.FileHeader(zip64))
+            self.fp.write(part.data)
+            self.filelist.append(zinfo)
+            self.NameToInfo[zinfo.filename] = zinfo
+            self.start_dir = self.fp.tell()
+
+
+# xlsxwriter 原本使用的 ZipFile，以及正在用 PackageZipFile 保存的workbook数
+_XLSXWRITER_ZIPFILE = getattr(xlsxwriter.workbook, 'ZipFile', None)
+_hook_users = 0
+
+
+@contextmanager
+def _zipfile_hook():
+    """
+    保存期间让 xlsxwriter 使用 PackageZipFile，最后一个保存结束后恢复原来的 ZipFile
+    （多个线程同时保存时按计数替换/恢复；未设置已压缩部件的线程行为不变）
+    """
+    global _hook_users
+    with _install_lock:
+        if _hook_users == 0:
+            xlsxwriter.workbook.ZipFile = PackageZipFile
+        _hook_users += 1
+    try:
+        yield
+    finally:
+        with _install_lock:
+            _hook_users -= 1
+            if _hook_users == 0:
+                xlsxwriter.workbook.ZipFile = _XLSXWRITER_ZIPFILE
+
+
+def _has_package_hooks() -> bool:
+    """
+    当前 xlsxwriter 是否有流水线导出替换/调用的内部接口（按 requirements.txt 中的 3.1.2 编写）
+    没有时退回 xlsxwriter 原本的 close() 流程
+    """
+    return (_XLSXWRITER_ZIPFILE is ZipFile
+            and all(callable(getattr(Packager, name, None)) for name in ('_write_worksheet_files', '_filename'))
+            and all(callable(getattr(xlsxwriter.Workbook, name, None))
+                    for name in ('_store_workbook', '_get_packager'))
+            and all(callable(getattr(Worksheet, name, None))
+                    for name in ('_set_xml_writer', '_assemble_xml_file', '_opt_reopen', '_write_single_row')))
+
+
+# 流水线导出、指定压缩级别是否可用
+PACKAGE_HOOKS_AVAILABLE = _has_package_hooks()
+if not PACKAGE_HOOKS_AVAILABLE:
+    print(f"[WARN] xlsxwriter {xlsxwriter.__version__} 缺少流水线导出所需的内部接口，"
+          f"导出时不提前渲染sheet，压缩级别使用默认值")
+
+
+# ==================== Workbook ====================
+
+class _PrerenderedPackager(Packager):
+    """已预先渲染的工作表只登记文件名，不再重新生成XML"""
+
+    def __init__(self, prerendered: set):
+        super().__init__()
+        self._prerendered = prerendered
+
+    def _write_worksheet_files(self):
+        index = 1
+        for worksheet in self.workbook.worksheets():
+            if worksheet.is_chartsheet:
+                continue
+
+            xml_filename = "xl/worksheets/sheet" + str(index) + ".xml"
+            if worksheet.index in self._prerendered:
+                self._filename(xml_filename)
+            else:
+                if worksheet.constant_memory:
+                    worksheet._opt_reopen()
+                    worksheet._write_single_row()
+                worksheet._set_xml_writer(self._filename(xml_filename))
+                worksheet._assemble_xml_file()
+            index += 1
+
+
+class ExportWorkbook(xlsxwriter.Workbook):
+    """
+    支持流水线导出的Workbook
+
+    pipelined 为 True 时，调用 finish_worksheet(worksheet) 表示该sheet已全部写完：
+    立即渲染XML、释放单元格数据并提交后台压缩。finish_worksheet 之后不能再修改该sheet。
+    """
+
+    def __init__(self, filename=None, options: Optional[dict] = None,
+                 pipelined: bool = False, compress_workers: int = 1, max_pending: int = 2,
+                 compression_level: Optional[int] = None):
+        super().__init__(filename, options)
+        self._prerendered = set()
+        # close() 后为各工作表的已压缩部件（zip内路径 -> 部件），可加入 SheetPartCache
+        self.package_parts: Dict[str, PackagePart] = {}
+        self._compression_level = check_compression_level(compression_level)
+        self._compression = None
+        if not PACKAGE_HOOKS_AVAILABLE:
+            self._compression_level = None
+        elif pipelined:
+            self._compression = CompressionStage(compress_workers, max(max_pending, compress_workers),
+                                                 self._compression_level)
+
+    def can_prerender(self, worksheet) -> bool:
+        """
+        是否可以提前渲染：
+        流式写入、图表页、以及依赖 close() 时统一编号的对象（图片、图表、批注、表格等）都不行
+        """
+        if self._compression is None or worksheet.constant_memory:
+            return False
+        if any(sheet.is_chartsheet for sheet in self.worksheets()):
+            return False
+        for name in ('charts', 'images', 'shapes', 'tables', 'buttons_list'):
+            if getattr(worksheet, name, None):
+                return False
+        for name in ('has_vml', 'has_header_vml', 'has_comments', 'background_image'):
+            if getattr(worksheet, name, None):
+                return False
+        return True
+
+    @staticmethod
+    def _part_name(worksheet) -> str:
+        return f"xl/worksheets/sheet{worksheet.index + 1}.xml"
+
+    def _select_worksheet(self, worksheet):
+        # 与 _store_workbook 一致：没有指定活动sheet时选中第一个sheet
+        if self.worksheet_meta.activesheet == 0 and worksheet.index == 0:
+            worksheet.selected = 1
+            worksheet.hidden = 0
+        if worksheet.index == self.worksheet_meta.activesheet:
+            worksheet.active = 1
+
+    def finish_worksheet(self, worksheet) -> bool:
+        """sheet写完后提前渲染并提交压缩，返回是否已提前渲染"""
+        if not self.can_prerender(worksheet):
+            return False
+
+        self._select_worksheet(worksheet)
+        fh = StringIO()
+        worksheet._set_xml_writer(fh)
+        worksheet._assemble_xml_file()
+        # 单元格数据已渲染为XML，释放内存
+        worksheet.table.clear()
+
+        self._prerendered.add(worksheet.index)
+        self._compression.submit(self._part_name(worksheet), fh.getvalue())
+        return True
+
+    def add_prerendered(self, worksheet, part: PackagePart) -> bool:
+        """
+        用已渲染并压缩的XML（如 SheetPartCache 中的部件）作为该sheet的内容，返回是否成功
+        XML引用的共享字符串、格式序号由调用方保证与本workbook一致
+        """
+        if not self.can_prerender(worksheet):
+            return False
+        self._select_worksheet(worksheet)
+        self._prerendered.add(worksheet.index)
+        self._compression.add(self._part_name(worksheet), part)
+        return True
+
+    def sheet_part(self, worksheet) -> Optional[PackagePart]:
+        """close() 后获取提前渲染的sheet的已压缩部件"""
+        return self.package_parts.get(self._part_name(worksheet))
+
+    def discard(self):
+        """放弃本次导出：不写入任何数据，结束后台压缩并关闭流式写入的临时文件"""
+        if self.fileclosed:
+            return
+        if self._compression is not None:
+            self._compression.abort()
+        self.fileclosed = True
+        if self.constant_memory:
+            for worksheet in self.worksheets():
+                worksheet._opt_close()
+                filename = getattr(worksheet, 'row_data_filename', None)
+                if filename and os.path.exists(filename):
+                    os.remove(filename)
+
+    def __exit__(self, type, value, traceback):
+        # 出错时放弃，不把不完整的数据写入文件或输出流；已 close() 或 discard() 时不再重复关闭
+        if type is not None:
+            self.discard()
+        elif not self.fileclosed:
+            self.close()
+
+    def _get_packager(self):
+        if not self._prerendered:
+            return super()._get_packager()
+        return _PrerenderedPackager(self._prerendered)
+
+    def _store_workbook(self):
+        if self._compression is None and self._compression_level is None:
+            return super()._store_workbook()
+
+        parts = self._compression.finish() if self._compression is not None else {}
+        self.package_parts = parts
+        _package_context.parts = parts
+        _package_context.level = self._compression_level
+        try:
+            with _zipfile_hook():
+                super()._store_workbook()
+        finally:
+            _package_context.parts = None
+            _package_context.level = None
+
+
+# ==================== 原子写入 ====================
+
+# 落盘到目标目录时的复制缓冲区（一次性顺序写入，适合网络盘）
+COPY_BUFFER_SIZE = 8 * 1024 * 1024
+
+
+def _read_umask() -> int:
+    # 只能通过设置再恢复的方式读取，导入时（尚未启动导出线程）读取一次
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+_UMASK = _read_umask()
+
+
+def _file_mode(target_path: str) -> int:
+    """
+    目标文件的权限（与直接 open 写入时一致）：
+    覆盖已有文件时沿用其权限，新建时为默认权限（按导入时的umask）
+    """
+    try:
+        return stat.S_IMODE(os.stat(target_path).st_mode)
+    except OSError:
+        return 0o666 & ~_UMASK
+
+
+def _fsync(path: str):
+    with open(path, 'rb+') as f:
+        os.fsync(f.fileno())
+
+
+class AtomicOutputFile:
+    """
+    先写入临时文件，成功后原子替换目标文件；取消或失败时目标文件保持不变
+
+    scratch_dir 为临时文件目录（如tmpfs、本地SSD），为空时使用目标文件所在目录。
+    临时目录与目标不在同一文件系统时，完成后一次性顺序复制到目标目录下的临时文件再改名，
+    不会在网络盘上留下写了一半的文件。
+    """
+
+    def __init__(self, target_path: str, scratch_dir: Optional[str] = None):
+        self.target_path = os.path.abspath(target_path)
+        self._target_dir = os.path.dirname(self.target_path)
+        work_dir = scratch_dir or self._target_dir
+        os.makedirs(self._target_dir, exist_ok=True)
+        os.makedirs(work_dir, exist_ok=True)
+        self.temp_path = self._mkstemp(work_dir)
+        self._staged_path: Optional[str] = None
+        self.closed = False
+
+    def _mkstemp(self, directory: str) -> str:
+        # 以点开头并带 .tmp 后缀，避免被其他工具当作结果文件读取
+        fd, path = tempfile.mkstemp(prefix=f".{os.path.basename(self.target_path)}.",
+                                    suffix=".tmp", dir=directory)
+        os.close(fd)
+        return path
+
+    def _same_filesystem(self) -> bool:
+        return os.stat(self.temp_path).st_dev == os.stat(self._target_dir).st_dev
+
+    def commit(self):
+        """把临时文件替换为目标文件"""
+        if self.closed:
+            return
+        mode = _file_mode(self.target_path)
+        os.chmod(self.temp_path, mode)
+        if self._same_filesystem():
+            _fsync(self.temp_path)
+            os.replace(self.temp_path, self.target_path)
+        else:
+            self._staged_path = self._mkstemp(self._target_dir)
+            with open(self.temp_path, 'rb') as src, open(self._staged_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.chmod(self._staged_path, mode)
+            os.replace(self._staged_path, self.target_path)
+            self._staged_path = None
+            os.remove(self.temp_path)
+        self.closed = True
+
+    def discard(self):
+        """删除临时文件，目标文件保持不变"""
+        for path in (self.temp_path, self._staged_path):
+            if path and os.path.exists(path):
+                os.remove(path)
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        # 正常退出时提交，异常时放弃
+        if type is None:
+            self.commit()
+        else:
+            self.discard()
+
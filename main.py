@@ -3,17 +3,23 @@
 import os
 import sys
 import time
+
+# 启动计时起点（用于启动耗时统计）
+_STARTUP_T0 = time.perf_counter()
+
+import multiprocessing
+from contextlib import contextmanager
 from datetime import datetime
 
-from PyQt5.QtCore import pyqtSlot, Qt, QThread, pyqtSignal, QEvent, QDate
-from PyQt5.QtGui import QIntValidator, QColor, QFont, QBrush
+from PyQt5.QtCore import pyqtSlot, Qt, QThread, pyqtSignal, QEvent, QDate, QFileSystemWatcher, QStandardPaths
+from PyQt5.QtGui import QIntValidator, QColor, QFont, QBrush, QStandardItem
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QListWidgetItem,
                              QDialog, QTableWidgetItem, QMessageBox, QSlider,
                              QComboBox, QStyledItemDelegate, QHBoxLayout, QPushButton, QComboBox, QGroupBox, QLineEdit,
                              QLabel, QVBoxLayout, QFileDialog, QProgressDialog)
 
-from logic.work_table import WorkTable
 from logic.chinese_messagebox import setup_chinese_messagebox
+from logic.config_store import ConfigStore, SERVICE, FROM_ACCOUNT, MASTER_ACCOUNT
 from ui.pyui.ui_config import Ui_Dialog
 from ui.pyui.ui_main import Ui_MainWindow
 import warnings
@@ -21,6 +27,18 @@ import warnings
 warnings.filterwarnings("ignore", category=DeprecationWarning,
                         message="sipPyTypeDict.*deprecated")
 
+# 模块导入完成耗时
+_IMPORT_ELAPSED = time.perf_counter() - _STARTUP_T0
+
+# 启动耗时预算（秒），--startup-check 时超出预算返回非0
+STARTUP_BUDGET = {
+    'import': 1.0,
+    'first_paint': 2.5,
+}
+
+# 首次生成/导出前不应被导入的重型模块
+DEFERRED_MODULES = ('pandas', 'numpy', 'xlsxwriter', 'logic.work_table')
+
 tab_bar_stylesheet = """
             QTabBar::tab {
                 background-color: lightgray;
@@ -53,9 +71,18 @@ class CheckableComboBox(QComboBox):
         # 使用自定义委托显示复选框
         self.setItemDelegate(QStyledItemDelegate())
 
-        # 模型数据改变时更新显示文本
-        self.model().dataChanged.connect(self.updateText)
-        self.model().dataChanged.connect(self.emitSelectionChanged)
+        # 选中项的行号（随模型变化增量维护，不再每次全量扫描）
+        self._checked = set()
+        # 批量修改的嵌套层数，及期间选中状态是否有变化
+        self._batch_depth = 0
+        self._batch_dirty = False
+
+        # 模型数据改变时更新选中集合、显示文本
+        model = self.model()
+        model.dataChanged.connect(self._onDataChanged)
+        model.rowsInserted.connect(self._onRowsInserted)
+        model.rowsRemoved.connect(self._onRowsRemoved)
+        model.modelReset.connect(self._onModelReset)
 
         # 点击下拉框时不选中文本
         self.lineEdit().selectionChanged.connect(lambda: self.lineEdit().setSelection(0, 0))
@@ -91,50 +118,126 @@ class CheckableComboBox(QComboBox):
 
         return super(CheckableComboBox, self).eventFilter(obj, event)
 
+    @contextmanager
+    def batchUpdate(self):
+        """批量修改选中状态：期间不逐项刷新文本、不发射信号，结束时只刷新一次并发射一次 selectionChanged"""
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._batch_dirty:
+                self._batch_dirty = False
+                self.updateText()
+                self.emitSelectionChanged()
+
+    def _selectionTouched(self):
+        """选中状态变化：批量修改中只做标记，否则立即刷新"""
+        if self._batch_depth:
+            self._batch_dirty = True
+        else:
+            self.updateText()
+            self.emitSelectionChanged()
+
+    def _onDataChanged(self, top_left, bottom_right, roles=()):
+        """模型数据改变（如在下拉列表中点击复选框）：只同步变化的行"""
+        if roles and Qt.CheckStateRole not in roles and Qt.DisplayRole not in roles:
+            return
+        model = self.model()
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            item = model.item(row, 0)
+            if item is not None and item.checkState() == Qt.Checked:
+                self._checked.add(row)
+            else:
+                self._checked.discard(row)
+        self._selectionTouched()
+
+    def _onRowsInserted(self, parent, first, last):
+        """插入行后，其后选中项的行号后移"""
+        count = last - first + 1
+        if any(row >= first for row in self._checked):
+            self._checked = {row + count if row >= first else row for row in self._checked}
+        self._selectionTouched()
+
+    def _onModelReset(self):
+        self._checked = set()
+
+    def _onRowsRemoved(self, parent, first, last):
+        """删除行后，去掉被删除的选中项，其后的行号前移"""
+        count = last - first + 1
+        before = len(self._checked)
+        self._checked = {row - count if row > last else row for row in self._checked if not first <= row <= last}
+        if len(self._checked) != before:
+            self._selectionTouched()
+
     def addItems(self, texts):
-        """批量添加项目"""
-        for text in texts:
-            self.addItem(text)
+        """批量添加项目（只在最后刷新一次）"""
+        with self.batchUpdate():
+            for text in texts:
+                self.addItem(text)
 
     def addItem(self, text, userData=None):
         """添加单个项目"""
-        super(CheckableComboBox, self).addItem(text, userData)
-
-        # 为新项目设置复选框
-        item = self.model().item(self.count() - 1, 0)
+        # 直接创建带复选框的项目，避免添加后再修改状态触发多次刷新
+        item = QStandardItem(text)
         item.setFlags(Qt.ItemIsUserCheckable | Qt.ItemIsEnabled)
         item.setCheckState(Qt.Unchecked)
+        if userData is not None:
+            item.setData(userData, Qt.UserRole)
+        self.model().appendRow(item)
 
     def itemChecked(self, index):
         """检查项目是否选中"""
-        item = self.model().item(index, 0)
-        return item.checkState() == Qt.Checked
+        return index in self._checked
 
     def setItemChecked(self, index, checked=True):
         """设置项目选中状态"""
-        item = self.model().item(index, 0)
-        if checked:
-            item.setCheckState(Qt.Checked)
-        else:
-            item.setCheckState(Qt.Unchecked)
-        self.updateText()
+        self.setItemsChecked([index], checked)
+
+    def setItemsChecked(self, indexes, checked=True):
+        """批量设置多个项目的选中状态，只发射一次 selectionChanged"""
+        rows = [row for row in indexes if (row in self._checked) != checked and 0 <= row < self.count()]
+        if not rows:
+            return
+        model = self.model()
+        state = Qt.Checked if checked else Qt.Unchecked
+        with self.batchUpdate():
+            # 逐项修改时屏蔽模型信号，改完后按范围通知一次视图重绘
+            model.blockSignals(True)
+            try:
+                for row in rows:
+                    model.item(row, 0).setCheckState(state)
+            finally:
+                model.blockSignals(False)
+            if checked:
+                self._checked.update(rows)
+            else:
+                self._checked.difference_update(rows)
+            model.dataChanged.emit(model.index(min(rows), 0), model.index(max(rows), 0), [Qt.CheckStateRole])
+
+    def setCheckedItems(self, texts):
+        """只选中文本在 texts 中的项目，其余取消选中"""
+        wanted = set(texts)
+        selected = [i for i in range(self.count()) if self.itemText(i) in wanted]
+        with self.batchUpdate():
+            self.setItemsChecked(sorted(self._checked.difference(selected)), False)
+            self.setItemsChecked(selected, True)
+
+    def checkedIndexes(self):
+        """选中项目的行号（升序）"""
+        return sorted(self._checked)
 
     def checkedItems(self):
         """获取所有选中的项目"""
-        checked_items = []
-        for i in range(self.count()):
-            if self.itemChecked(i):
-                checked_items.append(self.itemText(i))
-        return checked_items
+        return [self.itemText(i) for i in self.checkedIndexes()]
 
     def updateText(self):
         """更新显示文本"""
-        checked_items = self.checkedItems()
-        if checked_items:
-            if len(checked_items) <= 5:
-                text = ", ".join(checked_items)
+        if self._checked:
+            if len(self._checked) <= 5:
+                text = ", ".join(self.checkedItems())
             else:
-                text = f"已选中 {len(checked_items)} 项"
+                text = f"已选中 {len(self._checked)} 项"
         else:
             text = "请选择..."
 
@@ -146,13 +249,11 @@ class CheckableComboBox(QComboBox):
 
     def selectAll(self):
         """全选"""
-        for i in range(self.count()):
-            self.setItemChecked(i, True)
+        self.setItemsChecked(range(self.count()), True)
 
     def selectNone(self):
         """全不选"""
-        for i in range(self.count()):
-            self.setItemChecked(i, False)
+        self.setItemsChecked(range(self.count()), False)
 
 
 class UIConfigDialog(QDialog, Ui_Dialog):
@@ -173,12 +274,10 @@ class UIConfigDialog(QDialog, Ui_Dialog):
     @pyqtSlot()
     def on_pushButton_save_config_clicked(self):
         # 保存时统一使用UTF-8编码
-        with open(self.application_path + f'/config/service', 'w', encoding='utf-8') as file:
-            file.write(self.textEdit.toPlainText())
-        with open(self.application_path + f'/config/master_account', 'w', encoding='utf-8') as file:
-            file.write(self.textEdit_2.toPlainText())
-        with open(self.application_path + f'/config/from_account', 'w', encoding='utf-8') as file:
-            file.write(self.textEdit_3.toPlainText())
+        store = self.parent_window.config_store
+        store.write(SERVICE, self.textEdit.toPlainText())
+        store.write(MASTER_ACCOUNT, self.textEdit_2.toPlainText())
+        store.write(FROM_ACCOUNT, self.textEdit_3.toPlainText())
         self.parent_window.load_combo_data()
         QMessageBox.information(self, "提示", "配置已更新")
         self.reject()
@@ -189,16 +288,19 @@ class UIConfigDialog(QDialog, Ui_Dialog):
 
 
 class UIMainWindow(QMainWindow, Ui_MainWindow):
-    W = WorkTable()
+    _work_table = None
+    startup_check = False
 
     def __init__(self):
         super(UIMainWindow, self).__init__()
+        self._first_paint_done = False
         self.setupUi(self)
         self.setWindowFlags(self.windowFlags() | Qt.WindowMinimizeButtonHint |
                             Qt.WindowMaximizeButtonHint | Qt.WindowCloseButtonHint)
 
         # 初始化 application_path
         self.application_path = get_application_path()
+        self.config_store = ConfigStore(os.path.join(self.application_path, 'config'))
 
         # 替换原有的 QComboBox 为 CheckableComboBox
         self.setup_checkable_combobox()
@@ -212,7 +314,9 @@ class UIMainWindow(QMainWindow, Ui_MainWindow):
 
         # 加载数据
         self.load_combo_data()
+        self.setup_config_watcher()
         self.header = None
+        self.export_plan = None  # 最近一次生成前的导出预估
 
         # 设置初始时间
         self.dateEdit.setDate(QDate.currentDate())
@@ -221,32 +325,27 @@ class UIMainWindow(QMainWindow, Ui_MainWindow):
         # 设置statusBar
         self.statusBar().showMessage('版本：v1.0.0')
 
-    # ==================== 文件编码处理 ====================
-    def read_file_with_encoding(self, file_path):
-        """智能读取文件，自动检测编码"""
-        if not os.path.exists(file_path):
-            return ""
-
-        # 按优先级尝试不同编码
-        encodings = ['utf-8', 'gbk', 'gb2312', 'gb18030', 'big5', 'latin-1']
-
-        for enc in encodings:
-            try:
-                with open(file_path, 'r', encoding=enc) as f:
-                    return f.read()
-            except UnicodeDecodeError:
-                continue
-            except Exception:
-                continue
-
-        # 如果都失败，使用二进制模式并忽略错误
-        with open(file_path, 'rb') as f:
-            return f.read().decode('utf-8', errors='ignore')
-
-    def write_file_with_encoding(self, file_path, content):
-        """写入文件，统一使用UTF-8"""
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+    def work_table(self):
+        """数据生成/导出引擎，首次使用时才导入 pandas/numpy/xlsxwriter 并构建模板"""
+        if UIMainWindow._work_table is None:
+            from logic.work_table import WorkTable
+            from logic.export_cache import ExportCache
+            from logic.xlsx_package import SheetPartCache
+            from logic.generation_memo import GenerationMemo
+            table = WorkTable()
+            # 同一份数据再次导出时直接复制缓存文件；只修改了部分数据时只重新渲染变化的sheet
+            table.export_cache = ExportCache(os.path.join(get_cache_path(), 'export'))
+            table.sheet_cache = SheetPartCache()
+            # 相同日期、账号再次生成时直接取之前的结果
+            table.generation_memo = GenerationMemo()
+            UIMainWindow._work_table = table
+        return UIMainWindow._work_table
+
+    def paintEvent(self, event):
+        super(UIMainWindow, self).paintEvent(event)
+        if not self._first_paint_done:
+            self._first_paint_done = True
+            report_startup_time(self.startup_check)
 
     # ==================== 下拉框设置 ====================
     def setup_checkable_combobox(self):
@@ -303,35 +402,11 @@ class UIMainWindow(QMainWindow, Ui_MainWindow):
         cw = UIConfigDialog(self)
         cw.tabWidget.setCurrentIndex(index)
         try:
-            # 确保config目录存在
-            config_dir = self.application_path + '/config'
-            if not os.path.exists(config_dir):
-                os.makedirs(config_dir)
-
-            # 处理 service 文件 - 使用智能读取
-            service_file = config_dir + '/service'
-            if os.path.exists(service_file):
-                content = self.read_file_with_encoding(service_file)
-                cw.textEdit.setText(content)
-            else:
-                self.write_file_with_encoding(service_file, '')
-
-            # 处理 master_account 文件
-            master_file = config_dir + '/master_account'
-            if os.path.exists(master_file):
-                content = self.read_file_with_encoding(master_file)
-                cw.textEdit_2.setText(content)
-            else:
-                self.write_file_with_encoding(master_file, '')
-
-            # 处理 from_account 文件
-            from_file = config_dir + '/from_account'
-            if os.path.exists(from_file):
-                content = self.read_file_with_encoding(from_file)
-                cw.textEdit_3.setText(content)
-            else:
-                self.write_file_with_encoding(from_file, '')
-
+            # 确保config目录和配置文件存在，内容取自配置缓存
+            self.config_store.ensure_files()
+            cw.textEdit.setText(self.config_store.text(SERVICE))
+            cw.textEdit_2.setText(self.config_store.text(MASTER_ACCOUNT))
+            cw.textEdit_3.setText(self.config_store.text(FROM_ACCOUNT))
         except Exception as e:
             QMessageBox.warning(self, "警告", f"配置文件处理失败：{str(e)}")
 
@@ -360,47 +435,48 @@ class UIMainWindow(QMainWindow, Ui_MainWindow):
     # ==================== 数据加载 ====================
     def load_combo_data(self):
         """加载下拉框数据"""
-        # 确保 config 目录存在
-        config_dir = os.path.join(self.application_path, 'config')
-        if not os.path.exists(config_dir):
-            os.makedirs(config_dir)
+        # 确保 config 目录和配置文件存在（不存在时创建空文件）
+        self.config_store.ensure_files()
 
         # 加载从账号到 check_combo_from
-        from_account_file = os.path.join(config_dir, 'from_account')
-        if os.path.exists(from_account_file):
-            try:
-                content = self.read_file_with_encoding(from_account_file)
-                accounts = [line.strip() for line in content.splitlines() if line.strip()]
-                self.check_combo_from.clear()
-                if accounts:
-                    self.check_combo_from.addItems(accounts)
-            except Exception as e:
-                print(f"读取从账号配置失败: {e}")
-                self.check_combo_from.clear()
-        else:
-            # 文件不存在，创建空文件
-            self.write_file_with_encoding(from_account_file, '')
+        try:
+            accounts = self.config_store.from_accounts()
+            self.check_combo_from.clear()
+            if accounts:
+                self.check_combo_from.addItems(accounts)
+        except Exception as e:
+            print(f"读取从账号配置失败: {e}")
             self.check_combo_from.clear()
 
         # 加载主账号到 check_combo_master
-        master_account_file = os.path.join(config_dir, 'master_account')
-        if os.path.exists(master_account_file):
-            try:
-                content = self.read_file_with_encoding(master_account_file)
-                accounts = [line.strip() for line in content.splitlines() if line.strip()]
-                self.check_combo_master.clear()
-                if accounts:
-                    self.check_combo_master.addItems(accounts)
-                    # 默认全选
-                    self.check_combo_master.selectAll()
-            except Exception as e:
-                print(f"读取主账号配置失败: {e}")
-                self.check_combo_master.clear()
-        else:
-            # 文件不存在，创建空文件
-            self.write_file_with_encoding(master_account_file, '')
+        try:
+            accounts = self.config_store.master_accounts()
+            self.check_combo_master.clear()
+            if accounts:
+                self.check_combo_master.addItems(accounts)
+                # 默认全选
+                self.check_combo_master.selectAll()
+        except Exception as e:
+            print(f"读取主账号配置失败: {e}")
             self.check_combo_master.clear()
 
+    def setup_config_watcher(self):
+        """监视配置文件，外部修改后自动重新加载下拉框"""
+        self.config_watcher = QFileSystemWatcher(self)
+        self.config_watcher.addPaths([self.config_store.config_dir, *self.config_store.paths()])
+        self.config_watcher.fileChanged.connect(self.on_config_file_changed)
+        self.config_watcher.directoryChanged.connect(self.on_config_file_changed)
+
+    def on_config_file_changed(self, path):
+        """配置文件变化：只有账号文件内容确实变化时才刷新下拉框"""
+        # 文件被替换（如编辑器另存）后监视会失效，需重新加入
+        watched = set(self.config_watcher.files())
+        missing = [p for p in self.config_store.paths() if p not in watched and os.path.exists(p)]
+        if missing:
+            self.config_watcher.addPaths(missing)
+        if self.config_store.changed() & {FROM_ACCOUNT, MASTER_ACCOUNT}:
+            self.load_combo_data()
+
     def get_selected_from_accounts(self):
         """获取选中的从账号"""
         return self.check_combo_from.checkedItems()
@@ -412,7 +488,7 @@ class UIMainWindow(QMainWindow, Ui_MainWindow):
     def on_selection_changed(self):
         """选择状态改变时触发（单选/多选都会触发）"""
         if self.listWidget.currentItem():
-            self.set_table(self.W.data_dict[self.listWidget.currentItem().text()].values)
+            self.set_table(self.work_table().data_dict[self.listWidget.currentItem().text()])
 
     # ==================== 数据生成 ====================
     @pyqtSlot()
@@ -438,31 +514,11 @@ class UIMainWindow(QMainWindow, Ui_MainWindow):
             QMessageBox.warning(self, "警告", "开始时间应小于结束时间")
             return
 
-        config_dir = os.path.join(self.application_path, 'config')
-        service_file = os.path.join(config_dir, 'service')
+        service_file = self.config_store.path(SERVICE)
 
         if os.path.exists(service_file):
             try:
-                content = self.read_file_with_encoding(service_file)
-                resource_ip_list = []
-
-                for line in content.splitlines():
-                    line = line.strip()
-                    if not line or line.startswith('#'):
-                        continue
-
-                    # 支持多种分隔符：空格、Tab、逗号、冒号、竖线、分号
-                    for sep in ['\t', ' ', ',', ':', '|', ';']:
-                        if sep in line:
-                            parts = line.split(sep)
-                            parts = [p.strip() for p in parts if p.strip()]
-                            if len(parts) >= 2:
-                                resource_ip_list.append(f"{parts[0]} {parts[1]}")
-                                break
-                    else:
-                        # 没有找到分隔符，整行作为单个项处理（IP或服务器名）
-                        if line:
-                            resource_ip_list.append(line)
+                resource_ip_list = self.config_store.inventory()
 
                 if len(resource_ip_list) == 0:
                     reply = QMessageBox.warning(self, "提示",
@@ -490,6 +546,22 @@ class UIMainWindow(QMainWindow, Ui_MainWindow):
                 self.on_action_menu_clicked(0)
             return
 
+        # 生成前预估数据规模与导出方式，大任务先让用户确认
+        plan = self.work_table().plan_export(
+            start_date,
+            end_date,
+            len(resource_ip_list),
+            len(from_account_list),
+            len(master_account_list)
+        )
+        if plan.needs_confirmation:
+            reply = QMessageBox.question(self, "数据量预估",
+                                         f"{plan.summary()}\n\n是否继续生成？",
+                                         QMessageBox.Yes | QMessageBox.No)
+            if reply != QMessageBox.Yes:
+                return
+        self.export_plan = plan
+
         dialog = QDialog(self)
         dialog.setWindowTitle("请稍候")
         dialog.setLayout(QVBoxLayout())
@@ -498,7 +570,7 @@ class UIMainWindow(QMainWindow, Ui_MainWindow):
         dialog.setWindowModality(Qt.WindowModal)
         dialog.show()
 
-        self.W.generate_timesheet_data(
+        self.work_table().generate_timesheet_data(
             start_date,
             end_date,
             resource_ip_list,
@@ -507,16 +579,21 @@ class UIMainWindow(QMainWindow, Ui_MainWindow):
         )
 
         # 获取表头
-        self.header = self.W.header
+        self.header = self.work_table().header
 
-        # 更新列表
+        # 更新列表（重建期间不触发预览刷新）
+        data_dict = self.work_table().data_dict
+        delta = self.work_table().last_delta
+        current_sheet = self.listWidget.currentItem().text() if self.listWidget.currentItem() else None
+        self.listWidget.blockSignals(True)
         self.listWidget.clear()
-        for key, value in self.W.data_dict.items():
+        for key, value in data_dict.items():
             font = QFont()
             font.setPointSize(14)
             item = QListWidgetItem(key)
             item.setFont(font)
             self.listWidget.addItem(item)
+        self.listWidget.blockSignals(False)
 
         # 设置列表宽度
         if self.listWidget.count() > 0:
@@ -524,19 +601,25 @@ class UIMainWindow(QMainWindow, Ui_MainWindow):
             self.listWidget.setMinimumWidth(max_width + 30)
             self.label_8.setMinimumWidth(max_width + 30)
 
-        # 默认第一页数据
-        if self.W.data_dict:
-            self.listWidget.setCurrentRow(0)
-            self.set_table(self.W.data_dict[next(iter(self.W.data_dict))].values)
+        # 继续预览之前选中的sheet（内容未变时不重新填充表格），否则显示第一页
+        if data_dict:
+            sheet_names = list(data_dict)
+            keep = current_sheet in data_dict
+            self.listWidget.blockSignals(True)
+            self.listWidget.setCurrentRow(sheet_names.index(current_sheet) if keep else 0)
+            self.listWidget.blockSignals(False)
+            if not keep or current_sheet in delta.dirty:
+                self.set_table(data_dict[self.listWidget.currentItem().text()])
+        self.statusBar().showMessage(delta.summary())
 
         dialog.close()
 
     # ==================== 表格操作 ====================
-    def set_table(self, data_list):
+    def set_table(self, data):
         headers = self.setup_table_from_header(self.header)
-        self.populate_data_rows(headers, data_list)
+        self.populate_data_rows(headers, data)
 
-    def setup_table_from_header(self, header_row, data_list=None):
+    def setup_table_from_header(self, header_row, data=None):
         """从 HeaderRow 对象设置完整表格"""
         # 1. 清空表格
         self.tableWidget.clear()
@@ -569,9 +652,9 @@ class UIMainWindow(QMainWindow, Ui_MainWindow):
                 self.apply_header_item_style(header_item, header['style'])
 
         # 6. 如果有数据，填充数据
-        if data_list:
-            self.tableWidget.setRowCount(len(data_list))
-            self.populate_data_rows(headers, data_list)
+        if data is not None and len(data):
+            self.tableWidget.setRowCount(len(data))
+            self.populate_data_rows(headers, data)
 
         # 7. 调整列宽
         self.tableWidget.resizeColumnsToContents()
@@ -592,28 +675,38 @@ class UIMainWindow(QMainWindow, Ui_MainWindow):
             cleaned = cleaned[:20] + "..."
         return cleaned
 
-    def populate_data_rows(self, headers, data_list):
-        """填充数据行 - 二维数组版本"""
+    def populate_data_rows(self, headers, data):
+        """填充数据行 - 按列填充，分类列直接按编码查类别表"""
         self.tableWidget.setEditTriggers(self.tableWidget.NoEditTriggers)
-        row_count = len(data_list)
+        row_count = len(data)
         self.tableWidget.setRowCount(row_count)
 
         if self.tableWidget.columnCount() == 0:
             self.tableWidget.setColumnCount(len(headers))
 
-        for row, row_data in enumerate(data_list):
-            for col, cell_value in enumerate(row_data):
-                if col < self.tableWidget.columnCount():
-                    item = QTableWidgetItem(str(cell_value))
+        for col, column_name in enumerate(data.columns):
+            if col >= self.tableWidget.columnCount():
+                break
+
+            series = data[column_name]
+            if series.dtype.name == 'category':
+                # 每个类别只转换一次文本，单元格按编码取值
+                texts = [str(value) for value in series.cat.categories]
+                cells = ((texts[code], str) if code >= 0 else ('nan', float) for code in series.cat.codes.to_numpy())
+            else:
+                cells = ((str(value), type(value)) for value in series.tolist())
+
+            for row, (text, value_type) in enumerate(cells):
+                item = QTableWidgetItem(text)
 
-                    if isinstance(cell_value, (int, float)):
-                        item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                    elif isinstance(cell_value, str):
-                        item.setTextAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-                    else:
-                        item.setTextAlignment(Qt.AlignCenter)
+                if issubclass(value_type, (int, float)):
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                elif issubclass(value_type, str):
+                    item.setTextAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+                else:
+                    item.setTextAlignment(Qt.AlignCenter)
 
-                    self.tableWidget.setItem(row, col, item)
+                self.tableWidget.setItem(row, col, item)
 
         self.tableWidget.resizeColumnsToContents()
 
@@ -694,10 +787,14 @@ class UIMainWindow(QMainWindow, Ui_MainWindow):
             return True
 
         try:
-            self.W.export(file_path, progress_callback=progress_callback)
+            written = self.work_table().export(file_path, progress_callback=progress_callback,
+                                               plan=self.export_plan)
 
             if is_cancelled:
                 QMessageBox.information(self, "导出取消", "导出操作已被用户取消")
+            elif written and len(written) > 1:
+                QMessageBox.information(self, "导出成功",
+                                        f"共导出 {len(written)} 个文件，保存在:\n{os.path.dirname(file_path)}")
             else:
                 QMessageBox.information(self, "导出成功", f"文件已保存到:\n{file_path}")
 
@@ -708,6 +805,28 @@ class UIMainWindow(QMainWindow, Ui_MainWindow):
             progress_dialog.close()
 
 
+def report_startup_time(check=False):
+    """输出启动耗时（导入耗时、首次绘制耗时）；check 为 True 时按预算校验后退出"""
+    first_paint = time.perf_counter() - _STARTUP_T0
+    loaded = [name for name in DEFERRED_MODULES if name in sys.modules]
+    print(f"[INFO] 启动耗时: 导入 {_IMPORT_ELAPSED:.3f} 秒, 首次绘制 {first_paint:.3f} 秒")
+
+    if not check:
+        return
+
+    errors = []
+    if _IMPORT_ELAPSED > STARTUP_BUDGET['import']:
+        errors.append(f"导入耗时 {_IMPORT_ELAPSED:.3f} 秒超出预算 {STARTUP_BUDGET['import']} 秒")
+    if first_paint > STARTUP_BUDGET['first_paint']:
+        errors.append(f"首次绘制耗时 {first_paint:.3f} 秒超出预算 {STARTUP_BUDGET['first_paint']} 秒")
+    if loaded:
+        errors.append(f"启动阶段提前导入了重型模块: {', '.join(loaded)}")
+
+    for error in errors:
+        print(f"[ERROR] {error}")
+    QApplication.instance().exit(1 if errors else 0)
+
+
 def get_application_path():
     """获取应用程序路径 - 跨平台兼容版本"""
     if getattr(sys, 'frozen', False):
@@ -723,9 +842,25 @@ def get_application_path():
     return base_path
 
 
+def get_cache_path():
+    """
+    获取用户缓存目录（导出缓存等）
+
+    不放在程序目录下：打包后程序目录可能是临时解压目录（onefile）或只读的 .app 包
+    """
+    base_path = QStandardPaths.writableLocation(QStandardPaths.GenericCacheLocation)
+    if not base_path:
+        import tempfile
+        base_path = tempfile.gettempdir()
+    return os.path.join(base_path, 'excel_tool')
+
+
 if __name__ == '__main__':
+    # 打包后多进程分文件导出需要
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     setup_chinese_messagebox()
+    UIMainWindow.startup_check = '--startup-check' in sys.argv
     dlg = UIMainWindow()
     dlg.show()
-    app.exec_()
\ No newline at end of file
+    sys.exit(app.exec_())
\ No newline at end of file